@@ -0,0 +1,107 @@
+"""
+Excel 导入性能对比：在合成的 50k 行工作簿上分别运行 cell / bulk / stream 三种写入方式，
+输出耗时、峰值内存（tracemalloc 会明显拖慢运行，因此单独运行一次测量内存），
+并检查 bulk / stream 的更新行数、总行数和写出的单元格值与 cell 方式完全一致
+
+用法（在项目根目录运行）: python -m benchmarks.excel_import [行数]
+"""
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import openpyxl
+
+from similarweb_lib import DomainIndex
+from similarweb_lib.excel_sink import ExcelSink, MODE_BULK, MODE_CELL, MODE_STREAM
+
+DEFAULT_ROW_COUNT = 50_000
+
+
+def build_workbook(path, row_count):
+    """生成与 similarweb_data.xlsx 列布局相同的合成工作簿"""
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(['产品名称', '官网链接', '桌面端占比', '移动端占比', '每月访问量', '每访客访问次数',
+               '已消除重叠的受众', '页面数/访问', '访问持续时间', '跳出率', '更新时间'])
+    for i in range(row_count):
+        ws.append([f'产品{i}', f'https://www.site{i}.com/', None, None, None, None, None, None, None, None, None])
+    wb.save(path)
+
+
+def build_results(row_count):
+    """为一半的行生成抓取结果"""
+    return {
+        f'site{i}.com': {
+            'desktopPersent': '58.97%', 'mobilePercent': '41.03%', 'visits': 12830.0 + i,
+            'visits_per_visitor': 2.55, 'users_tab': 4385.0, 'pages-per-visit': 5.44,
+            'avg_visit_duration': '00:03:34', 'bounce_rate': '38.92%'
+        }
+        for i in range(0, row_count, 2)
+    }
+
+
+def run_mode(mode, template_path, work_dir, json_data_dict, trace_memory=False):
+    path = os.path.join(work_dir, f'{mode}.xlsx')
+    shutil.copyfile(template_path, path)
+    domain_index = DomainIndex(json_data_dict)
+
+    if trace_memory:
+        tracemalloc.start()
+    start_time = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):  # 屏蔽逐行输出，只统计读写本身
+        sink = ExcelSink(path, mode=mode)
+        matched_count = sink.apply(domain_index, '2025-01-01 00:00:00')
+        sink.save()
+    elapsed = time.perf_counter() - start_time
+    peak_memory = None
+    if trace_memory:
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return path, elapsed, peak_memory, (matched_count, sink.total_rows)
+
+
+def read_values(path):
+    """读取活动工作表的所有值（去掉行尾的空单元格，只读模式按工作表声明的范围补齐空列）"""
+    wb = openpyxl.load_workbook(path, read_only=True)
+    try:
+        rows = []
+        for values in wb.active.iter_rows(values_only=True):
+            values = list(values)
+            while values and values[-1] is None:
+                values.pop()
+            rows.append(values)
+        return rows
+    finally:
+        wb.close()
+
+
+def main():
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROW_COUNT
+    work_dir = tempfile.mkdtemp(prefix='excel_import_bench_')
+    try:
+        template_path = os.path.join(work_dir, 'template.xlsx')
+        print(f"正在生成 {row_count} 行的合成工作簿...")
+        build_workbook(template_path, row_count)
+        json_data_dict = build_results(row_count)
+
+        print(f"\n{'方式':<8}{'耗时(秒)':>12}{'峰值内存(MB)':>16}{'更新行数':>10}{'结果一致':>10}")
+        expected_values = None
+        for mode in (MODE_CELL, MODE_BULK, MODE_STREAM):
+            path, elapsed, _, counts = run_mode(mode, template_path, work_dir, json_data_dict)
+            values = (counts, read_values(path))  # 更新行数、总行数和写出的值都应与 cell 方式一致
+            if expected_values is None:
+                expected_values = values
+            _, _, peak_memory, _ = run_mode(mode, template_path, work_dir, json_data_dict, trace_memory=True)
+            same = '✓' if values == expected_values else '❌'
+            print(f"{mode:<8}{elapsed:>12.2f}{peak_memory / 1024 / 1024:>16.1f}{counts[0]:>10}{same:>10}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import re
+
+from similarweb_lib.records import column_index
+
+# 本地模拟的 gspread 后端：不访问网络，供 benchmarks/sheets_updates.py 验证 Google Sheets 更新逻辑（调用次数、重试、写入结果）
+
+A1_RANGE_PATTERN = re.compile(r"^(?:'((?:[^']|'')*)'!)?([A-Z]+)(\d+)(?::([A-Z]+)(\d+))?$")
+
+
+class FakeApiError(Exception):
+    """模拟 gspread.exceptions.APIError，带有HTTP状态码 code"""
+
+    def __init__(self, code, message=''):
+        super().__init__(f"{code} {message}".strip())
+        self.code = code
+
+
+class FakeSpreadsheet:
+    """
+    模拟 gspread.Spreadsheet：记录每次 values_batch_update 的请求体，
+    failures 中按顺序列出每次调用要返回的错误码（None 表示成功）
+    """
+
+    def __init__(self, failures=None):
+        self.calls = []
+        self.failures = list(failures or [])
+        self.worksheets = {}
+
+    def add_worksheet(self, title, rows):
+        worksheet = FakeWorksheet(title, rows, self)
+        self.worksheets[title] = worksheet
+        return worksheet
+
+    def values_batch_update(self, body):
+        self.calls.append(body)
+        if self.failures:
+            status = self.failures.pop(0)
+            if status is not None:
+                raise FakeApiError(status)
+        for item in body['data']:
+            match = A1_RANGE_PATTERN.match(item['range'])
+            title = match.group(1).replace("''", "'") if match.group(1) else next(iter(self.worksheets))
+            self.worksheets[title].write(match.group(2), int(match.group(3)), item['values'])
+        return {'totalUpdatedRows': sum(len(item['values']) for item in body['data'])}
+
+
+class FakeWorksheet:
+    """模拟 gspread.Worksheet，单元格保存在二维列表中"""
+
+    def __init__(self, title, rows, spreadsheet=None):
+        self.title = title
+        self.rows = [list(row) for row in rows]
+        self.spreadsheet = spreadsheet
+        self.get_all_values_calls = 0
+
+    def get_all_values(self):
+        self.get_all_values_calls += 1
+        return [[str(value) for value in row] for row in self.rows]
+
+    def write(self, start_column, start_row, values):
+        first_column = column_index(start_column)
+        for row_offset, row_values in enumerate(values):
+            row_index = start_row + row_offset
+            while len(self.rows) < row_index:
+                self.rows.append([])
+            row = self.rows[row_index - 1]
+            needed = first_column - 1 + len(row_values)
+            if len(row) < needed:
+                row.extend([''] * (needed - len(row)))
+            row[first_column - 1:needed] = row_values
+
+    def batch_update(self, updates):
+        for update in updates:
+            match = A1_RANGE_PATTERN.match(update['range'])
+            self.write(match.group(2), int(match.group(3)), update['values'])
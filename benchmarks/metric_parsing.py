@@ -0,0 +1,85 @@
+"""
+指标解析性能对比：在随机生成的一百万个原始指标值上，对比逐个调用标量解析函数
+（parse_metric_value，按格式调用 parse_number / parse_fraction / parse_seconds）与批量解析 parse_metric_array 的耗时，
+并逐个核对两者的结果是否一致
+
+用法（在项目根目录运行）: python -m benchmarks.metric_parsing [数量] [随机种子]
+"""
+import math
+import random
+import sys
+import time
+
+from similarweb_lib.metrics import parse_metric_array, parse_metric_value
+
+DEFAULT_VALUE_COUNT = 1_000_000
+DEFAULT_SEED = 20250801
+
+
+def random_value(rng):
+    """生成一个与页面上出现的格式相同的原始指标值（包括缺失值和无法解析的值）"""
+    kind = rng.random()
+    if kind < 0.30:
+        return f"{rng.uniform(0, 999):.{rng.randint(0, 2)}f}{rng.choice(['M', 'K', '亿', '万', '千', ''])}"
+    if kind < 0.45:
+        return f"{rng.randint(0, 9_999_999):,}"
+    if kind < 0.65:
+        return f"{rng.uniform(0, 100):.2f}%"
+    if kind < 0.80:
+        seconds = rng.randint(0, 7200)
+        if rng.random() < 0.5:
+            return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+        return f"{seconds // 60:02d}:{seconds % 60:02d}"
+    if kind < 0.90:
+        return rng.uniform(0, 100_000)
+    return rng.choice([None, "N/A", "", "--", "abc", "1.2.3", "< 5K", "M", "1.2.3K", "K%", "nan", "inf"])
+
+
+def check_agreement(values, numbers, valid):
+    """逐个核对批量解析与标量解析的结果，返回不一致的值（最多10个）"""
+    mismatches = []
+    for value, number, is_valid in zip(values, numbers, valid):
+        expected = parse_metric_value(value)
+        if expected is None:
+            same = not is_valid and math.isnan(number)
+        else:
+            same = bool(is_valid) and math.isclose(number, expected, rel_tol=1e-12, abs_tol=1e-12)
+        if not same:
+            mismatches.append((value, expected, number))
+            if len(mismatches) >= 10:
+                break
+    return mismatches
+
+
+def main():
+    value_count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_VALUE_COUNT
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_SEED
+    rng = random.Random(seed)
+    print(f"正在生成 {value_count} 个随机指标值（种子 {seed}）...")
+    values = [random_value(rng) for _ in range(value_count)]
+
+    start_time = time.perf_counter()
+    scalar_results = [parse_metric_value(value) for value in values]
+    scalar_elapsed = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    numbers, valid = parse_metric_array(values)
+    batch_elapsed = time.perf_counter() - start_time
+
+    print(f"\n{'方式':<10}{'耗时(秒)':>12}{'每秒处理(万个)':>18}")
+    print(f"{'scalar':<10}{scalar_elapsed:>12.2f}{value_count / scalar_elapsed / 10_000:>18.1f}")
+    print(f"{'batch':<10}{batch_elapsed:>12.2f}{value_count / batch_elapsed / 10_000:>18.1f}")
+    print(f"\n有效值 {sum(valid)} 个，缺失或无法解析 {value_count - sum(valid)} 个"
+          f"（标量解析 {sum(result is None for result in scalar_results)} 个）")
+
+    mismatches = check_agreement(values, numbers, valid)
+    if mismatches:
+        print("❌ 批量解析与标量解析结果不一致:")
+        for value, expected, number in mismatches:
+            print(f"  {value!r}: 标量 {expected!r}，批量 {number!r}")
+        sys.exit(1)
+    print("✓ 批量解析与标量解析结果全部一致")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+离线回放基准：用本地HTTP服务器回放 snapshots/ 中采集的概览页快照（抓取时开启 CAPTURE_SNAPSHOTS 采集），
+在 Chrome 中对每个快照运行 search_and_scrape_website_data，
+输出每个域名的耗时、提取结果是否与采集时一致，以及各阶段的 p50 / p95；
+同时统计快照页面上是否显示了该域名（核对 stale_render.page_shows_domain 的规则）；
+可以分别用 full（原始有界面配置）和 lean（无头精简配置）两种浏览器配置运行，对比页面就绪时间和浏览器内存（RSS）
+
+用法（在项目根目录运行）: python -m benchmarks.replay_scrape [快照目录] [并发数] [模拟渲染延迟(秒)] [等待方式 ready/fixed] [浏览器配置 full/lean/both]
+full 配置需要图形界面（Linux 服务器上可用 xvfb-run 运行）；浏览器内存在 Linux（/proc）和 Windows（进程工作集）上统计
+例如在 Windows 上对比两种配置: python -m benchmarks.replay_scrape snapshots 2 0 ready both
+"""
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+
+from selenium import webdriver
+
+from browser_profile import PROFILE_FULL, PROFILE_LEAN, apply_network_rules, browser_rss_bytes, configure_browser_options
+from overview_snapshots import SNAPSHOT_DIR, SnapshotServer, load_snapshots
+from scrape_similarweb_data import PAGE_WAIT_MODE, search_and_scrape_website_data
+from scrape_timing import TimingRecorder, percentile
+from similarweb_lib.metrics import MetricRecord
+from stale_render import page_shows_domain
+
+
+def create_replay_driver(profile):
+    """回放用的 Chrome，启动参数与抓取程序的浏览器配置相同（本地页面，不需要绕过 Cloudflare）"""
+    options = configure_browser_options(webdriver.ChromeOptions(), profile, window_size='1920,1080')
+    driver = webdriver.Chrome(options=options)
+    apply_network_rules(driver, profile)
+    return driver
+
+
+def mismatched_fields(actual, expected):
+    """返回提取结果与采集结果不一致的字段名"""
+    return [name for name in MetricRecord.__slots__
+            if MetricRecord(**{name: getattr(actual, name)}) != MetricRecord(**{name: getattr(expected, name)})]
+
+
+def run_replay(snapshots, data_url_template, worker_count, wait_mode, timing_recorder, profile):
+    """
+    返回: ([(域名, 耗时, 不一致的字段, 页面是否显示该域名)], 浏览器内存峰值（字节，多个 worker 合计），取不到时为 None)
+    """
+    pending = queue.Queue()
+    for snapshot in snapshots:
+        pending.put(snapshot)
+    results = []
+    results_lock = threading.Lock()
+    peak_rss = {}  # worker编号 -> 该浏览器的内存峰值
+
+    def worker(worker_id):
+        driver = create_replay_driver(profile)
+        try:
+            while True:
+                try:
+                    snapshot = pending.get_nowait()
+                except queue.Empty:
+                    return
+                url = snapshot['url']
+                timer = timing_recorder.start(url, f"worker-{worker_id}")
+                record = search_and_scrape_website_data(driver, url, data_url_template, wait_mode=wait_mode, timer=timer)
+                if record is None:
+                    mismatches = [f"抓取出错（{timer.error}）"]
+                else:
+                    mismatches = mismatched_fields(record, MetricRecord.from_dict(snapshot['expected']))
+                timing_recorder.record(timer, 'mismatch' if mismatches else 'match')
+                domain_shown = page_shows_domain(driver, url)
+                rss = browser_rss_bytes(driver)
+                with results_lock:
+                    results.append((url, timer.total, mismatches, domain_shown))
+                    if rss is not None:
+                        peak_rss[worker_id] = max(peak_rss.get(worker_id, 0), rss)
+        finally:
+            driver.quit()
+
+    threads = [threading.Thread(target=worker, args=(worker_id + 1,)) for worker_id in range(worker_count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, (sum(peak_rss.values()) if peak_rss else None)
+
+
+def replay_profile(snapshots, snapshot_dir, worker_count, render_delay, wait_mode, profile):
+    """用一种浏览器配置回放全部快照并输出结果，返回汇总指标"""
+    server = SnapshotServer(snapshot_dir, render_delay=render_delay).start()
+    log_path = os.path.join(tempfile.gettempdir(), f'replay_scrape_timing_{profile}.jsonl')
+    if os.path.exists(log_path):
+        os.remove(log_path)
+    timing_recorder = TimingRecorder(log_path)
+    print(f"\n回放 {len(snapshots)} 个快照: {server.data_url_template}")
+    print(f"浏览器配置 {profile}，并发数 {worker_count}，模拟渲染延迟 {render_delay} 秒，等待方式 {wait_mode}\n")
+
+    start_time = time.perf_counter()
+    try:
+        results, peak_rss = run_replay(snapshots, server.data_url_template, worker_count, wait_mode, timing_recorder, profile)
+    finally:
+        server.close()
+    total_time = time.perf_counter() - start_time
+
+    print(f"\n{'域名':<40}{'耗时(秒)':>10}  结果")
+    for url, elapsed, mismatches, domain_shown in sorted(results, key=lambda item: item[1], reverse=True):
+        status = "✓ 一致" if not mismatches else "❌ 不一致: " + ", ".join(mismatches)
+        if domain_shown is False:
+            status += "（页面上没有显示该域名）"
+        print(f"{url:<40}{elapsed:>10.2f}  {status}")
+
+    latencies = sorted(elapsed for _, elapsed, _, _ in results)
+    render_waits = sorted(entry['spans'].get('render_wait', 0.0) for entry in timing_recorder.entries)
+    summary = {
+        'profile': profile,
+        'correct': sum(1 for _, _, mismatches, _ in results if not mismatches),
+        'count': len(results),
+        'total_time': total_time,
+        'latency_p50': percentile(latencies, 0.5),
+        'latency_p95': percentile(latencies, 0.95),
+        'render_wait_p50': percentile(render_waits, 0.5),
+        'peak_rss': peak_rss,
+    }
+    shown_count = sum(1 for _, _, _, domain_shown in results if domain_shown)
+    print(f"\n页面上显示了该域名: {shown_count}/{len(results)}（page_shows_domain 规则的命中情况）")
+    print(f"提取正确 {summary['correct']}/{summary['count']}，总耗时 {total_time:.2f} 秒，"
+          f"单个域名 p50 {summary['latency_p50']:.2f} 秒 / p95 {summary['latency_p95']:.2f} 秒，"
+          f"吞吐 {len(results) / total_time * 60:.1f} 个/分钟")
+    timing_recorder.print_report()
+    return summary
+
+
+def main():
+    snapshot_dir = sys.argv[1] if len(sys.argv) > 1 else SNAPSHOT_DIR
+    worker_count = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    render_delay = float(sys.argv[3]) if len(sys.argv) > 3 else 0.0
+    wait_mode = sys.argv[4] if len(sys.argv) > 4 else PAGE_WAIT_MODE
+    profile_arg = sys.argv[5] if len(sys.argv) > 5 else PROFILE_LEAN
+    profiles = [PROFILE_FULL, PROFILE_LEAN] if profile_arg == 'both' else [profile_arg]
+
+    snapshots = load_snapshots(snapshot_dir)
+    if not snapshots:
+        print(f"❌ {snapshot_dir} 中没有快照，请先在 scrape_similarweb_data.py 中开启 CAPTURE_SNAPSHOTS 抓取一次")
+        sys.exit(1)
+
+    summaries = [replay_profile(snapshots, snapshot_dir, worker_count, render_delay, wait_mode, profile) for profile in profiles]
+
+    print(f"\n{'配置':<8}{'正确':>8}{'总耗时(秒)':>12}{'p50(秒)':>10}{'p95(秒)':>10}{'渲染等待p50':>14}{'内存峰值(MB)':>14}")
+    for summary in summaries:
+        peak_rss = f"{summary['peak_rss'] / 1024 / 1024:.0f}" if summary['peak_rss'] is not None else '-'
+        print(f"{summary['profile']:<8}{summary['correct']:>4}/{summary['count']:<3}{summary['total_time']:>12.2f}"
+              f"{summary['latency_p50']:>10.2f}{summary['latency_p95']:>10.2f}{summary['render_wait_p50']:>14.2f}{peak_rss:>14}")
+    if any(summary['correct'] != summary['count'] for summary in summaries):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
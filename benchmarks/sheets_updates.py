@@ -0,0 +1,134 @@
+"""
+Google Sheets 批量更新检查：用本地模拟的 gspread 后端（benchmarks/fake_sheets.py）驱动 SheetsUpdateEngine，
+核对 429 / 5xx 重试、不可重试错误、按请求体大小切分请求，以及统计的API调用次数和发送字节数，
+并输出大批量更新时的API调用次数和字节数
+
+用法（在项目根目录运行）: python -m benchmarks.sheets_updates [行数]
+"""
+import contextlib
+import io
+import json
+import sys
+
+from benchmarks.fake_sheets import FakeSpreadsheet
+from similarweb_lib.records import SHEETS_LAYOUT, record_to_row, update_time_column
+from similarweb_lib.sheets_updates import MAX_PAYLOAD_BYTES, SheetsUpdateEngine
+
+DEFAULT_ROW_COUNT = 20_000
+FIRST_COLUMN = SHEETS_LAYOUT.first_metric
+LAST_COLUMN = update_time_column(SHEETS_LAYOUT)
+SAMPLE_RESULT = {
+    'desktopPersent': '58.97%', 'mobilePercent': '41.03%', 'visits': 12830.0, 'visits_per_visitor': 2.55,
+    'users_tab': 4385.0, 'pages-per-visit': 5.44, 'avg_visit_duration': '00:03:34', 'bounce_rate': '38.92%'
+}
+
+
+def build_worksheet(row_count, failures=None):
+    """生成带标题行和 row_count 行网站的模拟工作表"""
+    spreadsheet = FakeSpreadsheet(failures)
+    rows = [['产品名称', '入库id', '官网链接']] + [[f'产品{i}', str(i), f'https://site{i}.com/'] for i in range(row_count)]
+    return spreadsheet, spreadsheet.add_worksheet('数据表', rows)
+
+
+def build_updates(rows):
+    """为指定行生成 {行号: 该行的值列表}"""
+    return {row: record_to_row(dict(SAMPLE_RESULT, visits=float(row)), '2025-01-01 00:00:00') for row in rows}
+
+
+def run_engine(worksheet, row_values, max_payload_bytes=MAX_PAYLOAD_BYTES):
+    """运行一次更新，返回 (引擎, 失败的行号, 每次退避等待的秒数)"""
+    delays = []
+    engine = SheetsUpdateEngine(worksheet, FIRST_COLUMN, LAST_COLUMN,
+                                max_payload_bytes=max_payload_bytes, sleep=delays.append)
+    with contextlib.redirect_stdout(io.StringIO()):  # 屏蔽每次提交的输出
+        failed_rows = engine.update_rows(row_values)
+    return engine, failed_rows, delays
+
+
+def payload_sizes(spreadsheet):
+    """模拟后端收到的每个请求体的字节数（与引擎计算方式相同）"""
+    return [len(json.dumps(body, ensure_ascii=False).encode('utf-8')) for body in spreadsheet.calls]
+
+
+def written_rows(worksheet, rows):
+    """读取指定行写入的指标区域"""
+    return {row: worksheet.rows[row - 1][FIRST_COLUMN - 1:LAST_COLUMN] for row in rows}
+
+
+def check_retry():
+    """429 和 503 各失败一次后成功：共3次调用，2次退避，字节数按每次调用累计"""
+    spreadsheet, worksheet = build_worksheet(10, failures=[429, 503, None])
+    row_values = build_updates([2, 3, 4, 5, 6, 9])
+    engine, failed_rows, delays = run_engine(worksheet, row_values)
+    return [
+        ("429 / 503 之后重试成功，没有失败的行", not failed_rows),
+        ("API调用次数 = 3，重试次数 = 2", engine.api_calls == 3 and engine.retries == 2 and len(delays) == 2),
+        ("退避等待时间递增", delays[0] < delays[1]),
+        ("发送字节数 = 3次请求体之和", engine.bytes_sent == sum(payload_sizes(spreadsheet))),
+        ("连续行合并为区块（2-6行、9行）", len(spreadsheet.calls[-1]['data']) == 2),
+        ("写入的值正确", written_rows(worksheet, row_values) == row_values),
+    ]
+
+
+def check_non_retryable():
+    """400 不重试，5xx 在重试次数用完后放弃：两种情况都返回所有失败的行"""
+    spreadsheet, worksheet = build_worksheet(10, failures=[400])
+    row_values = build_updates([2, 3, 7])
+    engine, failed_rows, delays = run_engine(worksheet, row_values)
+    checks = [
+        ("400 不重试，返回全部失败的行", failed_rows == set(row_values) and engine.api_calls == 1 and not delays),
+    ]
+
+    spreadsheet, worksheet = build_worksheet(10, failures=[500] * 10)
+    engine, failed_rows, delays = run_engine(worksheet, row_values)
+    checks.append((
+        "5xx 重试次数用完后放弃",
+        failed_rows == set(row_values) and engine.api_calls == engine.max_retries + 1
+        and engine.retries == engine.max_retries and engine.bytes_sent == sum(payload_sizes(spreadsheet))
+    ))
+    return checks
+
+
+def check_payload_split():
+    """请求体上限很小时：一个连续区块被拆成多次调用，每次都不超过上限，所有行都写入"""
+    spreadsheet, worksheet = build_worksheet(200)
+    row_values = build_updates(range(2, 202))
+    max_payload_bytes = 4_000
+    engine, failed_rows, _ = run_engine(worksheet, row_values, max_payload_bytes=max_payload_bytes)
+    sizes = payload_sizes(spreadsheet)
+    return [
+        ("连续区块按请求体大小拆成多次调用", len(sizes) > 1 and engine.api_calls == len(sizes)),
+        (f"每次请求体不超过 {max_payload_bytes} 字节", max(sizes) <= max_payload_bytes),
+        ("发送字节数 = 所有请求体之和", engine.bytes_sent == sum(sizes)),
+        ("所有行都写入且值正确", not failed_rows and written_rows(worksheet, row_values) == row_values),
+    ]
+
+
+def main():
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROW_COUNT
+
+    failed_checks = 0
+    for check in (check_retry, check_non_retryable, check_payload_split):
+        print(f"\n{check.__doc__}")
+        for description, passed in check():
+            print(f"  {'✓' if passed else '❌'} {description}")
+            failed_checks += not passed
+
+    # 隔行更新（无法合并为大区块）与全部行更新的API调用次数和字节数
+    print(f"\n{row_count} 行工作表，请求体上限 {MAX_PAYLOAD_BYTES} 字节:")
+    print(f"{'更新方式':<12}{'更新行数':>10}{'API调用':>10}{'发送(KB)':>12}")
+    for label, rows in (('隔行更新', range(2, row_count + 2, 2)), ('全部行更新', range(2, row_count + 2))):
+        _, worksheet = build_worksheet(row_count)
+        row_values = build_updates(rows)
+        engine, failed_rows, _ = run_engine(worksheet, row_values)
+        print(f"{label:<12}{len(row_values):>10}{engine.api_calls:>10}{engine.bytes_sent / 1024:>12.1f}")
+        failed_checks += bool(failed_rows)
+
+    if failed_checks:
+        print(f"\n❌ {failed_checks} 项检查未通过")
+        sys.exit(1)
+    print("\n✓ 全部检查通过")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+import os
+
+# 浏览器配置方案
+PROFILE_FULL = 'full'  # 有界面、最大化窗口、加载全部资源（原始配置）
+PROFILE_LEAN = 'lean'  # 无头渲染、屏蔽非必要资源、缩小缓存，适合没有图形界面的抓取服务器
+
+# 精简模式下通过 CDP Network.setBlockedURLs 屏蔽的资源（图片、字体、音视频和第三方统计脚本）
+LEAN_BLOCKED_URL_PATTERNS = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico', '*.bmp',
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    '*.mp4', '*.webm', '*.mp3', '*.wav',
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*', '*hotjar.com*',
+    '*clarity.ms*', '*connect.facebook.net*', '*hm.baidu.com*', '*cnzz.com*',
+]
+LEAN_DISK_CACHE_BYTES = 32 * 1024 * 1024  # 精简模式的磁盘缓存上限
+LEAN_WINDOW_SIZE = '1920,1080'  # 无头模式下的固定窗口大小（概览组件按桌面布局渲染）
+
+
+def configure_browser_options(options, profile=PROFILE_FULL, window_size=None):
+    """
+    按配置方案设置 Chrome 启动参数（options 可以是 uc.ChromeOptions 或 webdriver.ChromeOptions）
+    精简模式：无头渲染、禁止图片加载、缩小磁盘/媒体缓存、关闭扩展和后台网络请求
+    """
+    options.add_argument('--disable-dev-shm-usage') # 解决资源限制
+    options.add_argument('--no-sandbox') # 绕过操作系统安全模型
+    if profile == PROFILE_LEAN:
+        options.add_argument('--headless=new')
+        options.add_argument(f'--window-size={LEAN_WINDOW_SIZE}')
+        options.add_argument('--blink-settings=imagesEnabled=false')
+        options.add_argument(f'--disk-cache-size={LEAN_DISK_CACHE_BYTES}')
+        options.add_argument(f'--media-cache-size={LEAN_DISK_CACHE_BYTES}')
+        options.add_argument('--disable-extensions')
+        options.add_argument('--disable-background-networking')
+        options.add_argument('--disable-component-update')
+        options.add_argument('--mute-audio')
+    else:
+        options.add_argument('--start-maximized') # 启动时最大化窗口
+        if window_size:
+            options.add_argument(f'--window-size={window_size}')
+    return options
+
+
+def apply_network_rules(driver, profile=PROFILE_FULL):
+    """精简模式下通过 CDP 屏蔽非必要资源，浏览器启动后、第一次导航前调用"""
+    if profile != PROFILE_LEAN:
+        return
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': LEAN_BLOCKED_URL_PATTERNS})
+        print(f"✓ 精简模式：已屏蔽 {len(LEAN_BLOCKED_URL_PATTERNS)} 类非必要资源")
+    except Exception as e:
+        print(f"⚠️  设置资源屏蔽规则失败，将加载全部资源: {e}")
+
+
+def _child_pids():
+    """读取 /proc，返回 {父进程ID: [子进程ID]}"""
+    children = {}
+    for name in os.listdir('/proc'):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f'/proc/{name}/stat', 'r') as f:
+                # 进程名可能包含空格和括号，从最后一个 ')' 之后开始解析
+                fields = f.read().rsplit(')', 1)[1].split()
+            children.setdefault(int(fields[1]), []).append(int(name))
+        except (OSError, IndexError, ValueError):
+            continue
+    return children
+
+
+def _process_rss_bytes(pid):
+    try:
+        with open(f'/proc/{pid}/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+# Windows 下通过 ctypes 调用 Toolhelp32 快照（进程树）和 GetProcessMemoryInfo（工作集，相当于 RSS），不依赖第三方库
+TH32CS_SNAPPROCESS = 0x00000002
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+PROCESS_VM_READ = 0x0010
+
+
+def _windows_api():
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESSENTRY32W(ctypes.Structure):
+        _fields_ = [
+            ('dwSize', wintypes.DWORD), ('cntUsage', wintypes.DWORD), ('th32ProcessID', wintypes.DWORD),
+            ('th32DefaultHeapID', ctypes.c_size_t), ('th32ModuleID', wintypes.DWORD), ('cntThreads', wintypes.DWORD),
+            ('th32ParentProcessID', wintypes.DWORD), ('pcPriClassBase', ctypes.c_long), ('dwFlags', wintypes.DWORD),
+            ('szExeFile', ctypes.c_wchar * 260),
+        ]
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [
+            ('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+            ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+            ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+            ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t), ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+            ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t),
+        ]
+
+    kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+    kernel32.CreateToolhelp32Snapshot.restype = wintypes.HANDLE
+    kernel32.OpenProcess.restype = wintypes.HANDLE
+    return ctypes, kernel32, PROCESSENTRY32W, PROCESS_MEMORY_COUNTERS
+
+
+def _windows_child_pids():
+    """Toolhelp32 进程快照，返回 {父进程ID: [子进程ID]}"""
+    ctypes, kernel32, PROCESSENTRY32W, _ = _windows_api()
+    children = {}
+    snapshot = kernel32.CreateToolhelp32Snapshot(TH32CS_SNAPPROCESS, 0)
+    if not snapshot or snapshot == ctypes.c_void_p(-1).value:
+        return children
+    try:
+        entry = PROCESSENTRY32W()
+        entry.dwSize = ctypes.sizeof(PROCESSENTRY32W)
+        found = kernel32.Process32FirstW(snapshot, ctypes.byref(entry))
+        while found:
+            children.setdefault(entry.th32ParentProcessID, []).append(entry.th32ProcessID)
+            found = kernel32.Process32NextW(snapshot, ctypes.byref(entry))
+    finally:
+        kernel32.CloseHandle(snapshot)
+    return children
+
+
+def _windows_process_rss_bytes(pid):
+    """进程的工作集大小（字节），没有权限或进程已退出时返回 0"""
+    ctypes, kernel32, _, PROCESS_MEMORY_COUNTERS = _windows_api()
+    handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION | PROCESS_VM_READ, False, pid)
+    if not handle:
+        return 0
+    try:
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(PROCESS_MEMORY_COUNTERS)
+        if kernel32.K32GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+            return counters.WorkingSetSize
+        return 0
+    finally:
+        kernel32.CloseHandle(handle)
+
+
+def browser_rss_bytes(driver):
+    """
+    浏览器占用的物理内存：chromedriver 和 Chrome 进程及其全部子进程（渲染进程、GPU 进程等）的 RSS 之和
+    Linux 读取 /proc，Windows 通过 ctypes 读取进程工作集，其他系统或取不到进程号时返回 None
+    """
+    # undetected_chromedriver 单独启动 Chrome（browser_pid），不是 chromedriver 的子进程，两棵进程树都要统计
+    service_process = getattr(getattr(driver, 'service', None), 'process', None)
+    root_pids = [pid for pid in (getattr(service_process, 'pid', None), getattr(driver, 'browser_pid', None)) if pid]
+    if not root_pids:
+        return None
+    if os.name == 'nt':
+        child_pids, process_rss_bytes = _windows_child_pids, _windows_process_rss_bytes
+    elif os.path.isdir('/proc'):
+        child_pids, process_rss_bytes = _child_pids, _process_rss_bytes
+    else:
+        return None
+
+    children = child_pids()
+    total = 0
+    pending = list(root_pids)
+    seen = set()
+    while pending:
+        pid = pending.pop()
+        if pid in seen:
+            continue
+        seen.add(pid)
+        total += process_rss_bytes(pid)
+        pending.extend(children.get(pid, []))
+    return total
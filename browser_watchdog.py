@@ -0,0 +1,131 @@
+import time
+
+from browser_profile import browser_rss_bytes
+
+# 浏览器健康检查阈值
+RECYCLE_AFTER_DOMAINS = 200  # 每个浏览器最多处理多少个域名后重启（0 表示不按数量重启）
+MAX_BROWSER_RSS_MB = 1500  # 浏览器进程树的内存上限（MB），超过后重启（0 表示不检查）
+MAX_DOMAIN_SECONDS = 120  # 单个域名的抓取耗时上限（秒），超过视为浏览器响应变慢，重启
+MAX_CONSECUTIVE_MISSING = 5  # 连续多少个域名没有取到数据后重启
+MAX_RECYCLE_ATTEMPTS = 3  # 重启失败时的最大重试次数
+
+
+class BrowserWatchdog:
+    """
+    浏览器健康监控：记录每个域名的耗时、结果和浏览器内存，
+    在处理数量达到上限、内存或耗时超过阈值、浏览器无响应、登录态失效或连续取不到数据时重启浏览器
+    重启通过 driver_factory（即 initialize_browser_and_prepare_for_search，会复用 cookies.json 重新登录）完成
+    """
+
+    def __init__(self, driver_factory, driver=None, name='main', session_check=None,
+                 recycle_after_domains=RECYCLE_AFTER_DOMAINS, max_rss_mb=MAX_BROWSER_RSS_MB,
+                 max_domain_seconds=MAX_DOMAIN_SECONDS, max_consecutive_missing=MAX_CONSECUTIVE_MISSING):
+        self.driver_factory = driver_factory
+        self.driver = driver
+        self.name = name
+        self.session_check = session_check  # session_check(driver) 返回 False 表示已被登出
+        self.recycle_after_domains = recycle_after_domains
+        self.max_rss_mb = max_rss_mb
+        self.max_domain_seconds = max_domain_seconds
+        self.max_consecutive_missing = max_consecutive_missing
+        self.domains_since_start = 0
+        self.consecutive_missing = 0
+        self.recycle_count = 0
+        self.peak_rss_mb = 0.0
+        self._pending_reason = None
+
+    def start(self):
+        """启动浏览器（未传入 driver 时），返回 driver，失败时返回 None"""
+        if self.driver is None:
+            self.driver = self.driver_factory()
+        return self.driver
+
+    def rss_mb(self):
+        rss = browser_rss_bytes(self.driver) if self.driver else None
+        if rss is None:
+            return None
+        rss_mb = rss / 1024 / 1024
+        self.peak_rss_mb = max(self.peak_rss_mb, rss_mb)
+        return rss_mb
+
+    def is_responsive(self):
+        try:
+            return self.driver.execute_script("return 1;") == 1
+        except Exception:
+            return False
+
+    def before_domain(self):
+        """
+        抓取下一个域名前调用：按处理数量、内存或上一个域名留下的原因判断是否需要重启
+        返回: 可用的 driver，重启失败时返回 None
+        """
+        reason = self._pending_reason
+        if reason is None and self.recycle_after_domains and self.domains_since_start >= self.recycle_after_domains:
+            reason = f"已处理 {self.domains_since_start} 个域名"
+        if reason is None and self.max_rss_mb:
+            rss_mb = self.rss_mb()
+            if rss_mb is not None and rss_mb > self.max_rss_mb:
+                reason = f"内存 {rss_mb:.0f} MB 超过上限 {self.max_rss_mb} MB"
+        if reason is not None and not self.recycle(reason):
+            return None
+        return self.driver
+
+    def after_domain(self, elapsed, record, no_data=False):
+        """
+        抓取一个域名后调用，检查浏览器和登录态
+        no_data: 页面明确显示没有该网站的数据，这种结果不计入连续取不到数据的次数
+        返回: None 表示结果可信；否则返回原因，此时调用方应把该域名放回队列，下一次 before_domain 会重启浏览器
+        """
+        self.domains_since_start += 1
+        if not self.is_responsive():
+            self._pending_reason = '浏览器无响应'
+            return self._pending_reason
+        if self.session_check is not None:
+            try:
+                session_valid = self.session_check(self.driver)
+            except Exception:
+                session_valid = False
+            if not session_valid:
+                self._pending_reason = '登录态失效'
+                return self._pending_reason
+
+        if record is not None and record.has_data:
+            self.consecutive_missing = 0
+        elif not no_data:
+            self.consecutive_missing += 1
+        if self.max_consecutive_missing and self.consecutive_missing >= self.max_consecutive_missing:
+            self._pending_reason = f"连续 {self.consecutive_missing} 个域名没有取到数据"
+        elif self.max_domain_seconds and elapsed > self.max_domain_seconds:
+            self._pending_reason = f"单个域名耗时 {elapsed:.0f} 秒超过上限 {self.max_domain_seconds} 秒"
+        return None
+
+    def recycle(self, reason):
+        """关闭当前浏览器并重新启动、重新登录，返回是否成功"""
+        print(f"\n♻️  [{self.name}] 正在重启浏览器: {reason}")
+        self.close()
+        for attempt in range(MAX_RECYCLE_ATTEMPTS):
+            try:
+                self.driver = self.driver_factory()
+            except Exception as e:
+                print(f"⚠️  [{self.name}] 启动浏览器出错: {e}")
+                self.driver = None
+            if self.driver:
+                self.recycle_count += 1
+                self.domains_since_start = 0
+                self.consecutive_missing = 0
+                self._pending_reason = None
+                print(f"✓ [{self.name}] 浏览器已重启（第 {self.recycle_count} 次）")
+                return True
+            print(f"⚠️  [{self.name}] 重启浏览器失败（第 {attempt + 1}/{MAX_RECYCLE_ATTEMPTS} 次尝试）")
+            time.sleep(5)
+        print(f"❌ [{self.name}] 多次重启浏览器均失败")
+        return False
+
+    def close(self):
+        if self.driver is None:
+            return
+        try:
+            self.driver.quit()
+        except Exception as e:
+            print(f"关闭浏览器时出错: {e}")
+        self.driver = None
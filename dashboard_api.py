@@ -0,0 +1,230 @@
+import json
+import time
+from urllib.parse import unquote
+
+from similarweb_lib.domains import extract_domain
+from similarweb_lib.metrics import MetricRecord, parse_seconds
+
+# 从页面自身的数据接口响应中提取指标：开启 Chrome 性能日志后，通过 CDP 网络事件拿到 XHR/fetch 响应，
+# 再用 Network.getResponseBody 取回JSON，不依赖页面语言、CSS 类名和渲染完成时间
+API_RESPONSE_URL_PATTERNS = ['/api/', '/widgetApi/']  # 只读取URL包含这些片段的 JSON 响应
+API_WAIT_TIMEOUT = 15  # 等待接口响应凑齐必需指标的最长时间（秒），超时后回退到页面渲染提取
+API_POLL_INTERVAL = 0.25  # 读取性能日志的间隔（秒）
+
+# 各字段在接口JSON中可能使用的键名（不区分大小写，按顺序取第一个出现的数值）
+# 只使用含义明确的键名：visits / desktop / mobile 这类通用键名也会出现在时间序列和其他网站的组件中
+# 网站改版导致键名变化时只需要修改这里；开启 CAPTURE_SNAPSHOTS 时会把接口响应一并保存到快照中，方便对照
+API_METRIC_KEYS = {
+    'desktop_share': ['desktopShare', 'desktopVisitsShare'],
+    'mobile_share': ['mobileShare', 'mobileWebShare', 'mobileVisitsShare'],
+    'visits': ['avgMonthVisits', 'monthlyVisits', 'totalVisits'],
+    'monthly_unique_visitors': ['monthlyUniqueVisitors', 'uniqueVisitors', 'uniqueUsers'],
+    'users_tab': ['dedupUniqueVisitors', 'deduplicatedAudience', 'dedupAudience'],
+    'pages_per_visit': ['pagesPerVisit', 'pageViewsPerVisit', 'pagesPerVisits'],
+    'avg_visit_duration': ['avgVisitDuration', 'averageVisitDuration', 'visitDuration'],
+    'bounce_rate': ['bounceRate'],
+}
+API_REQUIRED_FIELDS = ('desktop_share', 'mobile_share', 'visits')  # 凑齐这些字段才认为接口数据可用
+# 表示网站的键名：JSON 对象中这些键的值是其他域名时（相似网站、竞品等组件），跳过整个对象
+API_DOMAIN_KEYS = ('domain', 'site', 'website', 'siteName', 'key', 'mainDomain')
+# 表示时间点的键名：带有这些键的对象是时间序列中的一个点（单月数值），跳过
+API_SERIES_KEYS = ('date', 'month', 'timestamp', 'time', 'period')
+
+
+def enable_performance_logging(options):
+    """在 Chrome 选项中开启性能日志（包含 CDP Network 事件）"""
+    options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    return options
+
+
+def drain_performance_log(driver):
+    """丢弃之前页面留下的性能日志，导航到新页面前调用"""
+    try:
+        driver.get_log('performance')
+    except Exception:
+        pass
+
+
+def _is_data_response(response):
+    url = response.get('url', '')
+    mime_type = response.get('mimeType', '')
+    return 'json' in mime_type and any(pattern in url for pattern in API_RESPONSE_URL_PATTERNS)
+
+
+def read_json_responses(driver, pending_requests):
+    """
+    读取一批性能日志，返回已加载完成的数据接口响应 [(url, JSON)]
+    pending_requests: {requestId: url}，跨多次调用保存已收到响应头、尚未加载完成的请求
+    """
+    responses = []
+    for entry in driver.get_log('performance'):
+        try:
+            message = json.loads(entry['message'])['message']
+        except (KeyError, ValueError):
+            continue
+        method = message.get('method')
+        params = message.get('params', {})
+        if method == 'Network.responseReceived' and _is_data_response(params.get('response', {})):
+            pending_requests[params['requestId']] = params['response']['url']
+        elif method == 'Network.loadingFinished' and params.get('requestId') in pending_requests:
+            url = pending_requests.pop(params['requestId'])
+            try:
+                body = driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': params['requestId']})
+                responses.append((url, json.loads(body.get('body') or 'null')))
+            except Exception as e:
+                print(f"⚠️  读取接口响应失败 {url}: {e}")
+    return responses
+
+
+def response_names_domain(url, payload, domain):
+    """接口请求地址或响应内容中是否出现了要抓取的域名（只读取属于该域名的响应）"""
+    if domain in unquote(url or '').lower():
+        return True
+    pending = [payload]
+    while pending:
+        node = pending.pop()
+        if isinstance(node, dict):
+            pending.extend(node.values())
+        elif isinstance(node, list):
+            pending.extend(node)
+        elif isinstance(node, str) and extract_domain(node) == domain:
+            return True
+    return False
+
+
+def _names_other_domain(node, domain):
+    for key in API_DOMAIN_KEYS:
+        value = node.get(key)
+        if isinstance(value, str) and '.' in value and extract_domain(value) != domain:
+            return True
+    return False
+
+
+def find_metric_values(payload, found, domain=None):
+    """
+    在 JSON 中递归查找 API_METRIC_KEYS 中的键，把尚未找到的字段的数值写入 found（数值保持接口中的原样）
+    跳过时间序列中的点，以及标明属于其他域名（domain 以外）的对象
+    """
+    series_keys = {key.lower() for key in API_SERIES_KEYS}
+    aliases = {
+        alias.lower(): field
+        for field, field_aliases in API_METRIC_KEYS.items()
+        if field not in found
+        for alias in field_aliases
+    }
+    pending = [payload]
+    while pending and aliases:
+        node = pending.pop()
+        if isinstance(node, dict):
+            if any(str(key).lower() in series_keys for key in node):
+                continue
+            if domain and _names_other_domain(node, domain):
+                continue
+            for key, value in node.items():
+                field = aliases.get(str(key).lower())
+                if field and field not in found:
+                    number = _to_number(field, value)
+                    if number is not None:
+                        found[field] = number
+                        continue
+                if isinstance(value, (dict, list)):
+                    pending.append(value)
+        elif isinstance(node, list):
+            pending.extend(node)
+    return found
+
+
+def _to_number(field, value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        number = float(value)
+    elif isinstance(value, str) and field == 'avg_visit_duration':
+        number = parse_seconds(value)
+    else:
+        return None
+    return number
+
+
+def fraction_scale(values):
+    """
+    判断接口中的占比是小数（0.5897）还是百分数（58.97）：桌面端 + 移动端应等于 1 或 100
+    返回: 1 或 100，两者都不符合时返回 None
+    """
+    total = values['desktop_share'] + values['mobile_share']
+    if abs(total - 1.0) < 0.001:
+        return 1
+    if abs(total - 100.0) < 0.1:
+        return 100
+    return None
+
+
+def build_metric_record_from_api(values, website_to_search):
+    """
+    把接口中找到的数值组装成 MetricRecord，校验规则与页面提取相同（桌面端 + 移动端 = 100%）
+    返回: MetricRecord，数据不完整或校验失败时返回 None（由调用方回退到页面提取）
+    """
+    if any(values.get(field) is None for field in API_REQUIRED_FIELDS):
+        return None
+    scale = fraction_scale(values)
+    if scale is None:
+        print(f"⚠️  接口数据中 {website_to_search} 的桌面端 + 移动端占比不等于 100%，回退到页面提取")
+        return None
+
+    # 跳出率与占比使用同一种表示方式；大于 1 的跳出率一定是百分数
+    bounce_rate = values.get('bounce_rate')
+    if bounce_rate is not None:
+        bounce_rate = bounce_rate / 100 if scale == 100 or bounce_rate > 1 else bounce_rate
+
+    record = MetricRecord(
+        desktop_share=values['desktop_share'] / scale,
+        mobile_share=values['mobile_share'] / scale,
+        visits=values['visits'],
+        users_tab=values.get('users_tab'),
+        pages_per_visit=values.get('pages_per_visit'),
+        avg_visit_duration=values.get('avg_visit_duration'),
+        bounce_rate=bounce_rate,
+    )
+    if record.visits and values.get('monthly_unique_visitors'):
+        record.visits_per_visitor = round(record.visits / values['monthly_unique_visitors'], 2)
+    return record
+
+
+def wait_for_api_metrics(driver, website_to_search, timeout=API_WAIT_TIMEOUT, poll_interval=API_POLL_INTERVAL):
+    """
+    导航后读取页面的数据接口响应，直到必需指标凑齐（再多等一轮以收集可选指标）或超时
+    只从请求地址或内容中出现了该域名的响应中取值
+    返回: (MetricRecord 或 None, 收到的接口响应 [(url, JSON)])
+    """
+    domain = extract_domain(website_to_search)
+    start_time = time.time()
+    pending_requests = {}
+    responses = []
+    values = {}
+    complete_polls = 0
+    while time.time() - start_time < timeout:
+        try:
+            new_responses = read_json_responses(driver, pending_requests)
+        except Exception as e:
+            print(f"⚠️  读取性能日志失败，回退到页面提取: {e}")
+            return None, responses
+        for url, payload in new_responses:
+            if response_names_domain(url, payload, domain):
+                find_metric_values(payload, values, domain)
+        responses.extend(new_responses)
+
+        if len(values) == len(API_METRIC_KEYS):
+            break
+        if all(field in values for field in API_REQUIRED_FIELDS):
+            complete_polls += 1
+            if complete_polls > 1:
+                break
+        time.sleep(poll_interval)
+
+    record = build_metric_record_from_api(values, website_to_search)
+    elapsed = time.time() - start_time
+    if record is None:
+        print(f"⚠️  {elapsed:.2f} 秒内未从 {len(responses)} 个接口响应中取到完整指标，回退到页面提取")
+    else:
+        print(f"✓ 从 {len(responses)} 个接口响应中取到 {len(values)} 项指标（{elapsed:.2f} 秒）")
+    return record, responses
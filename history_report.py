@@ -0,0 +1,48 @@
+import sys
+import io
+from similarweb_lib.history import HistoryStore, HISTORY_DIR
+
+# 文件路径（使用相对路径）
+txt_file_path = 'similarweb_data.txt'
+export_file_path = 'similarweb_history_export.txt'  # 导出的JSONL可直接作为导入脚本的 txt_file_path
+# 对比的两个统计周期（与数据页URL中的日期范围一致）
+previous_period = '2025.01-2025.07'
+current_period = '2025.01-2025.08'
+# 历史为空时是否先把现有的 similarweb_data.txt 导入为 current_period 的数据
+import_existing_results = True
+top_count = 20  # 增长/下降最多显示多少个域名
+
+def print_growth(table):
+    growth = table.growth(previous_period, current_period, metric='visits')
+    if not growth:
+        print(f"⚠️  {previous_period} 与 {current_period} 之间没有可对比的访问量数据")
+        return
+    ranked = sorted(growth.items(), key=lambda item: item[1], reverse=True)
+    print(f"\n访问量环比（{previous_period} → {current_period}），共 {len(ranked)} 个域名:")
+    print("增长最多:")
+    for domain, ratio in ranked[:top_count]:
+        print(f"  {domain}: {ratio * 100:+.1f}%")
+    print("下降最多:")
+    for domain, ratio in ranked[::-1][:top_count]:
+        print(f"  {domain}: {ratio * 100:+.1f}%")
+
+def main():
+    # 设置控制台输出编码为 UTF-8
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+    history_store = HistoryStore(HISTORY_DIR)
+    table = history_store.load()
+    if table.row_count == 0 and import_existing_results:
+        print(f"历史存储为空，正在导入 {txt_file_path} 作为 {current_period} 的数据...")
+        appended_count = history_store.import_jsonl(txt_file_path, current_period)
+        print(f"✓ 已导入 {appended_count} 行")
+        table = history_store.load()
+
+    print(f"历史存储 {HISTORY_DIR}: 共 {table.row_count} 行，{len(table.domains)} 个域名，统计周期: {', '.join(table.periods)}")
+    print_growth(table)
+
+    exported_count = table.export_jsonl(export_file_path, current_period)
+    print(f"\n✓ 已将 {current_period} 的最新数据（{exported_count} 个域名）导出到 {export_file_path}")
+
+if __name__ == "__main__":
+    main()
@@ -1,209 +1,62 @@
-import json
-import gspread
-from google.oauth2.service_account import Credentials
 from datetime import datetime
-from urllib.parse import urlparse
-import time
 import sys
 import io
-
-# 设置控制台输出编码为 UTF-8，避免 Windows 下的编码问题
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+from similarweb_lib import load_results, push_to_sinks
+from similarweb_lib.sheets_sink import SheetsSink, open_worksheet
 
 # 配置文件路径（使用相对路径）
 txt_file_path = 'similarweb_data.txt'
 credentials_file = 'refined-magpie-474208-i2-6ead78929739.json'  # 请将凭证文件放在项目根目录
 sheet_name = '产品信息列表'
 worksheet_index = 1  # 第2个工作表（索引从0开始）
-batch_size = 30  # 每30行批量更新一次
-
-def extract_domain(url):
-    """
-    从URL中提取主域名，去除协议、www、路径、参数等
-    例如: https://www.example.com/path?param=value -> example.com
-    """
-    if not url:
-        return ""
-    
-    url = url.strip().lower()
-    
-    # 添加协议如果没有的话（用于urlparse解析）
-    if not url.startswith(('http://', 'https://')):
-        url = 'http://' + url
-    
-    try:
-        parsed = urlparse(url)
-        domain = parsed.netloc if parsed.netloc else parsed.path.split('/')[0]
-        
-        # 移除www前缀
-        if domain.startswith('www.'):
-            domain = domain[4:]
-        
-        return domain
-    except:
-        # 如果解析失败，手动处理
-        url = url.replace('https://', '').replace('http://', '')
-        domain = url.split('/')[0].split('?')[0]
-        if domain.startswith('www.'):
-            domain = domain[4:]
-        return domain
-
-def domains_match(domain1, domain2):
-    """
-    判断两个域名是否完全匹配
-    只有完全相等才返回True
-    """
-    return domain1 == domain2
-
-# 1. 读取JSON数据
-print("正在读取JSON数据...")
-json_data_dict = {}
-with open(txt_file_path, 'r', encoding='utf-8') as f:
-    for line in f:
-        if line.strip():
-            data = json.loads(line)
-            url = list(data.keys())[0]
-            json_data_dict[url] = data[url]
-
-print(f"✓ 已读取 {len(json_data_dict)} 条JSON数据")
-
-# 2. 连接Google Sheets
-print("\n正在连接Google Sheets...")
-scopes = [
-    'https://www.googleapis.com/auth/spreadsheets',
-    'https://www.googleapis.com/auth/drive'
-]
-
-try:
-    creds = Credentials.from_service_account_file(credentials_file, scopes=scopes)
-    gc = gspread.authorize(creds)
-    print("✓ Google Sheets 连接成功")
-except Exception as e:
-    print(f"❌ 连接失败: {e}")
-    exit(1)
-
-# 3. 打开表格
-print(f"正在打开表格: {sheet_name}...")
-try:
-    sheet = gc.open(sheet_name)
-    worksheet = sheet.get_worksheet(worksheet_index)
-    print(f"✓ 打开工作表: {worksheet.title}")
-except Exception as e:
-    print(f"❌ 打开表格失败: {e}")
-    exit(1)
-
-# 4. 读取所有数据
-print("\n正在读取表格数据...")
-try:
-    all_data = worksheet.get_all_values()
-    print(f"✓ 读取了 {len(all_data)} 行数据")
-except Exception as e:
-    print(f"❌ 读取数据失败: {e}")
-    exit(1)
-
-# 列索引（Google Sheets从1开始，但Python列表从0开始）
-COL_PRODUCT_NAME = 0  # 产品名称（列表索引0 = 表格第1列）
-COL_ID = 1  # 入库id
-COL_URL = 2  # 官网链接
-COL_DESKTOP = 3  # 桌面端占比
-COL_MOBILE = 4  # 移动端占比
-COL_VISITS = 5  # 每月访问量
-COL_VISITS_PER_VISITOR = 6  # 每访客访问次数
-COL_USERS_TAB = 7  # 已消除重叠的受众
-COL_PAGES_PER_VISIT = 8  # 页面数/访问
-COL_AVG_VISIT_DURATION = 9  # 访问持续时间
-COL_BOUNCE_RATE = 10  # 跳出率
-COL_UPDATE_TIME = 11  # 数据抓取时间
-
-# 5. 匹配数据并准备更新
-print("\n开始匹配数据...")
-current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-updates = []  # 存储所有更新操作
-matched_count = 0
-
-for row_index, row_data in enumerate(all_data[1:], start=2):  # 从第2行开始（跳过标题）
-    if len(row_data) <= COL_URL:
-        continue
-    
-    excel_url = row_data[COL_URL] if COL_URL < len(row_data) else ""
-    
-    if not excel_url:
-        continue
-    
-    # 提取域名
-    excel_domain = extract_domain(excel_url)
-    
-    # 在JSON数据中查找匹配
-    matched_data = None
-    matched_json_url = None
-    for json_url, json_values in json_data_dict.items():
-        json_domain = extract_domain(json_url)
-        
-        if domains_match(excel_domain, json_domain):
-            matched_data = json_values
-            matched_json_url = json_url
-            break
-    
-    if matched_data:
-        # 准备更新数据（第4列到第12列，即D到L列）
-        # Google Sheets使用A1标记法
-        range_name = f'D{row_index}:L{row_index}'
-        
-        values = [[
-            matched_data.get('desktopPersent', 'N/A'),
-            matched_data.get('mobilePercent', 'N/A'),
-            matched_data.get('visits', 0),
-            matched_data.get('visits_per_visitor', 0),
-            matched_data.get('users_tab', 0),
-            matched_data.get('pages-per-visit', 0),
-            matched_data.get('avg_visit_duration', 'N/A'),
-            matched_data.get('bounce_rate', 'N/A'),
-            current_time
-        ]]
-        
-        updates.append({
-            'range': range_name,
-            'values': values
-        })
-        
-        matched_count += 1
-        product_name = row_data[COL_PRODUCT_NAME] if COL_PRODUCT_NAME < len(row_data) else "未知"
-        print(f"✓ 行{row_index}: {product_name} ({excel_domain}) - 准备更新")
-
-print(f"\n共匹配到 {matched_count} 条数据")
-
-# 6. 批量提交更新（每30行一批）
-if updates:
-    print(f"\n开始批量更新到Google Sheets（每{batch_size}行一批）...")
-    total_batches = (len(updates) + batch_size - 1) // batch_size
-    
-    for i in range(0, len(updates), batch_size):
-        batch = updates[i:i+batch_size]
-        batch_num = i // batch_size + 1
-        
-        try:
-            # 使用batch_update方法批量更新
-            worksheet.batch_update(batch)
-            print(f"✓ 批次 {batch_num}/{total_batches}: 成功更新 {len(batch)} 行")
-            
-            # 避免超出API限制，批次间稍作延时
-            if i + batch_size < len(updates):
-                time.sleep(0.5)
-                
-        except Exception as e:
-            print(f"❌ 批次 {batch_num} 更新失败: {e}")
-            continue
-    
-    print("\n" + "="*60)
-    print("✅ 更新完成！")
-    print(f"成功更新: {matched_count} 条数据")
-    print(f"更新时间: {current_time}")
-    print(f"API调用次数: {total_batches} 次")
-    print("="*60)
-else:
-    print("\n没有找到匹配的数据需要更新。")
-
-
+max_payload_bytes = 1_000_000  # 单次API请求体的上限（字节），连续行会合并为一个区块
+diff_only = True  # 只写入值真正变化的单元格（False 则整行 D-L 全部重写）
+dry_run = False  # True 时只输出差异摘要，不提交更新
 
+def main():
+    # 设置控制台输出编码为 UTF-8，避免 Windows 下的编码问题
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 
+    # 1. 读取JSON数据
+    print("正在读取JSON数据...")
+    json_data_dict = load_results(txt_file_path)
+    print(f"✓ 已读取 {len(json_data_dict)} 条JSON数据")
 
+    # 2. 连接Google Sheets并打开表格
+    print(f"\n正在连接Google Sheets并打开表格: {sheet_name}...")
+    try:
+        worksheet = open_worksheet(credentials_file, sheet_name, worksheet_index)
+        print(f"✓ 打开工作表: {worksheet.title}")
+    except Exception as e:
+        print(f"❌ 打开表格失败: {e}")
+        sys.exit(1)
+
+    # 3. 读取表格数据、匹配并批量提交更新（按规范化域名建立一次索引，后续每行O(1)查找）
+    print("\n正在读取表格数据并开始匹配...")
+    current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    sink = SheetsSink(worksheet, max_payload_bytes=max_payload_bytes, diff_only=diff_only, dry_run=dry_run)
+    try:
+        matched_count = push_to_sinks(json_data_dict, [sink], current_time)[sink.name]
+    except Exception as e:
+        print(f"❌ 读取数据失败: {e}")
+        sys.exit(1)
+
+    print(f"\n共{'有变化' if diff_only else '匹配到'} {matched_count} 条数据")
+
+    if dry_run:
+        print("\ndry-run 模式：以上为差异摘要，未写入 Google Sheets。")
+    elif matched_count:
+        print("\n" + "="*60)
+        print("✅ 更新完成！")
+        print(f"成功更新: {matched_count - len(sink.failed_rows)} 条数据")
+        if sink.failed_rows:
+            print(f"更新失败: {len(sink.failed_rows)} 条（行号: {', '.join(str(row) for row in sorted(sink.failed_rows))}）")
+        print(f"更新时间: {current_time}")
+        print(f"API调用次数: {sink.engine.api_calls} 次（其中重试 {sink.engine.retries} 次）")
+        print(f"发送数据量: {sink.engine.bytes_sent} 字节")
+        print("="*60)
+    else:
+        print("\n没有找到匹配的数据需要更新。")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import json
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from similarweb_lib.domains import extract_domain
+
+# 概览页快照目录：每个域名保存渲染后的页面 <域名>.html 和抓取时提取到的数据 <域名>.json
+SNAPSHOT_DIR = 'snapshots'
+REPLAY_HOST = '127.0.0.1'
+REPLAY_PATH = '/overview'
+REPLAY_RENDER_DELAY = 0.0  # 回放时模拟前端渲染的延迟（秒），0 表示直接返回完整页面
+
+# 保存快照时去掉脚本和外部样式表，回放时页面不会再请求网络或重新执行前端代码
+SCRIPT_PATTERN = re.compile(r'<script\b[^>]*>.*?</script\s*>', re.IGNORECASE | re.DOTALL)
+STYLESHEET_PATTERN = re.compile(r'<link\b[^>]*rel=["\']?stylesheet["\']?[^>]*>', re.IGNORECASE)
+BODY_PATTERN = re.compile(r'(<body\b[^>]*>)(.*)(</body\s*>)', re.IGNORECASE | re.DOTALL)
+
+
+def snapshot_paths(snapshot_dir, website_url):
+    """返回 (html路径, json路径)"""
+    base_path = os.path.join(snapshot_dir, extract_domain(website_url))
+    return base_path + '.html', base_path + '.json'
+
+
+def strip_page(html):
+    """去掉脚本和外部样式表"""
+    return STYLESHEET_PATTERN.sub('', SCRIPT_PATTERN.sub('', html))
+
+
+def save_snapshot(snapshot_dir, website_url, html, raw_metrics, expected, api_responses=None):
+    """
+    保存一个域名的快照：渲染后的页面，以及抓取时提取到的原始文本 raw_metrics 和结果 expected（similarweb_data.txt 格式）
+    api_responses: 接口提取模式下收到的数据接口响应 [(url, JSON)]，用于对照调整 dashboard_api.API_METRIC_KEYS
+    """
+    os.makedirs(snapshot_dir, exist_ok=True)
+    html_path, json_path = snapshot_paths(snapshot_dir, website_url)
+    with open(html_path, 'w', encoding='utf-8') as f:
+        f.write(strip_page(html))
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'url': website_url,
+            'captured_at': time.strftime("%Y-%m-%d %H:%M:%S"),
+            'raw_metrics': raw_metrics,
+            'expected': expected,
+            'api_responses': [{'url': url, 'payload': payload} for url, payload in api_responses or []],
+        }, f, ensure_ascii=False, indent=2)
+    return html_path
+
+
+def load_snapshots(snapshot_dir=SNAPSHOT_DIR):
+    """
+    读取快照目录中所有带数据文件的快照
+    返回: [{'url': ..., 'raw_metrics': {...}, 'expected': {...}, 'html_path': ...}]，按文件名排序
+    """
+    snapshots = []
+    if not os.path.isdir(snapshot_dir):
+        return snapshots
+    for name in sorted(os.listdir(snapshot_dir)):
+        if not name.endswith('.json'):
+            continue
+        html_path = os.path.join(snapshot_dir, name[:-len('.json')] + '.html')
+        if not os.path.exists(html_path):
+            continue
+        with open(os.path.join(snapshot_dir, name), 'r', encoding='utf-8') as f:
+            snapshot = json.load(f)
+        snapshot['html_path'] = html_path
+        snapshots.append(snapshot)
+    return snapshots
+
+
+def delayed_render_page(html, render_delay):
+    """把页面主体换成一段延迟插入的脚本，模拟前端在 render_delay 秒后才渲染出概览组件"""
+    match = BODY_PATTERN.search(html)
+    if not match:
+        return html
+    body_json = json.dumps(match.group(2)).replace('</', '<\\/')
+    script = (f"<script>setTimeout(function () {{ document.body.innerHTML = {body_json}; }}, "
+              f"{int(render_delay * 1000)});</script>")
+    return html[:match.start()] + match.group(1) + script + match.group(3) + html[match.end():]
+
+
+class SnapshotServer:
+    """
+    本地回放服务器：GET /overview?key=<域名> 返回该域名的快照页面，找不到快照时返回 404
+    数据页URL模板使用 data_url_template，可直接传给 search_and_scrape_website_data
+    """
+
+    def __init__(self, snapshot_dir=SNAPSHOT_DIR, render_delay=REPLAY_RENDER_DELAY, host=REPLAY_HOST, port=0):
+        self.snapshot_dir = snapshot_dir
+        self.render_delay = render_delay
+        self.requests_served = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                key = parse_qs(parsed.query).get('key', [''])[0]
+                html_path = snapshot_paths(server.snapshot_dir, key)[0] if key else None
+                if parsed.path != REPLAY_PATH or not html_path or not os.path.exists(html_path):
+                    self.send_error(404)
+                    return
+                with open(html_path, 'r', encoding='utf-8') as f:
+                    html = f.read()
+                if server.render_delay:
+                    html = delayed_render_page(html, server.render_delay)
+                body = html.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                server.requests_served += 1
+
+            def log_message(self, format, *args):
+                pass  # 不输出每个请求的访问日志
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._thread = None
+
+    @property
+    def data_url_template(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}{REPLAY_PATH}?key={{website_name}}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
@@ -0,0 +1,194 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from similarweb_lib.domains import extract_domain
+from similarweb_lib.metrics import parse_fraction
+
+SCRAPED_AT_FIELD = 'scraped_at'  # 记录中保存抓取时间的字段名
+SCRAPED_AT_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# 结果缓存配置：按 (域名, 日期范围, webSource) 缓存抓取结果
+RESULT_CACHE_DB_PATH = 'result_cache.db'
+RESULT_CACHE_TTL_SECONDS = 30 * 24 * 3600  # 缓存有效期（秒）
+# 无数据结果（负缓存）的有效期更短（秒）：SimilarWeb 之后可能补上数据，过期后以低优先级复查
+NEGATIVE_CACHE_TTL_SECONDS = 3 * 24 * 3600
+RESULT_CACHE_MAX_ENTRIES = 50000  # 缓存最多保留的条目数，超出时淘汰最旧的条目
+
+
+class ResultStore:
+    """
+    增量结果文件（similarweb_data.txt，每行一个 {url: 数据} 的JSON）
+    启动时读取已有结果并按规范化域名建立索引，新结果只追加不清空；
+    同一域名多次写入时以最后一行为准（upsert），启动时会顺带压缩掉旧行
+    行中不记录统计周期，是否需要重新抓取由 ResultCache（按域名、日期范围、webSource）判断
+    """
+
+    def __init__(self, output_file_path):
+        self.output_file_path = output_file_path
+        self._lock = threading.Lock()
+        self._records = {}  # 规范化域名 -> (原始URL, 数据字典)
+        self._subscribers = []  # 每次写入结果后调用的回调 callback(url, values)
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.output_file_path):
+            return
+
+        line_count = 0
+        with open(self.output_file_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    data = json.loads(line)
+                except json.JSONDecodeError:
+                    # 中断时可能留下不完整的最后一行，直接丢弃
+                    continue
+                line_count += 1
+                url = list(data.keys())[0]
+                domain = extract_domain(url)
+                self._records.pop(domain, None)  # 保证字典顺序与最后一次写入的顺序一致
+                self._records[domain] = (url, data[url])
+
+        if line_count != len(self._records):
+            self._compact()
+
+    def _compact(self):
+        """以原子替换的方式重写结果文件，只保留每个域名的最新一行"""
+        temp_path = self.output_file_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            for url, values in self._records.values():
+                json.dump({url: values}, f, ensure_ascii=False)
+                f.write('\n')
+        os.replace(temp_path, self.output_file_path)
+
+    def __len__(self):
+        return len(self._records)
+
+    def subscribe(self, callback):
+        """注册写入回调，每次 put 成功后以 callback(url, values) 通知（例如实时写入 Google Sheets）"""
+        self._subscribers.append(callback)
+
+    def get(self, url):
+        """返回该域名最新的数据字典，不存在时返回 None"""
+        record = self._records.get(extract_domain(url))
+        return record[1] if record else None
+
+    def has_no_data(self, url):
+        """该域名最新的结果是否为无数据（桌面端占比为 N/A），没有记录时返回 False"""
+        values = self.get(url)
+        return values is not None and parse_fraction(values.get('desktopPersent')) is None
+
+    def put(self, url, result):
+        """
+        追加（upsert）一个域名的结果，结果中没有抓取时间时自动写入当前时间
+        返回: 实际写入的数据字典
+        """
+        values = dict(result)
+        if not values.get(SCRAPED_AT_FIELD):
+            values[SCRAPED_AT_FIELD] = datetime.now().strftime(SCRAPED_AT_FORMAT)
+        with self._lock:
+            with open(self.output_file_path, 'a', encoding='utf-8') as f:
+                json.dump({url: values}, f, ensure_ascii=False)
+                f.write('\n')
+            domain = extract_domain(url)
+            self._records.pop(domain, None)
+            self._records[domain] = (url, values)
+        for callback in self._subscribers:
+            try:
+                callback(url, values)
+            except Exception as e:
+                print(f"⚠️  结果写入回调出错: {e}")
+        return values
+
+
+class ResultCache:
+    """
+    持久化的抓取结果缓存，键为 (规范化域名, 日期范围, webSource)
+    SimilarWeb 的数据只随统计周期变化，同一周期内未过期的结果可以直接复用，不必再打开浏览器
+    无数据的结果也会缓存（负缓存，has_data = 0），使用更短的有效期 negative_ttl_seconds
+    """
+
+    def __init__(self, db_path=RESULT_CACHE_DB_PATH, ttl_seconds=RESULT_CACHE_TTL_SECONDS, max_entries=RESULT_CACHE_MAX_ENTRIES,
+                 negative_ttl_seconds=NEGATIVE_CACHE_TTL_SECONDS):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.negative_hits = 0  # 其中命中无数据结果的次数
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS result_cache (
+                domain TEXT NOT NULL,
+                date_range TEXT NOT NULL,
+                web_source TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                cached_at REAL NOT NULL,
+                has_data INTEGER NOT NULL DEFAULT 1,
+                PRIMARY KEY (domain, date_range, web_source)
+            )
+        """)
+        # 旧版本创建的缓存没有 has_data 列（当时只缓存有数据的结果），补上
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(result_cache)")}
+        if 'has_data' not in columns:
+            self._conn.execute("ALTER TABLE result_cache ADD COLUMN has_data INTEGER NOT NULL DEFAULT 1")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_result_cache_cached_at ON result_cache (cached_at)")
+        self.evict()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def get(self, url, date_range, web_source):
+        """
+        查询缓存，命中且未过期时返回数据字典（包括无数据的结果），否则返回 None（同时累计命中/未命中次数）
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, cached_at, has_data FROM result_cache WHERE domain = ? AND date_range = ? AND web_source = ?",
+                (extract_domain(url), date_range, web_source)
+            ).fetchone()
+            ttl_seconds = self.ttl_seconds if row is None or row[2] else self.negative_ttl_seconds
+            if row is None or time.time() - row[1] >= ttl_seconds:
+                self.misses += 1
+                return None
+            self.hits += 1
+            if not row[2]:
+                self.negative_hits += 1
+            return json.loads(row[0])
+
+    def put(self, url, date_range, web_source, result, has_data=True):
+        """写入（覆盖）一个域名在该统计周期下的结果，has_data=False 表示无数据的结果（按 negative_ttl_seconds 过期）"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO result_cache (domain, date_range, web_source, payload, cached_at, has_data) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (extract_domain(url), date_range, web_source, json.dumps(result, ensure_ascii=False), time.time(), int(has_data))
+            )
+
+    def evict(self):
+        """
+        删除过期条目，并在条目数超过 max_entries 时淘汰最旧的条目
+        返回: 删除的条目数
+        """
+        now = time.time()
+        with self._lock:
+            removed = self._conn.execute(
+                "DELETE FROM result_cache WHERE cached_at < ? OR (has_data = 0 AND cached_at < ?)",
+                (now - self.ttl_seconds, now - self.negative_ttl_seconds)
+            ).rowcount
+            overflow = self._conn.execute("SELECT COUNT(*) FROM result_cache").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                removed += self._conn.execute(
+                    "DELETE FROM result_cache WHERE rowid IN (SELECT rowid FROM result_cache ORDER BY cached_at LIMIT ?)",
+                    (overflow,)
+                ).rowcount
+            return removed
@@ -13,6 +13,21 @@ from webdriver_manager.chrome import ChromeDriverManager # 自动管理ChromeDri
 import undetected_chromedriver as uc # 绕过Cloudflare检测
 import sys
 import io
+import re
+import threading
+from urllib.parse import urlparse
+from url_queue import UrlQueue, QUEUE_DB_PATH, STATUS_PENDING
+from result_store import ResultStore, ResultCache, RESULT_CACHE_DB_PATH
+from similarweb_lib.metrics import MetricRecord, parse_fraction, parse_number, parse_seconds
+from similarweb_lib.history import HistoryStore, HISTORY_DIR
+from overview_snapshots import SNAPSHOT_DIR, save_snapshot
+from dashboard_api import enable_performance_logging, drain_performance_log, wait_for_api_metrics
+from browser_profile import PROFILE_FULL, configure_browser_options, apply_network_rules
+from browser_watchdog import BrowserWatchdog
+from stale_render import StaleRenderDetector, STALE_RENDER_MAX_RELOADS, page_shows_domain
+from scrape_timing import (TimingRecorder, DomainTimer, TIMING_LOG_PATH, PHASE_CACHE, PHASE_RECYCLE, PHASE_THROTTLE, PHASE_NAVIGATE,
+                           PHASE_CHALLENGE_WAIT, PHASE_API_WAIT, PHASE_RENDER_WAIT, PHASE_EXTRACT, PHASE_PERSIST, PHASE_QUEUE_UPDATE,
+                           OUTCOME_SCRAPED, OUTCOME_NO_DATA, OUTCOME_CACHED, OUTCOME_FAILED, OUTCOME_REQUEUED, OUTCOME_DEFERRED)
 
 # 设置控制台输出编码为 UTF-8，避免 Windows 下的编码问题
 sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
@@ -20,44 +35,232 @@ sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 # Cookie文件路径
 COOKIE_FILE = 'cookies.json'
 
-def wait_for_cloudflare_bypass(driver, timeout=30):
+# 数据页面等待方式：'ready' 表示检测到概览组件渲染完成即返回，'fixed' 表示沿用旧的固定随机等待
+PAGE_WAIT_MODE = 'ready'
+PAGE_READY_TIMEOUT = 20  # 就绪检测的最长等待时间（秒）
+PAGE_READY_POLL_INTERVAL = 0.5  # 就绪检测的轮询间隔（秒）
+PAGE_READY_STABLE_POLLS = 2  # 组件文本连续多少次轮询不变才视为渲染完成
+PAGE_NO_DATA_SETTLE_SECONDS = 3.0  # 页面持续显示"没有数据"多久后才确认（秒），避免把加载中的占位提示误判为无数据
+# 就绪检测的结果
+OVERVIEW_READY = 'ready'  # 概览组件已渲染完成
+OVERVIEW_NO_DATA = 'no_data'  # 页面显示 SimilarWeb 没有该网站的数据，不必再等待概览组件
+OVERVIEW_TIMEOUT = 'timeout'  # 超时仍未完全渲染
+# 页面显示"没有数据"时的提示文本（概览组件一个都没有出现时才检查），网站改版后需要同步修改
+OVERVIEW_NO_DATA_TEXTS = ['没有足够的数据', '暂无数据', '没有数据', '数据不足', 'Not enough data', 'No data available']
+
+# 指标提取方式：'dom' 等待页面渲染后按 XPath 读取文本；'api' 通过 CDP 网络事件直接解析页面数据接口的JSON响应，
+# 接口数据不完整时自动回退到 'dom'（见 dashboard_api.py）
+EXTRACTION_MODE = 'dom'
+
+# 浏览器配置方案：'full' 有界面并加载全部资源；'lean' 无头渲染、屏蔽图片/字体/统计脚本并缩小缓存（适合无图形界面的服务器）
+BROWSER_PROFILE = PROFILE_FULL
+
+# 并发抓取配置：WORKER_COUNT > 1 时启用多浏览器 worker 池
+WORKER_COUNT = 1
+# worker 池所有浏览器合计每分钟最多请求的数据页数量（0 表示不限速），只在 worker 池模式下生效：
+# 串行模式每次请求之间已有 3~5 秒随机延时，不再额外限速。单个浏览器（请求间隔 + 页面就绪等待）约每分钟 4~6 个域名，
+# 建议设为 WORKER_COUNT × 5 左右，例如 4 个 worker 时 20；设得低于这个值时增加 worker 不会提高吞吐
+POOL_REQUESTS_PER_MINUTE = 20
+
+# 实时写入 Google Sheets：开启后每个结果写入输出文件的同时缓存起来，按行数或时间批量提交到工作表
+SHEETS_WRITE_THROUGH = False
+SHEETS_CREDENTIALS_FILE = 'refined-magpie-474208-i2-6ead78929739.json'
+SHEETS_NAME = '产品信息列表'
+SHEETS_WORKSHEET_INDEX = 1  # 第2个工作表（索引从0开始）
+SHEETS_FLUSH_SIZE = 20  # 累计多少行提交一次
+SHEETS_FLUSH_INTERVAL = 60  # 距上次提交超过多少秒时提交
+
+# 快照采集：开启后把每个域名渲染完成的概览页和提取结果保存到 SNAPSHOT_DIR，供 benchmarks/replay_scrape.py 离线回放
+CAPTURE_SNAPSHOTS = False
+
+# 抓取历史：每个写入输出文件的结果同时追加到列式历史存储（按 域名/统计周期/抓取时间 保留每一次结果）
+RECORD_HISTORY = True
+
+# 热启动：启动浏览器后、第一次导航前用 CDP Network.setCookies 一次性写入 cookies.json，
+# 打开一次 SESSION_CHECK_URL 确认登录态有效后直接开始抓取；登录态失效时才走账号密码登录
+WARM_START = True
+SESSION_CHECK_TIMEOUT = 15  # 登录态检查的最长时间（秒）
+SESSION_SETTLE_SECONDS = 1.5  # 页面加载完成且地址保持不变多久后视为没有被重定向到登录页（秒）
+SESSION_POLL_INTERVAL = 0.25
+SESSION_STATE_SCRIPT = "return [location.href, document.title, document.readyState];"
+# cookies.json 中 sameSite 的取值（浏览器扩展导出格式和 Selenium 格式）到 CDP 取值的映射
+CDP_SAME_SITE = {'lax': 'Lax', 'strict': 'Strict', 'none': 'None', 'no_restriction': 'None'}
+
+# Cloudflare 验证检查：每次轮询执行一次页面脚本，只传回一个布尔值
+CLOUDFLARE_POLL_INTERVAL = 0.25  # 轮询间隔（秒）
+CLOUDFLARE_WAIT_STATS = {'checks': 0, 'challenged': 0, 'timeouts': 0, 'wait_seconds': 0.0}  # 本次运行的累计统计
+CLOUDFLARE_WAIT_STATS_LOCK = threading.Lock()
+# 先检查标题和验证页特有的元素；只有页面较小（验证页）时才扫描可见文本，避免在大型数据页上生成整页文本
+CLOUDFLARE_CHALLENGE_SCRIPT = """
+    var title = (document.title || '').toLowerCase();
+    if (title.indexOf('cloudflare') !== -1 || title.indexOf('just a moment') !== -1) {
+        return true;
+    }
+    if (document.querySelector("#challenge-form, #challenge-running, #cf-challenge-running, .cf-browser-verification, " +
+                               "iframe[src*='challenges.cloudflare.com'], script[src*='/cdn-cgi/challenge-platform/']")) {
+        return true;
+    }
+    if (!document.body || document.getElementsByTagName('*').length > 2000) {
+        return false;
+    }
+    var text = (document.body.innerText || '').toLowerCase();
+    return text.indexOf('checking your browser') !== -1 ||
+           text.indexOf('just a moment') !== -1 ||
+           text.indexOf('verify you are human') !== -1 ||
+           (text.indexOf('please wait') !== -1 && text.indexOf('cloudflare') !== -1);
+"""
+
+# 一次性读取概览组件状态的页面脚本：LabelValue 数量、MetricValue 数量、它们的文本快照，
+# 以及页面是否显示"没有数据"（只在概览组件一个都没有出现时检查空状态元素和提示文本）
+OVERVIEW_READY_SCRIPT = """
+    var noDataTexts = arguments[0];
+    var labels = document.querySelectorAll("span[class*='LabelValue']");
+    var metrics = document.querySelectorAll("div[class*='MetricContainer'] div[class*='MetricValue']");
+    var texts = [];
+    for (var i = 0; i < labels.length; i++) { texts.push(labels[i].textContent.trim()); }
+    for (var j = 0; j < metrics.length; j++) { texts.push(metrics[j].textContent.trim()); }
+    var noData = false;
+    if (labels.length === 0 && metrics.length === 0 && document.body) {
+        noData = !!document.querySelector("[class*='NoData'], [class*='noData'], [class*='EmptyState'], [class*='emptyState']");
+        if (!noData) {
+            var text = document.body.innerText || '';
+            for (var k = 0; k < noDataTexts.length && !noData; k++) { noData = text.indexOf(noDataTexts[k]) !== -1; }
+        }
+    }
+    return {labels: labels.length, metrics: metrics.length, snapshot: texts.join('|'), noData: noData};
+"""
+
+# 概览页各指标的 XPath（字段名与输出文件中的键保持一致）
+OVERVIEW_METRIC_XPATHS = {
+    'desktopPersent': "(//span[contains(@class, 'LabelValue')])[1]",
+    'mobilePercent': "(//span[contains(@class, 'LabelValue')])[2]",
+    'visits': "//div[text()='每月访问量']/ancestor::div[contains(@class, 'MetricContainer')]/descendant::div[contains(@class, 'MetricValue')]",
+    'monthly_unique_visitors': "//div[text()='月独立访客数']/../following-sibling::div/div[contains(@class, 'MetricValue')]",
+    'users_tab': "//div[text()='已消除重叠的受众']/ancestor::div[contains(@class, 'MetricContainer')]/descendant::div[contains(@class, 'MetricValue')]",
+    'pages-per-visit': "//div[text()='页面数/访问']/ancestor::div[contains(@class, 'MetricContainer')]/descendant::div[contains(@class, 'MetricValue')]",
+    'avg_visit_duration': "//div[text()='访问持续时间']/ancestor::div[contains(@class, 'MetricContainer')]/descendant::div[contains(@class, 'MetricValue')]",
+    'bounce_rate': "//div[text()='跳出率']/ancestor::div[contains(@class, 'MetricContainer')]/descendant::div[contains(@class, 'MetricValue')]",
+}
+
+# 在页面内一次性执行全部 XPath，返回 {字段名: 文本或 null}
+OVERVIEW_METRICS_SCRIPT = """
+    var xpaths = arguments[0];
+    var result = {};
+    for (var name in xpaths) {
+        var node = document.evaluate(xpaths[name], document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        result[name] = node ? (node.innerText || node.textContent || '').trim() : null;
+    }
+    return result;
+"""
+
+def wait_for_cloudflare_bypass(driver, timeout=30, poll_interval=CLOUDFLARE_POLL_INTERVAL):
     """
     检测并等待 Cloudflare 验证完成
-    返回: True 表示已绕过，False 表示仍被拦截
+    每次轮询只执行一次页面脚本（返回一个布尔值），不再通过 page_source 传回整个页面
+    返回: True 表示已绕过，False 表示仍被拦截；本次等待耗时记录在 CLOUDFLARE_WAIT_STATS 中
     """
     print("🔍 检查是否存在 Cloudflare 验证...")
     
     start_time = time.time()
+    last_reported_second = -1
+    challenged = False
     while time.time() - start_time < timeout:
         try:
-            # 检查页面标题和内容
-            page_source = driver.page_source.lower()
-            page_title = driver.title.lower()
-            
-            # Cloudflare 特征检测
-            cloudflare_indicators = [
-                'cloudflare' in page_title,
-                'checking your browser' in page_source,
-                'just a moment' in page_source,
-                'please wait' in page_source and 'cloudflare' in page_source,
-                'verify you are human' in page_source
-            ]
-            
-            if any(cloudflare_indicators):
-                print(f"⏳ 检测到 Cloudflare 验证，等待自动绕过... ({int(time.time() - start_time)}秒)")
-                time.sleep(2)
-                continue
-            else:
-                print("✅ Cloudflare 验证已绕过（或不存在）")
-                return True
-                
+            challenge_present = driver.execute_script(CLOUDFLARE_CHALLENGE_SCRIPT)
         except Exception as e:
+            # 页面正在跳转等情况下脚本可能执行失败，稍后重试
             print(f"⚠️  检测过程出错: {e}")
-            time.sleep(2)
+            time.sleep(poll_interval)
+            continue
+
+        elapsed = time.time() - start_time
+        if not challenge_present:
+            record_cloudflare_wait(elapsed, challenged, True)
+            if challenged:
+                print(f"✅ Cloudflare 验证已绕过（等待 {elapsed:.2f} 秒）")
+            else:
+                print("✅ Cloudflare 验证已绕过（或不存在）")
+            return True
+
+        challenged = True
+        if int(elapsed) != last_reported_second:
+            last_reported_second = int(elapsed)
+            print(f"⏳ 检测到 Cloudflare 验证，等待自动绕过... ({last_reported_second}秒)")
+        time.sleep(poll_interval)
     
+    record_cloudflare_wait(time.time() - start_time, challenged, False)
     print("⚠️  Cloudflare 验证超时，可能需要手动操作")
     return False
 
+def record_cloudflare_wait(elapsed, challenged, bypassed):
+    """累计 Cloudflare 检查的次数、等待总时长和超时次数"""
+    with CLOUDFLARE_WAIT_STATS_LOCK:
+        CLOUDFLARE_WAIT_STATS['checks'] += 1
+        CLOUDFLARE_WAIT_STATS['wait_seconds'] += elapsed
+        if challenged:
+            CLOUDFLARE_WAIT_STATS['challenged'] += 1
+        if not bypassed:
+            CLOUDFLARE_WAIT_STATS['timeouts'] += 1
+
+def wait_for_overview_ready(driver, timeout=PAGE_READY_TIMEOUT, poll_interval=PAGE_READY_POLL_INTERVAL, stable_polls=PAGE_READY_STABLE_POLLS):
+    """
+    等待网站概览页面渲染完成：LabelValue（桌面端/移动端）和六个 MetricValue 组件都已出现，
+    且它们的文本在连续 stable_polls 次轮询中保持不变；
+    页面持续 PAGE_NO_DATA_SETTLE_SECONDS 秒都显示"没有数据"（且概览组件始终没有出现）时立即返回，不再等到超时
+    返回: (OVERVIEW_READY / OVERVIEW_NO_DATA / OVERVIEW_TIMEOUT, 实际等待秒数)
+    """
+    start_time = time.time()
+    last_snapshot = None
+    stable_count = 0
+    no_data_since = None
+    while time.time() - start_time < timeout:
+        try:
+            state = driver.execute_script(OVERVIEW_READY_SCRIPT, OVERVIEW_NO_DATA_TEXTS) or {}
+        except Exception as e:
+            print(f"⚠️  就绪检测出错: {e}")
+            state = {}
+
+        if not state.get('noData'):
+            no_data_since = None
+        elif no_data_since is None:
+            no_data_since = time.time()
+        elif time.time() - no_data_since >= PAGE_NO_DATA_SETTLE_SECONDS:
+            elapsed = time.time() - start_time
+            print(f"✅ 页面显示没有该网站的数据，等待 {elapsed:.2f} 秒后直接返回")
+            return OVERVIEW_NO_DATA, elapsed
+
+        if state.get('labels', 0) >= 2 and state.get('metrics', 0) >= 6:
+            snapshot = state.get('snapshot')
+            if snapshot == last_snapshot:
+                stable_count += 1
+                if stable_count >= stable_polls:
+                    elapsed = time.time() - start_time
+                    print(f"✅ 概览组件已渲染完成，实际等待 {elapsed:.2f} 秒")
+                    return OVERVIEW_READY, elapsed
+            else:
+                stable_count = 0
+            last_snapshot = snapshot
+        else:
+            last_snapshot = None
+            stable_count = 0
+        time.sleep(poll_interval)
+
+    elapsed = time.time() - start_time
+    print(f"⚠️  概览组件在 {elapsed:.2f} 秒内未完全渲染，继续尝试提取已有数据")
+    return OVERVIEW_TIMEOUT, elapsed
+
+def extract_overview_metrics(driver):
+    """
+    通过一次页面脚本调用提取概览页全部指标的原始文本
+    返回: {字段名: 文本}，页面上不存在的指标值为 None
+    """
+    try:
+        raw_metrics = driver.execute_script(OVERVIEW_METRICS_SCRIPT, OVERVIEW_METRIC_XPATHS) or {}
+    except Exception as e:
+        print(f"⚠️  批量提取指标出错: {e}")
+        raw_metrics = {}
+    return {name: raw_metrics.get(name) for name in OVERVIEW_METRIC_XPATHS}
+
 def load_cookies_from_file(driver, domain_url):
     """
     从文件加载Cookie到WebDriver（适配浏览器扩展导出的格式）
@@ -112,6 +315,104 @@ def load_cookies_from_file(driver, domain_url):
         traceback.print_exc()
         return False
 
+def cookie_to_cdp(cookie):
+    """把 cookies.json 中的一条Cookie（浏览器扩展导出格式或 Selenium 格式）转换为 CDP Network.CookieParam"""
+    cdp_cookie = {
+        'name': cookie['name'],
+        'value': cookie['value'],
+        'domain': cookie['domain'],
+        'path': cookie.get('path', '/'),
+        'secure': cookie.get('secure', False),
+        'httpOnly': cookie.get('httpOnly', False),
+    }
+    expires = cookie.get('expirationDate', cookie.get('expiry'))
+    if expires is not None:
+        cdp_cookie['expires'] = float(expires)
+    same_site = CDP_SAME_SITE.get(str(cookie.get('sameSite', '')).lower())
+    if same_site:
+        cdp_cookie['sameSite'] = same_site
+    return cdp_cookie
+
+def install_cookies_via_cdp(driver):
+    """
+    一次 CDP 调用写入 cookies.json 中全部未过期的Cookie，不需要先打开目标域名
+    返回: 写入的Cookie数量（文件不存在、全部过期或写入失败时为0）
+    """
+    if not os.path.exists(COOKIE_FILE):
+        return 0
+    try:
+        with open(COOKIE_FILE, 'r', encoding='utf-8') as f:
+            cookies = [cookie_to_cdp(cookie) for cookie in json.load(f)]
+    except Exception as e:
+        print(f"⚠️  读取Cookie文件失败: {e}")
+        return 0
+
+    now = time.time()
+    valid_cookies = [cookie for cookie in cookies if cookie.get('expires', now + 1) > now]
+    if len(valid_cookies) < len(cookies):
+        print(f"⚠️  {len(cookies) - len(valid_cookies)}/{len(cookies)} 个Cookie已过期")
+    if not valid_cookies:
+        return 0
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setCookies', {'cookies': valid_cookies})
+    except Exception as e:
+        print(f"⚠️  通过 CDP 写入Cookie失败: {e}")
+        return 0
+    return len(valid_cookies)
+
+def is_login_page(url, title):
+    """
+    只按路径和 hash 路由判断是否为登录页（例如 /login、#/login），不看查询参数：
+    数据页地址中的 key=<域名> 可能包含 "login"（如 loginradius.com）
+    """
+    parsed = urlparse(url or '')
+    route = parsed.fragment.split('?', 1)[0]
+    segments = [segment for segment in (parsed.path + '/' + route).lower().split('/') if segment]
+    return any(segment.startswith('login') or segment.startswith('signin') for segment in segments) or "登录" in (title or '')
+
+def session_is_valid(driver):
+    """当前页面没有被重定向到登录页"""
+    return not is_login_page(driver.current_url, driver.title)
+
+def wait_for_session_state(driver, timeout=SESSION_CHECK_TIMEOUT):
+    """
+    导航后判断登录态：被重定向到登录页返回 False；页面加载完成且地址在 SESSION_SETTLE_SECONDS 内保持不变返回 True
+    """
+    start_time = time.time()
+    last_url = None
+    stable_since = None
+    while time.time() - start_time < timeout:
+        try:
+            url, title, ready_state = driver.execute_script(SESSION_STATE_SCRIPT)
+        except Exception:
+            time.sleep(SESSION_POLL_INTERVAL)
+            continue
+        if is_login_page(url, title):
+            return False
+        if ready_state == 'complete' and url == last_url:
+            if time.time() - stable_since >= SESSION_SETTLE_SECONDS:
+                return True
+        else:
+            last_url = url
+            stable_since = time.time()
+        time.sleep(SESSION_POLL_INTERVAL)
+    print(f"⚠️  {timeout} 秒内未能确认登录态")
+    return False
+
+def warm_start_session(driver, session_check_url):
+    """
+    热启动：CDP 一次性写入Cookie -> 打开一次 session_check_url 确认登录态
+    返回: True 表示登录态有效，可以直接开始抓取
+    """
+    installed_count = install_cookies_via_cdp(driver)
+    if not installed_count:
+        return False
+    print(f"🍪 已通过 CDP 一次性写入 {installed_count} 个Cookie，正在检查登录态...")
+    driver.get(session_check_url)
+    wait_for_cloudflare_bypass(driver, timeout=30)
+    return wait_for_session_state(driver)
+
 def save_cookies_to_file(driver):
     """
     保存当前浏览器的Cookie到文件（Selenium格式）
@@ -126,21 +427,20 @@ def save_cookies_to_file(driver):
         print(f"❌ 保存Cookie失败: {e}")
         return False
 
-def initialize_browser_and_prepare_for_search(initial_entry_url, username, password, use_cookies=True):
+def initialize_browser_and_prepare_for_search(initial_entry_url, username, password, use_cookies=True, browser_profile=BROWSER_PROFILE):
     # 配置 Chrome 选项（undetected_chromedriver 会自动添加反检测措施）
     options = uc.ChromeOptions()
     options.add_argument(f'user-agent={get_random_user_agent()}') # 伪装User-Agent
-    # options.add_argument('--headless=new')  # 无头模式（新版语法）
-    options.add_argument('--start-maximized') # 启动时最大化窗口
     options.add_argument('--disable-blink-features=AutomationControlled') # 禁用自动化控制特征
     
-    # 添加更多随机性和真实性
-    options.add_argument('--disable-dev-shm-usage') # 解决资源限制
-    options.add_argument('--no-sandbox') # 绕过操作系统安全模型
-    options.add_argument(f'--window-size={random.choice(["1920,1080", "1366,768", "1440,900"])}') # 随机窗口大小
+    # 有界面模式使用随机窗口大小增加真实性；精简模式使用无头渲染并屏蔽非必要资源（见 browser_profile.py）
+    configure_browser_options(options, browser_profile, window_size=random.choice(["1920,1080", "1366,768", "1440,900"]))
+    if EXTRACTION_MODE == 'api':
+        enable_performance_logging(options) # 接口提取模式需要性能日志中的网络事件
     
     # 使用 undetected_chromedriver（自动绕过检测）
     driver = uc.Chrome(options=options, version_main=None)  # version_main=None 自动检测Chrome版本
+    apply_network_rules(driver, browser_profile)
     
     # 设置随机的页面加载超时
     driver.set_page_load_timeout(60)
@@ -168,10 +468,18 @@ def initialize_browser_and_prepare_for_search(initial_entry_url, username, passw
         """
     })
 
+    start_time = time.time()
     try:
+        # --- 热启动：Cookie有效时跳过登录流程和首页等待，直接开始抓取 ---
+        if use_cookies and WARM_START and os.path.exists(COOKIE_FILE):
+            if warm_start_session(driver, initial_entry_url):
+                print(f"⚡ 热启动成功，登录态有效（用时 {time.time() - start_time:.2f} 秒），直接开始抓取。")
+                return driver
+            print("⚠️  Cookie已失效或无法确认登录态，将使用账号密码登录...")
+
         # --- 尝试使用Cookie登录 ---
         cookie_loaded = False
-        if use_cookies and os.path.exists(COOKIE_FILE):
+        if use_cookies and not WARM_START and os.path.exists(COOKIE_FILE):
             print("🍪 检测到Cookie文件，尝试使用Cookie登录...")
             cookie_loaded = load_cookies_from_file(driver, initial_entry_url)
             
@@ -184,7 +492,7 @@ def initialize_browser_and_prepare_for_search(initial_entry_url, username, passw
                 wait_for_cloudflare_bypass(driver, timeout=30)
                 
                 # 检查是否还在登录页面
-                if "login" not in driver.current_url.lower() and "登录" not in driver.title:
+                if not is_login_page(driver.current_url, driver.title):
                     print("✅ Cookie登录成功！跳过账号密码登录。")
                 else:
                     print("⚠️  Cookie可能已过期，将使用账号密码登录...")
@@ -198,7 +506,7 @@ def initialize_browser_and_prepare_for_search(initial_entry_url, username, passw
             # 检查并等待 Cloudflare 验证
             wait_for_cloudflare_bypass(driver, timeout=30)
 
-            if "login" in driver.current_url.lower() or "登录" in driver.title:
+            if is_login_page(driver.current_url, driver.title):
                 print("检测到登录界面，正在使用账号密码登录...")
                 
                 username_field = WebDriverWait(driver, 10).until(
@@ -217,7 +525,7 @@ def initialize_browser_and_prepare_for_search(initial_entry_url, username, passw
                 login_button.click()
 
                 time.sleep(random.uniform(5, 10))
-                if "login" in driver.current_url.lower() or "登录" in driver.title:
+                if is_login_page(driver.current_url, driver.title):
                     print("❌ 登录失败或页面未正确跳转，请检查用户名和密码。")
                     return None
                 else:
@@ -236,197 +544,179 @@ def initialize_browser_and_prepare_for_search(initial_entry_url, username, passw
             print("⚠️  Cloudflare 验证未通过，但尝试继续...")
         
         # 此时应该已经位于 sim.3ue.com/#/digitalsuite/home，准备进行搜索
-        print("已进入SimilarWeb数字套件首页，准备进行搜索。")
+        print(f"已进入SimilarWeb数字套件首页，准备进行搜索（用时 {time.time() - start_time:.2f} 秒）。")
         return driver
 
     except Exception as e:
         print(f"初始化浏览器或登录时发生错误: {e}")
         return None
 
-def search_and_scrape_website_data(driver, website_to_search, data_url_template):
+def search_and_scrape_website_data(driver, website_to_search, data_url_template, wait_mode=PAGE_WAIT_MODE, timer=None, extraction_mode=EXTRACTION_MODE, stale_detector=None):
     # --- 数据抓取核心逻辑 ---
+    # wait_mode: 'ready' 使用组件就绪检测，'fixed' 使用固定随机等待
+    # extraction_mode: 'api' 优先从页面数据接口的响应中解析指标，取不到时回退到页面渲染提取；'dom' 只用页面渲染提取
+    # timer: DomainTimer，记录导航、验证检查、渲染等待和提取各阶段的耗时
+    # stale_detector: StaleRenderDetector（每个浏览器一个），页面仍显示上一个域名的数据时只重新加载该域名
+    # 返回: MetricRecord，页面无数据时返回全部缺失的记录；页面加载超时或出错时返回 None，错误信息写入 timer.error（由调用方安排重试）
     print(f"正在准备访问网站数据页面: {website_to_search}")
-
-    # 初始化所有变量，设置默认值
-    desktop_percent_str = "N/A"
-    mobile_percent_str = "N/A"
-    desktop_percent = 0.0 # 用于验证
-    mobile_percent = 0.0 # 用于验证
-    visits_data = 0.0
-    monthly_unique_visitors_data = 0.0
-    users_tab_data = 0.0
-    pages_per_visit_data = 0.0
-    avg_visit_duration_data = "N/A"
-    bounce_rate_data = "N/A"
-    visits_per_visitor_data = 0.0
+    if timer is None:
+        timer = DomainTimer(website_to_search)
 
     try:
-        # 导航到目标数据页面
         target_data_page_url = data_url_template.format(website_name=website_to_search)
-        print(f"将直接导航到: {target_data_page_url}")
+        for load_attempt in range(STALE_RENDER_MAX_RELOADS + 1):
+            record = load_data_page_and_extract(driver, website_to_search, target_data_page_url, wait_mode, timer, extraction_mode,
+                                                full_reload=load_attempt > 0)
+            if record is None:
+                return None
+            # 页面是否显示该域名只是旁证（接口提取模式下页面可能尚未渲染，不检查）
+            shows_domain = (lambda: page_shows_domain(driver, website_to_search)) if extraction_mode != 'api' else None
+            stale_reason = stale_detector.check(website_to_search, record, shows_domain) if stale_detector else None
+            if stale_reason is None:
+                if stale_detector:
+                    stale_detector.remember(website_to_search, record)
+                return record
+            print(f"⚠️  {stale_reason}")
+            if load_attempt < STALE_RENDER_MAX_RELOADS:
+                print(f"♻️  重新加载 {website_to_search} 的数据页...")
+        timer.error = stale_reason
+        return None
+
+    except TimeoutException:
+        print(f"错误：在 {website_to_search} 页面未能在指定时间内加载。")
+        timer.error = "页面加载超时"
+        return None
+    except Exception as e:
+        print(f"访问数据页面或抓取数据时发生错误: {e}")
+        timer.error = f"{type(e).__name__}: {e}"
+        return None
+
+def load_data_page_and_extract(driver, website_to_search, target_data_page_url, wait_mode, timer, extraction_mode, full_reload=False):
+    """
+    导航到数据页、等待渲染并提取指标，返回 MetricRecord（出错时抛出异常，由 search_and_scrape_website_data 处理）
+    页面确认没有数据时返回全部缺失的记录并设置 timer.no_data；
+    未确认"没有数据"却取不到有效数据（组件超时未渲染、占比校验失败）时返回 None，原因写入 timer.error
+    full_reload: 先打开空白页再导航，让单页应用完整加载一次，而不是只切换 hash 路由
+    """
+    print(f"将直接导航到: {target_data_page_url}")
+    timer.no_data = False
+    page_state = None
+    if extraction_mode == 'api':
+        drain_performance_log(driver) # 丢弃上一个页面的网络事件
+    with timer.span(PHASE_NAVIGATE):
+        if full_reload:
+            driver.get('about:blank')
         driver.get(target_data_page_url)
-        time.sleep(random.uniform(3, 7)) # 额外等待数据页面加载
-        
-        # 检查 Cloudflare 验证
+        if wait_mode == 'fixed':
+            time.sleep(random.uniform(3, 7)) # 额外等待数据页面加载
+    
+    # 检查 Cloudflare 验证
+    with timer.span(PHASE_CHALLENGE_WAIT):
         if not wait_for_cloudflare_bypass(driver, timeout=30):
             print("⚠️  检测到 Cloudflare 验证，但尝试继续...")
 
-        # 等待网站性能数据页面加载（使用更长的固定等待时间，替代不稳定的元素检测）
-        print("正在等待网站性能数据页面加载...")
-        time.sleep(random.uniform(8, 12)) # 增加等待时间，确保页面和动态内容完全加载
-        print("等待完成，尝试提取 desktopPersent 和 mobilePercent 数据...")
-
-        # --- desktopPersent 和 mobilePercent 的提取和验证 ---
-        try:
-            # 尝试多种选择器策略以提高稳定性
-            desktop_xpath = "(//span[contains(@class, 'LabelValue')])[1]"
-            desktop_element = WebDriverWait(driver, 20).until(
-                EC.presence_of_element_located((By.XPATH, desktop_xpath))
-            )
-            desktop_percent_str = desktop_element.text.strip()
-            print(f"提取到桌面端数据: {desktop_percent_str}")
-            if desktop_percent_str.endswith('%') and desktop_percent_str[:-1].strip().upper() != "N/A":
-                desktop_percent = float(desktop_percent_str[:-1])
-            
-            mobile_xpath = "(//span[contains(@class, 'LabelValue')])[2]"
-            mobile_element = WebDriverWait(driver, 20).until(
-                EC.presence_of_element_located((By.XPATH, mobile_xpath))
-            )
-            mobile_percent_str = mobile_element.text.strip()
-            print(f"提取到移动端数据: {mobile_percent_str}")
-            if mobile_percent_str.endswith('%') and mobile_percent_str[:-1].strip().upper() != "N/A":
-                mobile_percent = float(mobile_percent_str[:-1])
-            
-            # 只有当两个百分比都成功提取并转换为非零数字时才进行验证
-            if desktop_percent != 0.0 and mobile_percent != 0.0:
-                sum_check = (abs(desktop_percent + mobile_percent - 100.0) < 0.1) # 允许浮点数误差
-                if not sum_check:
-                    print(f"错误：desktopPersent ({desktop_percent_str}) + mobilePercent ({mobile_percent_str}) 不等于 100%。")
-                    return "N/A", "N/A", 0.0, 0.0, 0.0, 0.0, "N/A", "N/A"
-            else:
-                print(f"错误：desktopPersent ({desktop_percent_str}) 或 mobilePercent ({mobile_percent_str}) 数据无效或缺失，无法进行相加验证。")
-                return "N/A", "N/A", 0.0, 0.0, 0.0, 0.0, "N/A", "N/A"
-
-        except TimeoutException:
-            print(f"错误：在 {website_to_search} 页面未能在指定时间内找到 desktopPersent 或 mobilePercent 元素，XPath 可能不正确或页面未完全加载。")
-            return "N/A", "N/A", 0.0, 0.0, 0.0, 0.0, "N/A", "N/A"
+    api_record = None
+    api_responses = None
+    if extraction_mode == 'api':
+        with timer.span(PHASE_API_WAIT):
+            api_record, api_responses = wait_for_api_metrics(driver, website_to_search)
+        # 采集快照时仍然等待渲染，保证快照是渲染完成的页面
+        if api_record is not None and not CAPTURE_SNAPSHOTS:
+            return api_record
 
-        # --- 其他指标的独立提取 ---
-        # 提取 visits 数据
-        try:
-            visits_xpath = "//div[text()='每月访问量']/ancestor::div[contains(@class, 'MetricContainer')]/descendant::div[contains(@class, 'MetricValue')]"
-            visits_element = WebDriverWait(driver, 30).until(
-                EC.presence_of_element_located((By.XPATH, visits_xpath))
-            )
-            visits_str = visits_element.text.strip()
-            if visits_str.upper() != "N/A":
-                visits_data = convert_metric_value_to_number(visits_str)
-        except TimeoutException:
-            print(f"警告：在 {website_to_search} 页面未能在指定时间内找到 visits 元素。")
-
-        # 提取 monthly_unique_visitors 数据
-        try:
-            monthly_unique_visitors_xpath = "//div[text()='月独立访客数']/../following-sibling::div/div[contains(@class, 'MetricValue')]"
-            monthly_unique_visitors_element = WebDriverWait(driver, 30).until(
-                EC.presence_of_element_located((By.XPATH, monthly_unique_visitors_xpath))
-            )
-            monthly_unique_visitors_str = monthly_unique_visitors_element.text.strip()
-            if monthly_unique_visitors_str.upper() != "N/A":
-                monthly_unique_visitors_data = convert_metric_value_to_number(monthly_unique_visitors_str)
-        except TimeoutException:
-            print(f"警告：在 {website_to_search} 页面未能在指定时间内找到 monthly_unique_visitors 元素。")
-
-        # 计算 visits_per_visitor
-        if visits_data != 0.0 and monthly_unique_visitors_data != 0.0:
-            raw_visits_per_visitor = visits_data / monthly_unique_visitors_data
-            visits_per_visitor_data = round(raw_visits_per_visitor, 2)
+    print("正在等待网站性能数据页面加载...")
+    with timer.span(PHASE_RENDER_WAIT):
+        if wait_mode == 'fixed':
+            # 使用固定等待时间，确保页面和动态内容完全加载
+            time.sleep(random.uniform(8, 12))
+            # 固定等待后检查一次页面是否显示没有数据（等待时间已远超 PAGE_NO_DATA_SETTLE_SECONDS）
+            try:
+                state = driver.execute_script(OVERVIEW_READY_SCRIPT, OVERVIEW_NO_DATA_TEXTS) or {}
+            except Exception:
+                state = {}
+            timer.no_data = bool(state.get('noData'))
+            if timer.no_data and not CAPTURE_SNAPSHOTS:
+                return MetricRecord.missing()
         else:
-            print("无法计算 visits_per_visitor，因为 visits 或 monthlyUniqueVisitors 数据无效。")
-
-        # 提取 users_tab 数据
-        try:
-            users_tab_xpath = "//div[text()='已消除重叠的受众']/ancestor::div[contains(@class, 'MetricContainer')]/descendant::div[contains(@class, 'MetricValue')]"
-            users_tab_element = WebDriverWait(driver, 30).until(
-                EC.presence_of_element_located((By.XPATH, users_tab_xpath))
-            )
-            users_tab_str = users_tab_element.text.strip()
-            if users_tab_str.upper() != "N/A":
-                users_tab_data = convert_metric_value_to_number(users_tab_str)
-        except TimeoutException:
-            print(f"警告：在 {website_to_search} 页面未能在指定时间内找到 users_tab 元素。")
-
-        # 提取 pages-per-visit 数据
-        try:
-            pages_per_visit_xpath = "//div[text()='页面数/访问']/ancestor::div[contains(@class, 'MetricContainer')]/descendant::div[contains(@class, 'MetricValue')]"
-            pages_per_visit_element = WebDriverWait(driver, 30).until(
-                EC.presence_of_element_located((By.XPATH, pages_per_visit_xpath))
-            )
-            pages_per_visit_str = pages_per_visit_element.text.strip()
-            if pages_per_visit_str.upper() != "N/A":
-                pages_per_visit_data = convert_metric_value_to_number(pages_per_visit_str)
-        except TimeoutException:
-            print(f"警告：在 {website_to_search} 页面未能在指定时间内找到 pages-per-visit 元素。")
-
-        # 提取 avg_visit_duration 数据
-        try:
-            avg_visit_duration_xpath = "//div[text()='访问持续时间']/ancestor::div[contains(@class, 'MetricContainer')]/descendant::div[contains(@class, 'MetricValue')]"
-            avg_visit_duration_element = WebDriverWait(driver, 30).until(
-                EC.presence_of_element_located((By.XPATH, avg_visit_duration_xpath))
-            )
-            avg_visit_duration_str = avg_visit_duration_element.text.strip()
-            if avg_visit_duration_str.upper() != "N/A":
-                avg_visit_duration_data = avg_visit_duration_str # 保持字符串
-        except TimeoutException:
-            print(f"警告：在 {website_to_search} 页面未能在指定时间内找到 avg_visit_duration 元素。")
+            # 组件渲染完成即返回，等待时间跟随真实渲染耗时；页面显示没有数据时也立即返回
+            page_state, _ = wait_for_overview_ready(driver)
+            timer.no_data = page_state == OVERVIEW_NO_DATA
+            if timer.no_data and not CAPTURE_SNAPSHOTS:
+                return MetricRecord.missing()
+    print("等待完成，一次性提取概览页全部指标...")
 
-        # 提取 bounce_rate 数据
-        try:
-            bounce_rate_xpath = "//div[text()='跳出率']/ancestor::div[contains(@class, 'MetricContainer')]/descendant::div[contains(@class, 'MetricValue')]"
-            bounce_rate_element = WebDriverWait(driver, 30).until(
-                EC.presence_of_element_located((By.XPATH, bounce_rate_xpath))
-            )
-            bounce_rate_str = bounce_rate_element.text.strip()
-            if bounce_rate_str.upper() != "N/A":
-                bounce_rate_data = bounce_rate_str # 保持字符串
-        except TimeoutException:
-            print(f"警告：在 {website_to_search} 页面未能在指定时间内找到 bounce_rate 元素。")
-            
-        return desktop_percent_str, mobile_percent_str, visits_data, visits_per_visitor_data, users_tab_data, pages_per_visit_data, avg_visit_duration_data, bounce_rate_data
+    # 一次页面脚本调用取回全部指标的原始文本，缺失的指标直接为 None，不再额外等待
+    with timer.span(PHASE_EXTRACT):
+        raw_metrics = extract_overview_metrics(driver)
+        record = build_metric_record(raw_metrics, website_to_search)
+    if CAPTURE_SNAPSHOTS:
+        capture_overview_snapshot(driver, website_to_search, raw_metrics, record, api_responses)
+    if api_record is not None:
+        return api_record
+    if not record.has_data and not timer.no_data:
+        # 不能当作"没有数据"保存（否则会写入负缓存并覆盖之前的结果），按抓取失败处理，进入重试队列
+        timer.error = "概览组件超时未渲染" if page_state == OVERVIEW_TIMEOUT else "未提取到有效的桌面端/移动端占比"
+        return None
+    return record
 
-    except TimeoutException:
-        print(f"错误：在 {website_to_search} 页面未能在指定时间内加载。")
-        return "N/A", "N/A", 0.0, 0.0, 0.0, 0.0, "N/A", "N/A"
+def capture_overview_snapshot(driver, website_to_search, raw_metrics, record, api_responses=None):
+    """保存渲染完成的概览页、本次提取结果和（接口提取模式下）收到的接口响应，失败时只提示不影响抓取"""
+    try:
+        html = driver.execute_script("return document.documentElement.outerHTML;")
+        html_path = save_snapshot(SNAPSHOT_DIR, website_to_search, html, raw_metrics, record.to_dict(), api_responses)
+        print(f"📸 已保存概览页快照: {html_path}")
     except Exception as e:
-        print(f"访问数据页面或抓取数据时发生错误: {e}")
-        return "N/A", "N/A", 0.0, 0.0, 0.0, 0.0, "N/A", "N/A"
+        print(f"⚠️  保存概览页快照失败: {e}")
 
-def convert_metric_value_to_number(value_str):
+def build_metric_record(raw_metrics, website_to_search):
     """
-    将MetricValue字符串（如"224.8M", "123K", "1,234", "1.2万", "3亿"）转换为数字。
+    校验并解析 extract_overview_metrics 取回的原始文本
+    desktopPersent + mobilePercent 必须等于 100%，否则视为无效，返回全部缺失的记录
     """
-    if value_str is None or (isinstance(value_str, str) and value_str.strip().upper() == "N/A"):
-        return 0.0 # 根据要求，如果为N/A或None，返回0.0
+    desktop_percent_str = raw_metrics.get('desktopPersent')
+    mobile_percent_str = raw_metrics.get('mobilePercent')
+    if desktop_percent_str is None or mobile_percent_str is None:
+        print(f"错误：在 {website_to_search} 页面未能找到 desktopPersent 或 mobilePercent 元素，XPath 可能不正确或页面未完全加载。")
+        return MetricRecord.missing()
 
-    value_str = value_str.strip().replace(',', '') # 移除千位分隔符
+    print(f"提取到桌面端数据: {desktop_percent_str}")
+    print(f"提取到移动端数据: {mobile_percent_str}")
+    desktop_share = parse_fraction(desktop_percent_str) if desktop_percent_str.endswith('%') else None
+    mobile_share = parse_fraction(mobile_percent_str) if mobile_percent_str.endswith('%') else None
 
-    if value_str.endswith('M'):
-        return float(value_str[:-1]) * 1_000_000
-    elif value_str.endswith('K'):
-        return float(value_str[:-1]) * 1_000
-    elif value_str.endswith('亿'):
-        return float(value_str[:-1]) * 100_000_000
-    elif value_str.endswith('万'):
-        return float(value_str[:-1]) * 10_000
-    elif value_str.endswith('千'):
-        return float(value_str[:-1]) * 1_000
+    # 只有当两个百分比都成功提取并转换为非零数字时才进行验证
+    if desktop_share and mobile_share:
+        sum_check = (abs(desktop_share + mobile_share - 1.0) < 0.001) # 允许浮点数误差
+        if not sum_check:
+            print(f"错误：desktopPersent ({desktop_percent_str}) + mobilePercent ({mobile_percent_str}) 不等于 100%。")
+            return MetricRecord.missing()
     else:
-        try:
-            # 尝试转换为浮点数，包括处理百分比（去除百分号后转换）
-            if value_str.endswith('%'):
-                return float(value_str[:-1])
-            return float(value_str)
-        except ValueError:
-            return value_str # 如果无法转换成数字，则返回原始字符串
+        print(f"错误：desktopPersent ({desktop_percent_str}) 或 mobilePercent ({mobile_percent_str}) 数据无效或缺失，无法进行相加验证。")
+        return MetricRecord.missing()
+
+    # --- 其他指标的独立解析 ---
+    for metric_name in ('visits', 'monthly_unique_visitors', 'users_tab', 'pages-per-visit', 'avg_visit_duration', 'bounce_rate'):
+        if raw_metrics.get(metric_name) is None:
+            print(f"警告：在 {website_to_search} 页面未找到 {metric_name} 元素。")
+
+    record = MetricRecord(
+        desktop_share=desktop_share,
+        mobile_share=mobile_share,
+        visits=parse_number(raw_metrics.get('visits')),
+        users_tab=parse_number(raw_metrics.get('users_tab')),
+        pages_per_visit=parse_number(raw_metrics.get('pages-per-visit')),
+        avg_visit_duration=parse_seconds(raw_metrics.get('avg_visit_duration')),
+        bounce_rate=parse_fraction(raw_metrics.get('bounce_rate')),
+    )
+
+    # 计算 visits_per_visitor
+    monthly_unique_visitors = parse_number(raw_metrics.get('monthly_unique_visitors'))
+    if record.visits and monthly_unique_visitors:
+        record.visits_per_visitor = round(record.visits / monthly_unique_visitors, 2)
+    else:
+        print("无法计算 visits_per_visitor，因为 visits 或 monthlyUniqueVisitors 数据无效。")
+
+    return record
 
 def get_random_user_agent():
     user_agents = [
@@ -438,89 +728,207 @@ def get_random_user_agent():
     ]
     return random.choice(user_agents)
 
-def get_first_url_from_file(urls_file_path):
+def build_website_result(record):
     """
-    读取urls.txt文件的第一行URL
-    返回URL字符串，如果文件为空或不存在返回None
+    将 search_and_scrape_website_data 返回的 MetricRecord 转换为输出文件中的字典格式
     """
-    try:
-        with open(urls_file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-            if lines:
-                return lines[0].strip()
-            return None
-    except FileNotFoundError:
-        print(f"错误：文件 {urls_file_path} 不存在")
-        return None
-    except Exception as e:
-        print(f"读取URL文件时发生错误: {e}")
-        return None
+    return record.to_dict()
+
+def print_website_result(website_url, result):
+    print(f"✓ 成功抓取 {website_url} 的数据：")
+    print(f"  - 桌面端: {result['desktopPersent']}, 移动端: {result['mobilePercent']}")
+    print(f"  - Visits: {result['visits']}, 每次访客访问量: {result['visits_per_visitor']:.2f}")
+    print(f"  - 已消除重叠的受众: {result['users_tab']}, 页面数/访问: {result['pages-per-visit']}")
+    print(f"  - 访问持续时间: {result['avg_visit_duration']}, 跳出率: {result['bounce_rate']}")
 
-def remove_first_url_from_file(urls_file_path):
+def print_retry_decision(website_url, retry_at, url_queue, prefix=''):
+    """输出抓取失败后的处理结果：retry_at 为 UrlQueue.fail 返回的下一次重试时间，None 表示已移入死信文件"""
+    if retry_at is None:
+        print(f"✗ {prefix}抓取 {website_url} 数据失败，尝试次数已用完，已移入死信文件 {url_queue.dead_letter_path}")
+    else:
+        print(f"✗ {prefix}抓取 {website_url} 数据失败，将在 {retry_at - time.time():.0f} 秒后重试，其他网站继续抓取")
+
+def parse_data_url_scope(data_url_template):
     """
-    删除urls.txt文件的第一行URL
+    从数据页URL模板中解析统计周期和流量来源，作为结果缓存键的一部分
+    例如: .../999/2025.01-2025.08?webSource=Total&key=... -> ('2025.01-2025.08', 'Total')
     """
-    try:
-        with open(urls_file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-        
-        # 写回剩余的行（跳过第一行）
-        with open(urls_file_path, 'w', encoding='utf-8') as f:
-            f.writelines(lines[1:])
-        
-        remaining_count = len(lines) - 1
-        print(f"已从URL列表中删除该URL，剩余 {remaining_count} 个URL待处理")
-        return True
-    except Exception as e:
-        print(f"删除URL时发生错误: {e}")
+    date_range_match = re.search(r'/(\d{4}\.\d{2}-\d{4}\.\d{2})(?:\?|$)', data_url_template)
+    web_source_match = re.search(r'webSource=([^&]+)', data_url_template)
+    date_range = date_range_match.group(1) if date_range_match else ''
+    web_source = web_source_match.group(1) if web_source_match else ''
+    return date_range, web_source
+
+def serve_without_browser(website_url, result_store, result_cache, data_scope):
+    """
+    检查该域名是否可以不打开浏览器直接完成：结果缓存中有该统计周期和流量来源下未过期的结果
+    （输出文件中的行不记录统计周期，不能用来判断是否需要重新抓取）
+    返回: True 表示无需抓取，缓存结果已写入输出文件（输出文件中已是同一结果时不重复写入）
+    """
+    cached_result = result_cache.get(website_url, *data_scope)
+    if cached_result is None:
         return False
+    if result_store.get(website_url) == cached_result:
+        print(f"{website_url} 本统计周期已有未过期的结果，跳过抓取")
+    else:
+        result_store.put(website_url, cached_result)
+        print(f"✓ [{website_url}] 命中结果缓存，已直接写入输出文件")
+    return True
 
-def count_remaining_urls(urls_file_path):
+def defer_no_data_recheck(website_url, result_store, url_queue):
     """
-    统计urls.txt中剩余的URL数量
+    输出文件中最新结果为无数据、且结果缓存中已没有未过期结果的域名，第一次租用时推迟到队列末尾（低优先级），
+    等普通域名都处理完后再复查；已经推迟过的域名直接复查
+    返回: True 表示已推迟，本次不抓取
     """
-    try:
-        with open(urls_file_path, 'r', encoding='utf-8') as f:
-            return len(f.readlines())
-    except:
-        return 0
+    if not result_store.has_no_data(website_url) or not url_queue.defer(website_url):
+        return False
+    print(f"{website_url} 之前没有数据，推迟到队列末尾以低优先级复查")
+    return True
 
-def check_duplicate_data(output_file_path):
+def save_scraped_result(website_url, result, result_store, result_cache, data_scope, no_data=False):
     """
-    检查最后三个JSON数据的desktopPersent和visits是否完全相同
-    如果相同则返回True（表示检测到重复），否则返回False
+    保存抓取结果到输出文件并写入结果缓存；no_data=True（页面确认没有数据）的结果按较短的有效期缓存（负缓存）
     """
+    stored_result = result_store.put(website_url, result)
+    print(f"✓ [{website_url}] 结果已保存到文件")
+    result_cache.put(website_url, *data_scope, stored_result, has_data=not no_data)
+
+class RequestRateLimiter:
+    """
+    所有浏览器 worker 共享的全局请求速率限制，保证每分钟的数据页请求不超过 requests_per_minute 次
+    requests_per_minute 为 0 或 None 时不限速
+    """
+    def __init__(self, requests_per_minute):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self._lock = threading.Lock()
+        self._next_request_time = time.time()
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.time()
+            wait_time = self._next_request_time - now
+            self._next_request_time = max(now, self._next_request_time) + self.interval
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+def run_worker_pool(worker_count, initial_entry_url, username, password, url_queue, result_store, result_cache, data_url_template, requests_per_minute=POOL_REQUESTS_PER_MINUTE, timing_recorder=None):
+    """
+    多浏览器并发抓取：启动 worker_count 个浏览器（共享 cookies.json 登录态），
+    各 worker 从持久化队列 url_queue 租用域名，结果写入增量结果文件 result_store 和结果缓存 result_cache，
+    所有 worker 共用一个全局速率限制；传入 timing_recorder 时记录每个域名的分阶段耗时
+    返回: 成功处理的网站数量
+    """
+    # 依次初始化浏览器：第一个浏览器如需账号密码登录会刷新 cookies.json，后续浏览器直接复用
+    # 每个浏览器由一个 BrowserWatchdog 监控，异常或达到阈值时自动重启并通过 cookies.json 重新登录
+    driver_factory = lambda: initialize_browser_and_prepare_for_search(initial_entry_url, username, password, use_cookies=True)
+    watchdogs = []
+    for worker_index in range(worker_count):
+        print(f"正在启动第 {worker_index + 1}/{worker_count} 个浏览器 worker...")
+        watchdog = BrowserWatchdog(driver_factory, name=f"worker-{worker_index + 1}", session_check=session_is_valid)
+        if watchdog.start():
+            watchdogs.append(watchdog)
+        else:
+            print(f"⚠️  第 {worker_index + 1} 个浏览器初始化失败，跳过该 worker")
+
+    if not watchdogs:
+        print("所有浏览器 worker 均初始化失败，无法进行数据抓取。")
+        return 0
+
+    print(f"浏览器 worker 数量: {len(watchdogs)}，待抓取网站: {url_queue.count(STATUS_PENDING)} 个")
+
+    data_scope = parse_data_url_scope(data_url_template)
+    rate_limiter = RequestRateLimiter(requests_per_minute)
+    file_lock = threading.Lock()  # 保护输出文件的并发写入
+    stop_event = threading.Event()
+    processed = {'count': 0}
+    timing_recorder = timing_recorder or TimingRecorder()
+
+    def worker(worker_id, watchdog):
+        stale_detector = StaleRenderDetector()  # 每个浏览器单独检查是否仍显示上一个域名的数据
+        while not stop_event.is_set():
+            # 只剩等待重试的域名时在这里等到重试时间，队列清空后结束
+            current_url = url_queue.lease_next(f"worker-{worker_id}", should_stop=stop_event.is_set)
+            if current_url is None:
+                return
+            timer = timing_recorder.start(current_url, f"worker-{worker_id}")
+
+            with timer.span(PHASE_CACHE), file_lock:
+                served = serve_without_browser(current_url, result_store, result_cache, data_scope)
+            if served:
+                with timer.span(PHASE_QUEUE_UPDATE):
+                    url_queue.ack(current_url)
+                timing_recorder.record(timer, OUTCOME_CACHED)
+                continue
+            if defer_no_data_recheck(current_url, result_store, url_queue):
+                timing_recorder.record(timer, OUTCOME_DEFERRED)
+                continue
+
+            with timer.span(PHASE_RECYCLE):
+                driver = watchdog.before_domain()
+            if driver is None:
+                print(f"✗ [worker {worker_id}] 浏览器无法重启，该 worker 停止，{current_url} 已放回队列")
+                url_queue.release(current_url)
+                timing_recorder.record(timer, OUTCOME_REQUEUED)
+                return
+
+            with timer.span(PHASE_THROTTLE):
+                rate_limiter.acquire()
+                time.sleep(random.uniform(3, 5)) # 每次请求间随机延时
+            print(f"\n[worker {worker_id}] 正在处理: {current_url}")
+
+            scrape_start = time.time()
+            try:
+                scraped_data = search_and_scrape_website_data(driver, current_url, data_url_template, timer=timer,
+                                                              stale_detector=stale_detector)
+            except Exception:
+                url_queue.release(current_url)
+                raise
+            unhealthy_reason = watchdog.after_domain(time.time() - scrape_start, scraped_data, no_data=timer.no_data)
+            if unhealthy_reason:
+                # 计入尝试次数并按退避重新排期：反复拖垮浏览器的域名最终进入死信文件，不会一直排在队首
+                print(f"⚠️  [worker {worker_id}] {unhealthy_reason}，{current_url} 的结果不可信")
+                with timer.span(PHASE_QUEUE_UPDATE):
+                    retry_at = url_queue.fail(current_url, f"浏览器异常: {unhealthy_reason}")
+                print_retry_decision(current_url, retry_at, url_queue, f"[worker {worker_id}] ")
+                timing_recorder.record(timer, OUTCOME_REQUEUED)
+                continue
+            if scraped_data is None:
+                with timer.span(PHASE_QUEUE_UPDATE):
+                    retry_at = url_queue.fail(current_url, timer.error or "抓取结果为空")
+                print_retry_decision(current_url, retry_at, url_queue, f"[worker {worker_id}] ")
+                timing_recorder.record(timer, OUTCOME_FAILED)
+                continue
+
+            result = build_website_result(scraped_data)
+            with file_lock:
+                print_website_result(current_url, result)
+                with timer.span(PHASE_PERSIST):
+                    save_scraped_result(current_url, result, result_store, result_cache, data_scope, no_data=timer.no_data)
+                with timer.span(PHASE_QUEUE_UPDATE):
+                    url_queue.ack(current_url)
+                processed['count'] += 1
+            timing_recorder.record(timer, OUTCOME_NO_DATA if timer.no_data else OUTCOME_SCRAPED)
+
+    threads = [
+        threading.Thread(target=worker, args=(worker_index + 1, watchdog), daemon=True)
+        for worker_index, watchdog in enumerate(watchdogs)
+    ]
     try:
-        with open(output_file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-        
-        # 至少需要3条记录才能检查
-        if len(lines) < 3:
-            return False
-        
-        # 获取最后3条记录
-        last_three = []
-        for line in lines[-3:]:
-            if line.strip():
-                data = json.loads(line)
-                # 获取第一个（也是唯一）的键值对
-                url = list(data.keys())[0]
-                values = data[url]
-                last_three.append({
-                    'desktopPersent': values.get('desktopPersent'),
-                    'visits': values.get('visits')
-                })
-        
-        # 检查最后三个是否完全相同
-        if len(last_three) == 3:
-            if (last_three[0]['desktopPersent'] == last_three[1]['desktopPersent'] == last_three[2]['desktopPersent'] and
-                last_three[0]['visits'] == last_three[1]['visits'] == last_three[2]['visits']):
-                return True
-        
-        return False
-    except Exception as e:
-        print(f"检查重复数据时出错: {e}")
-        return False
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        stop_event.set()
+        for watchdog in watchdogs:
+            if watchdog.recycle_count:
+                print(f"[{watchdog.name}] 本次运行共重启浏览器 {watchdog.recycle_count} 次")
+            watchdog.close()
+
+    return processed['count']
 
 if __name__ == "__main__":
     # chrome_driver_path = r"E:\chromedriver-win64\chromedriver-win64\chromedriver.exe"  # 已改用自动管理，无需手动指定
@@ -536,83 +944,152 @@ if __name__ == "__main__":
     base_data_url_template = "https://sim.3ue.com/#/digitalsuite/websiteanalysis/overview/website-performance/*/999/2025.01-2025.08?webSource=Total&key={website_name}"
 
     driver_instance = None
+    watchdog = None
+    url_queue = None
+    result_cache = None
+    sheets_write_through = None
+    timing_recorder = TimingRecorder(TIMING_LOG_PATH)  # 每个域名的分阶段耗时，运行结束时输出汇总
     try:
-        print("正在启动浏览器并准备进行网站搜索...")
-        # use_cookies=True 表示启用Cookie登录功能
-        driver_instance = initialize_browser_and_prepare_for_search(initial_entry_url, your_username, your_password, use_cookies=True)
+        # 持久化抓取队列：恢复上次中断时未确认的域名，并导入 urls.txt 中新加入的域名
+        url_queue = UrlQueue(QUEUE_DB_PATH)
+        recovered_count = url_queue.recover_in_flight()
+        if recovered_count:
+            print(f"已恢复上次中断时未完成的 {recovered_count} 个网站")
+        imported_count = url_queue.import_from_file(urls_file_path)
+        print(f"已从 {urls_file_path} 导入 {imported_count} 个网站到抓取队列: {QUEUE_DB_PATH}")
+
+        # 统计初始URL数量
+        total_urls = url_queue.count(STATUS_PENDING)
+        print(f"抓取队列中共有 {total_urls} 个网站待抓取")
+
+        # 增量结果文件：保留上次运行的结果，新结果追加写入（是否跳过抓取由结果缓存按统计周期判断）
+        result_store = ResultStore(output_file_path)
+        print(f"输出文件 {output_file_path} 中已有 {len(result_store)} 个网站的结果，新结果将追加写入\n")
+
+        if SHEETS_WRITE_THROUGH:
+            from similarweb_lib.sheets_sink import SheetsWriteThrough, open_worksheet
+            print(f"正在连接 Google Sheets 以实时写入结果: {SHEETS_NAME}...")
+            worksheet = open_worksheet(SHEETS_CREDENTIALS_FILE, SHEETS_NAME, SHEETS_WORKSHEET_INDEX)
+            sheets_write_through = SheetsWriteThrough(worksheet, flush_size=SHEETS_FLUSH_SIZE, flush_interval=SHEETS_FLUSH_INTERVAL)
+            result_store.subscribe(sheets_write_through.add)
+            print(f"✓ 已开启实时写入 Google Sheets: {worksheet.title}\n")
+
+        # 结果缓存：同一统计周期内未过期的结果直接复用，只对未命中和已过期的域名打开浏览器
+        result_cache = ResultCache(RESULT_CACHE_DB_PATH)
+        data_scope = parse_data_url_scope(base_data_url_template)
+
+        if RECORD_HISTORY:
+            history_store = HistoryStore(HISTORY_DIR)
+            history_period = data_scope[0]
+            result_store.subscribe(lambda url, values: history_store.append_result(url, history_period, values))
+            print(f"✓ 抓取结果将同时追加到历史存储: {HISTORY_DIR}（统计周期 {history_period}）\n")
+
+        if WORKER_COUNT > 1:
+            print(f"正在以并发模式启动 {WORKER_COUNT} 个浏览器 worker...")
+
+            start_time = time.time() # 记录开始时间
+            processed_count = run_worker_pool(WORKER_COUNT, initial_entry_url, your_username, your_password, url_queue, result_store, result_cache, base_data_url_template, requests_per_minute=POOL_REQUESTS_PER_MINUTE, timing_recorder=timing_recorder)
+
+            total_time = time.time() - start_time
+            print(f"\n{'='*60}")
+            print(f"所有抓取任务完成！")
+            print(f"成功处理: {processed_count} 个网站")
+            print(f"总耗时: {total_time:.2f} 秒 ({total_time/60:.2f} 分钟)")
+            print(f"{'='*60}")
+        else:
+            print("正在启动浏览器并准备进行网站搜索...")
+            # use_cookies=True 表示启用Cookie登录功能
+            driver_instance = initialize_browser_and_prepare_for_search(initial_entry_url, your_username, your_password, use_cookies=True)
 
         if driver_instance:
             print("浏览器初始化和准备完成。开始循环抓取数据...")
-            
-            # 统计初始URL数量
-            total_urls = count_remaining_urls(urls_file_path)
-            print(f"URL列表中共有 {total_urls} 个网站待抓取")
-            
-            # 在开始批量抓取前清空输出文件内容
-            with open(output_file_path, 'w', encoding='utf-8') as f:
-                f.write("") 
-            print(f"已清空或创建输出文件: {output_file_path}\n")
+            # 浏览器健康监控：按阈值自动重启浏览器，并通过 cookies.json 重新登录
+            watchdog = BrowserWatchdog(
+                lambda: initialize_browser_and_prepare_for_search(initial_entry_url, your_username, your_password, use_cookies=True),
+                driver=driver_instance, session_check=session_is_valid
+            )
 
+            stale_detector = StaleRenderDetector()  # 页面仍显示上一个域名的数据时只重新加载该域名，不中断整个运行
             processed_count = 0
             start_time = time.time() # 记录开始时间
             
-            # 循环处理：读取第一个URL -> 抓取 -> 删除
+            # 循环处理：租用下一个域名 -> 抓取 -> 确认（失败的域名按指数退避稍后重试，其他域名照常抓取）
             while True:
-                # 读取第一个URL
-                current_url = get_first_url_from_file(urls_file_path)
+                current_url = url_queue.lease_next("main")
                 
                 if current_url is None:
                     print("\n所有URL已处理完成！")
                     break
+                timer = timing_recorder.start(current_url)
+
+                with timer.span(PHASE_CACHE):
+                    served = serve_without_browser(current_url, result_store, result_cache, data_scope)
+                if served:
+                    with timer.span(PHASE_QUEUE_UPDATE):
+                        url_queue.ack(current_url)
+                    timing_recorder.record(timer, OUTCOME_CACHED)
+                    continue
+                if defer_no_data_recheck(current_url, result_store, url_queue):
+                    timing_recorder.record(timer, OUTCOME_DEFERRED)
+                    continue
                 
                 processed_count += 1
-                remaining = count_remaining_urls(urls_file_path)
+                remaining = url_queue.count(STATUS_PENDING)
                 print(f"\n{'='*60}")
                 print(f"正在处理第 {processed_count} 个网站: {current_url}")
-                print(f"剩余待处理: {remaining - 1} 个")
+                print(f"剩余待处理: {remaining} 个")
                 print(f"{'='*60}")
                 
-                time.sleep(random.uniform(3, 5)) # 每次请求间随机延时
+                with timer.span(PHASE_RECYCLE):
+                    driver_instance = watchdog.before_domain()
+                if driver_instance is None:
+                    print(f"✗ 浏览器无法重启，停止抓取，{current_url} 已放回队列")
+                    url_queue.release(current_url)
+                    timing_recorder.record(timer, OUTCOME_REQUEUED)
+                    break
+
+                with timer.span(PHASE_THROTTLE):
+                    time.sleep(random.uniform(3, 5)) # 每次请求间随机延时（全局速率限制只用于 worker 池）
 
                 # 抓取数据
-                desktop_percent_str, mobile_percent_str, visits_data, visits_per_visitor_data, users_tab_data, pages_per_visit_data, avg_visit_duration_data, bounce_rate_data = search_and_scrape_website_data(driver_instance, current_url, base_data_url_template)
+                scrape_start = time.time()
+                try:
+                    scraped_data = search_and_scrape_website_data(driver_instance, current_url, base_data_url_template, timer=timer,
+                                                                  stale_detector=stale_detector)
+                except BaseException:
+                    # 中断或异常时把该域名放回队列，下次运行继续处理
+                    url_queue.release(current_url)
+                    raise
+
+                # 浏览器无响应或已被登出时结果不可信：放回队列，下一轮先重启浏览器
+                unhealthy_reason = watchdog.after_domain(time.time() - scrape_start, scraped_data, no_data=timer.no_data)
+                if unhealthy_reason:
+                    # 计入尝试次数并按退避重新排期：反复拖垮浏览器的域名最终进入死信文件，不会一直排在队首
+                    print(f"⚠️  {unhealthy_reason}，{current_url} 的结果不可信")
+                    with timer.span(PHASE_QUEUE_UPDATE):
+                        retry_at = url_queue.fail(current_url, f"浏览器异常: {unhealthy_reason}")
+                    print_retry_decision(current_url, retry_at, url_queue)
+                    timing_recorder.record(timer, OUTCOME_REQUEUED)
+                    continue
                 
-                if desktop_percent_str is not None and mobile_percent_str is not None:
-                    current_website_result = {
-                        "desktopPersent": desktop_percent_str,
-                        "mobilePercent": mobile_percent_str,
-                        "visits": visits_data,
-                        "visits_per_visitor": visits_per_visitor_data,
-                        "users_tab": users_tab_data,
-                        "pages-per-visit": pages_per_visit_data,
-                        "avg_visit_duration": avg_visit_duration_data,
-                        "bounce_rate": bounce_rate_data
-                    }
-                    
-                    print(f"✓ 成功抓取 {current_url} 的数据：")
-                    print(f"  - 桌面端: {desktop_percent_str}, 移动端: {mobile_percent_str}")
-                    print(f"  - Visits: {visits_data}, 每次访客访问量: {visits_per_visitor_data:.2f}")
-                    print(f"  - 已消除重叠的受众: {users_tab_data}, 页面数/访问: {pages_per_visit_data}")
-                    print(f"  - 访问持续时间: {avg_visit_duration_data}, 跳出率: {bounce_rate_data}")
-
-                    # 将当前网站的结果保存到文件
-                    with open(output_file_path, 'a', encoding='utf-8') as f:
-                        json.dump({current_url: current_website_result}, f, ensure_ascii=False)
-                        f.write('\n')
-                    print(f"✓ [{current_url}] 结果已保存到文件")
-                    
-                    # 抓取成功后，从urls.txt中删除该URL
-                    remove_first_url_from_file(urls_file_path)
+                if scraped_data is not None:
+                    current_website_result = build_website_result(scraped_data)
+                    print_website_result(current_url, current_website_result)
+
+                    # 将当前网站的结果追加保存到文件，并写入结果缓存
+                    with timer.span(PHASE_PERSIST):
+                        save_scraped_result(current_url, current_website_result, result_store, result_cache, data_scope,
+                                            no_data=timer.no_data)
                     
-                    # 检查最后三个数据是否重复
-                    if check_duplicate_data(output_file_path):
-                        print("\n" + "!"*60)
-                        print("⚠️  警告：检测到连续三个网站的数据完全相同！")
-                        print("这可能表示抓取出现了问题，程序将自动中断。")
-                        print("!"*60)
-                        break
+                    # 结果写入后再确认，避免中断时丢失该域名
+                    with timer.span(PHASE_QUEUE_UPDATE):
+                        url_queue.ack(current_url)
+                    timing_recorder.record(timer, OUTCOME_NO_DATA if timer.no_data else OUTCOME_SCRAPED)
                 else:
-                    print(f"✗ 抓取 {current_url} 数据失败，该URL将保留在列表中等待下次重试")
+                    with timer.span(PHASE_QUEUE_UPDATE):
+                        retry_at = url_queue.fail(current_url, timer.error or "抓取结果为空")
+                    print_retry_decision(current_url, retry_at, url_queue)
+                    timing_recorder.record(timer, OUTCOME_FAILED)
             
             end_time = time.time() # 记录结束时间
             total_time = end_time - start_time
@@ -620,10 +1097,24 @@ if __name__ == "__main__":
             print(f"所有抓取任务完成！")
             print(f"成功处理: {processed_count} 个网站")
             print(f"总耗时: {total_time:.2f} 秒 ({total_time/60:.2f} 分钟)")
+            if watchdog.recycle_count:
+                print(f"浏览器重启: {watchdog.recycle_count} 次，内存峰值 {watchdog.peak_rss_mb:.0f} MB")
             print(f"{'='*60}")
-        else:
+        elif WORKER_COUNT <= 1:
             print("浏览器初始化或登录失败，无法进行数据抓取。")
 
+        queue_counts = url_queue.counts()
+        print(f"队列状态: 待处理 {queue_counts['pending']}（其中等待重试 {url_queue.scheduled_retries()}），"
+              f"已完成 {queue_counts['done']}，失败 {queue_counts['failed']}")
+        failed_urls = url_queue.failed_urls()
+        for failed_url, attempts, last_error in failed_urls:
+            print(f"  ✗ {failed_url}（尝试 {attempts} 次）: {last_error}")
+        if failed_urls:
+            print(f"多次失败的域名已记录到死信文件: {url_queue.dead_letter_path}")
+        print(f"结果缓存: 命中 {result_cache.hits} 次（其中无数据 {result_cache.negative_hits} 次），未命中 {result_cache.misses} 次")
+        print(f"Cloudflare 检查: {CLOUDFLARE_WAIT_STATS['checks']} 次，遇到验证 {CLOUDFLARE_WAIT_STATS['challenged']} 次，"
+              f"超时 {CLOUDFLARE_WAIT_STATS['timeouts']} 次，累计等待 {CLOUDFLARE_WAIT_STATS['wait_seconds']:.1f} 秒")
+
     except KeyboardInterrupt:
         print("\n\n用户中断程序，正在保存进度并退出...")
     except Exception as e:
@@ -631,7 +1122,17 @@ if __name__ == "__main__":
         import traceback
         traceback.print_exc()
     finally:
-        if driver_instance:
+        timing_recorder.print_report()
+        if watchdog and watchdog.driver:
             print("\n脚本运行结束，浏览器将自动关闭。等待 5 秒...")
             time.sleep(5) # 缩短等待时间到5秒
+            watchdog.close()
+        elif driver_instance and watchdog is None:
             driver_instance.quit()
+        if url_queue:
+            url_queue.close()
+        if result_cache:
+            result_cache.close()
+        if sheets_write_through:
+            sheets_write_through.close()
+            print(f"Google Sheets 实时写入: 共写入 {sheets_write_through.rows_written} 行，API调用 {sheets_write_through.api_calls} 次")
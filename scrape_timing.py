@@ -0,0 +1,136 @@
+import json
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+# 每个域名一行的分阶段耗时日志（JSONL，追加写入，可跨多次运行汇总）
+TIMING_LOG_PATH = 'scrape_timing.jsonl'
+TIMING_REPORT_SLOWEST = 10  # 运行结束时列出最慢的多少个域名
+
+# 阶段名称（按一个域名的处理顺序）
+PHASE_CACHE = 'cache'  # 查询增量结果文件和结果缓存
+PHASE_RECYCLE = 'recycle'  # 浏览器健康检查触发的重启和重新登录
+PHASE_THROTTLE = 'throttle'  # 全局速率限制和请求间随机延时
+PHASE_NAVIGATE = 'navigate'  # driver.get 导航到数据页（fixed 模式含页面加载等待）
+PHASE_CHALLENGE_WAIT = 'challenge_wait'  # Cloudflare 验证检查
+PHASE_API_WAIT = 'api_wait'  # 等待页面数据接口响应（接口提取模式）
+PHASE_RENDER_WAIT = 'render_wait'  # 等待概览组件渲染完成
+PHASE_EXTRACT = 'extract'  # 一次页面脚本调用提取全部指标
+PHASE_PERSIST = 'persist'  # 写入结果文件、结果缓存和各个订阅者
+PHASE_QUEUE_UPDATE = 'queue_update'  # 在抓取队列中 ack / fail
+PHASES = [PHASE_CACHE, PHASE_RECYCLE, PHASE_THROTTLE, PHASE_NAVIGATE, PHASE_CHALLENGE_WAIT, PHASE_API_WAIT, PHASE_RENDER_WAIT,
+          PHASE_EXTRACT, PHASE_PERSIST, PHASE_QUEUE_UPDATE]
+
+# 域名的处理结果
+OUTCOME_SCRAPED = 'scraped'
+OUTCOME_NO_DATA = 'no_data'
+OUTCOME_CACHED = 'cached'
+OUTCOME_FAILED = 'failed'  # 抓取出错，已安排重试或移入死信
+OUTCOME_REQUEUED = 'requeued'  # 浏览器异常，结果不可信，计入尝试次数后按退避重新排期
+OUTCOME_DEFERRED = 'deferred'  # 之前没有数据的域名，推迟到队列末尾以低优先级复查
+
+
+def percentile(sorted_values, fraction):
+    """最近秩百分位数，sorted_values 必须已排序且非空"""
+    return sorted_values[max(0, math.ceil(fraction * len(sorted_values)) - 1)]
+
+
+class DomainTimer:
+    """
+    一个域名的分阶段计时：span(phase) 计时一段代码，同一阶段多次出现时累加
+    """
+
+    def __init__(self, url, worker='main'):
+        self.url = url
+        self.worker = worker
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.spans = {}
+        self.error = None  # 抓取出错时的错误信息，记录到日志并作为队列中的失败原因
+        self.no_data = False  # 页面明确显示没有该网站的数据
+
+    @contextmanager
+    def span(self, phase):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(phase, time.perf_counter() - start)
+
+    def add(self, phase, seconds):
+        self.spans[phase] = self.spans.get(phase, 0.0) + seconds
+
+    @property
+    def total(self):
+        return time.perf_counter() - self._start
+
+
+class TimingRecorder:
+    """
+    收集每个域名的分阶段耗时，写入 JSONL 日志，并在运行结束时输出各阶段的 p50 / p95 和最慢的域名
+    多个 worker 线程可以共用一个实例
+    """
+
+    def __init__(self, log_path=TIMING_LOG_PATH):
+        self.log_path = log_path
+        self._lock = threading.Lock()
+        self._entries = []
+
+    @property
+    def entries(self):
+        """本次运行已记录的全部条目（副本）"""
+        with self._lock:
+            return list(self._entries)
+
+    def start(self, url, worker='main'):
+        return DomainTimer(url, worker)
+
+    def record(self, timer, outcome):
+        """结束一个域名的计时并追加一行日志"""
+        entry = {
+            'url': timer.url,
+            'worker': timer.worker,
+            'started_at': round(timer.started_at, 3),
+            'outcome': outcome,
+            'total': round(timer.total, 3),
+            'spans': {phase: round(seconds, 3) for phase, seconds in timer.spans.items()},
+        }
+        if timer.error:
+            entry['error'] = timer.error
+        if timer.no_data:
+            entry['no_data'] = True
+        with self._lock:
+            self._entries.append(entry)
+            try:
+                with open(self.log_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            except Exception as e:
+                print(f"⚠️  写入耗时日志失败: {e}")
+        return entry
+
+    def print_report(self, slowest_count=TIMING_REPORT_SLOWEST):
+        """输出本次运行各阶段的耗时分布和最慢的域名"""
+        entries = self.entries
+        if not entries:
+            return
+
+        outcome_counts = {}
+        for entry in entries:
+            outcome_counts[entry['outcome']] = outcome_counts.get(entry['outcome'], 0) + 1
+        print(f"\n{'='*60}")
+        print(f"分阶段耗时（共 {len(entries)} 个域名: " +
+              "，".join(f"{outcome} {count}" for outcome, count in outcome_counts.items()) + f"，日志: {self.log_path}）")
+        print(f"{'阶段':<16}{'次数':>6}{'p50(秒)':>10}{'p95(秒)':>10}{'合计(秒)':>12}")
+        for phase in PHASES + sorted({phase for entry in entries for phase in entry['spans']} - set(PHASES)):
+            durations = sorted(entry['spans'][phase] for entry in entries if phase in entry['spans'])
+            if not durations:
+                continue
+            print(f"{phase:<16}{len(durations):>6}{percentile(durations, 0.5):>10.2f}"
+                  f"{percentile(durations, 0.95):>10.2f}{sum(durations):>12.1f}")
+
+        print(f"\n最慢的 {min(slowest_count, len(entries))} 个域名:")
+        for entry in sorted(entries, key=lambda item: item['total'], reverse=True)[:slowest_count]:
+            slowest_phase = max(entry['spans'].items(), key=lambda item: item[1], default=('-', 0.0))
+            print(f"  {entry['url']}: {entry['total']:.2f} 秒（{entry['outcome']}，最慢阶段 {slowest_phase[0]} {slowest_phase[1]:.2f} 秒）")
+        print(f"{'='*60}")
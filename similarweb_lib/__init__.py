@@ -0,0 +1,6 @@
+# Excel / Google Sheets 输出目标依赖 openpyxl / gspread，需要时再从 similarweb_lib.excel_sink / similarweb_lib.sheets_sink 导入
+from similarweb_lib.domains import extract_domain, DomainIndex
+from similarweb_lib.metrics import MetricRecord, convert_metric_value_to_number, parse_metric_array, parse_metric_value
+from similarweb_lib.records import METRIC_FIELDS, EXCEL_LAYOUT, SHEETS_LAYOUT, iter_results, load_results, record_to_row
+from similarweb_lib.sinks import ResultSink, push_to_sinks
+from similarweb_lib.history import HistoryStore, HistoryTable
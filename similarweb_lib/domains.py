@@ -0,0 +1,72 @@
+from urllib.parse import urlparse
+
+
+def extract_domain(url):
+    """
+    从URL中提取主域名，去除协议、www、路径、参数等
+    例如: https://www.example.com/path?param=value -> example.com
+    """
+    if not url:
+        return ""
+
+    url = url.strip().lower()
+
+    # 添加协议如果没有的话（用于urlparse解析）
+    if not url.startswith(('http://', 'https://')):
+        url = 'http://' + url
+
+    try:
+        parsed = urlparse(url)
+        domain = parsed.netloc if parsed.netloc else parsed.path.split('/')[0]
+    except ValueError:
+        # 如果解析失败，手动处理
+        url = url.replace('https://', '').replace('http://', '')
+        domain = url.split('/')[0].split('?')[0]
+
+    # 移除www前缀
+    if domain.startswith('www.'):
+        domain = domain[4:]
+
+    return domain
+
+
+class DomainIndex:
+    """
+    规范化域名 -> 抓取结果 的索引，每次运行只构建一次，表格每一行按域名O(1)查找
+    同一域名出现多条结果时保留最后一条（与 ResultStore 的 upsert 一致，结果文件中后写入的行更新），
+    较早的记录到 duplicates
+    查找不到的行记录到 unmatched
+    """
+
+    def __init__(self, json_data_dict):
+        self._records = {}  # 规范化域名 -> (原始URL, 数据字典)
+        self.duplicates = {}  # 规范化域名 -> [被较新记录覆盖的原始URL]
+        self.unmatched = []  # [(行号, 表格中的URL)]
+        for json_url, json_values in json_data_dict.items():
+            domain = extract_domain(json_url)
+            previous = self._records.pop(domain, None)
+            if previous is not None:
+                self.duplicates.setdefault(domain, []).append(previous[0])
+            self._records[domain] = (json_url, json_values)
+
+    def __len__(self):
+        return len(self._records)
+
+    def match(self, url, row=None):
+        """
+        按规范化域名查找抓取结果
+        返回: (原始URL, 数据字典)，找不到时返回 (None, None) 并记录到 unmatched
+        """
+        record = self._records.get(extract_domain(url))
+        if record is None:
+            self.unmatched.append((row, url))
+            return None, None
+        return record
+
+    def print_report(self):
+        """输出重复域名和未匹配行的统计"""
+        if self.duplicates:
+            print(f"⚠️  JSON数据中有 {len(self.duplicates)} 个域名存在重复记录（已使用最后一条）:")
+            for domain, ignored_urls in self.duplicates.items():
+                print(f"  - {domain}: 忽略 {', '.join(ignored_urls)}")
+        print(f"未匹配到数据的行: {len(self.unmatched)} 行")
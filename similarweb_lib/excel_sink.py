@@ -0,0 +1,153 @@
+import os
+import zipfile
+
+import openpyxl
+
+from similarweb_lib.records import EXCEL_LAYOUT, record_to_row
+from similarweb_lib.sinks import ResultSink
+from similarweb_lib.xlsx_patch import XlsxSheetPatch
+
+# 写入方式
+MODE_CELL = 'cell'  # 逐个单元格读写（原始实现，保留用于对比）
+MODE_BULK = 'bulk'  # 直接修改工作表XML：只改写匹配行的指标单元格，其余内容原样保留（无法安全修改时回退到 openpyxl）
+MODE_STREAM = 'stream'  # 只读模式流式读取 + 只写模式流式写出，内存占用与行数无关，但只保留单元格的值（不保留格式）
+
+
+class ExcelSink(ResultSink):
+    """
+    把抓取结果写入本地Excel文件（默认第一个工作表），调用 save 后才会落盘
+    """
+    name = 'Excel'
+
+    def __init__(self, excel_file_path, layout=EXCEL_LAYOUT, mode=MODE_BULK):
+        self.excel_file_path = excel_file_path
+        self.layout = layout
+        self.mode = mode
+        self.total_rows = 0
+        self._workbook = None
+        self._patch = None  # bulk 模式下的 XlsxSheetPatch，回退到 openpyxl 时为 None
+        self._stream_saved = False  # 只写模式的工作簿是否已写入临时文件
+
+    def apply(self, domain_index, update_time):
+        if self.mode == MODE_CELL:
+            return self._apply_by_cell(domain_index, update_time)
+        if self.mode == MODE_STREAM:
+            return self._apply_streaming(domain_index, update_time)
+        return self._apply_bulk(domain_index, update_time)
+
+    def _match_row(self, domain_index, row, excel_url, product_name, update_time):
+        """匹配一行，匹配成功时返回该行的指标值，否则返回 None"""
+        if not excel_url:
+            return None
+        matched_json_url, matched_data = domain_index.match(excel_url, row)
+        if not matched_data:
+            return None
+        print(f"✓ 行{row}: {product_name} ({excel_url} ← {matched_json_url}) - 已更新")
+        return record_to_row(matched_data, update_time)
+
+    def _apply_by_cell(self, domain_index, update_time):
+        self._workbook = openpyxl.load_workbook(self.excel_file_path)
+        ws = self._workbook.active
+        self.total_rows = ws.max_row - 1
+
+        matched_count = 0
+        for row in range(2, ws.max_row + 1):  # 从第2行开始（第1行是标题）
+            excel_url = ws.cell(row, self.layout.url).value
+            product_name = ws.cell(row, self.layout.product_name).value
+            row_values = self._match_row(domain_index, row, excel_url, product_name, update_time)
+            if row_values is None:
+                continue
+            for offset, value in enumerate(row_values):
+                ws.cell(row, self.layout.first_metric + offset).value = value
+            matched_count += 1
+
+        return matched_count
+
+    def _apply_bulk(self, domain_index, update_time):
+        # 一次遍历只读取产品名称和URL两列的值
+        columns = (self.layout.url, self.layout.product_name)
+        try:
+            self._patch = XlsxSheetPatch(self.excel_file_path)
+            rows = [(row, values.get(self.layout.url), values.get(self.layout.product_name))
+                    for row, values in self._patch.read_rows(columns) if row > 1]
+            total_rows = self._patch.max_cell_row - 1  # 与 openpyxl 的 max_row 一致（只有格式、没有值的单元格也计入）
+        except (ValueError, KeyError, IndexError, zipfile.BadZipFile) as e:
+            print(f"⚠️  无法直接修改工作表XML（{e}），改用 openpyxl 读写")
+            self._patch = None
+            self._workbook = openpyxl.load_workbook(self.excel_file_path)
+            rows = [(row, values[self.layout.url - 1], values[self.layout.product_name - 1])
+                    for row, values in enumerate(
+                        self._workbook.active.iter_rows(min_row=2, max_col=max(columns), values_only=True), start=2)]
+            total_rows = len(rows)
+        self.total_rows = total_rows
+
+        updates = {}
+        for row, excel_url, product_name in rows:
+            row_values = self._match_row(domain_index, row, excel_url, product_name, update_time)
+            if row_values is not None:
+                updates[row] = row_values
+
+        # 只对匹配的行批量写入
+        if self._patch is not None:
+            try:
+                for row, row_values in updates.items():
+                    self._patch.set_row(row, self.layout.first_metric, row_values)
+            except ValueError as e:
+                print(f"⚠️  无法直接修改工作表XML（{e}），改用 openpyxl 写入")
+                self._patch = None
+        if self._patch is None:
+            if self._workbook is None:
+                self._workbook = openpyxl.load_workbook(self.excel_file_path)
+            ws = self._workbook.active
+            for row, row_values in updates.items():
+                for offset, value in enumerate(row_values):
+                    ws.cell(row=row, column=self.layout.first_metric + offset, value=value)
+
+        return len(updates)
+
+    def _apply_streaming(self, domain_index, update_time):
+        source = openpyxl.load_workbook(self.excel_file_path, read_only=True)
+        self._workbook = openpyxl.Workbook(write_only=True)
+        first_offset = self.layout.first_metric - 1
+        matched_count = 0
+        try:
+            active_title = source.active.title
+            for source_ws in source.worksheets:
+                target_ws = self._workbook.create_sheet(title=source_ws.title)
+                is_active = source_ws.title == active_title
+                for row, values in enumerate(source_ws.iter_rows(values_only=True), start=1):
+                    values = list(values)
+                    if is_active and row > 1:
+                        self.total_rows += 1
+                        url = values[self.layout.url - 1] if len(values) >= self.layout.url else None
+                        product_name = values[self.layout.product_name - 1] if len(values) >= self.layout.product_name else None
+                        row_values = self._match_row(domain_index, row, url, product_name, update_time)
+                        if row_values is not None:
+                            if len(values) < first_offset + len(row_values):
+                                values.extend([None] * (first_offset + len(row_values) - len(values)))
+                            values[first_offset:first_offset + len(row_values)] = row_values
+                            matched_count += 1
+                    target_ws.append(values)
+        finally:
+            source.close()
+        return matched_count
+
+    def save(self):
+        """保存Excel文件；文件被占用时抛出 PermissionError，由调用方决定是否重试"""
+        if self._patch is not None:
+            self._patch.save()
+            return
+        if self._workbook is None:
+            return
+        if self.mode == MODE_STREAM:
+            # 只写模式的工作簿只能保存一次：先写临时文件，再原子替换原文件
+            temp_path = self.excel_file_path + '.tmp.xlsx'
+            if not self._stream_saved:
+                self._workbook.save(temp_path)
+                self._stream_saved = True
+            os.replace(temp_path, self.excel_file_path)
+        else:
+            self._workbook.save(self.excel_file_path)
+
+    def close(self):
+        self.save()
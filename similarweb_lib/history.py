@@ -0,0 +1,228 @@
+import json
+import math
+import os
+import threading
+import time
+from array import array
+
+from similarweb_lib.domains import extract_domain
+from similarweb_lib.metrics import MetricRecord
+from similarweb_lib.records import iter_results
+
+# 历史数据目录：每列一个只追加的二进制文件（小端、定长），可直接用 numpy.fromfile 按 dtype 读取
+HISTORY_DIR = 'history'
+SCRAPED_AT_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# 列名 -> array 类型码（'i' 为 int32 字典编码，'d' 为 float64，缺失值为 NaN）
+KEY_COLUMNS = [('domain', 'i'), ('period', 'i'), ('scrape_time', 'd')]
+METRIC_COLUMNS = [(name, 'd') for name in MetricRecord.__slots__]
+COLUMNS = KEY_COLUMNS + METRIC_COLUMNS
+
+NAN = float('nan')
+
+
+def _to_column_value(value):
+    return NAN if value is None else float(value)
+
+
+def _from_column_value(value):
+    return None if math.isnan(value) else value
+
+
+class HistoryTable:
+    """
+    历史数据的内存列存视图：columns 为 {列名: array}，domain / period 列是指向 domains / periods 的编号
+    """
+
+    def __init__(self, columns, domains, periods):
+        self.columns = columns
+        self.domains = domains
+        self.periods = periods
+        self.row_count = len(columns['domain'])
+
+    def column(self, name):
+        return self.columns[name]
+
+    def latest_rows(self, period=None):
+        """
+        每个 (域名, 统计周期) 取抓取时间最新的一行
+        返回: {(域名编号, 周期编号): 行号}
+        """
+        period_code = self.periods.index(period) if period is not None and period in self.periods else None
+        if period is not None and period_code is None:
+            return {}
+
+        domain_column = self.columns['domain']
+        period_column = self.columns['period']
+        time_column = self.columns['scrape_time']
+        latest = {}
+        for row in range(self.row_count):
+            if period_code is not None and period_column[row] != period_code:
+                continue
+            key = (domain_column[row], period_column[row])
+            current = latest.get(key)
+            if current is None or time_column[row] >= time_column[current]:
+                latest[key] = row
+        return latest
+
+    def metric_by_domain(self, metric, period):
+        """
+        某个统计周期内每个域名最新的指标值
+        返回: {域名: 值}（缺失值不返回）
+        """
+        values = self.columns[metric]
+        result = {}
+        for (domain_code, _), row in self.latest_rows(period).items():
+            value = values[row]
+            if not math.isnan(value):
+                result[self.domains[domain_code]] = value
+        return result
+
+    def growth(self, previous_period, current_period, metric='visits'):
+        """
+        所有域名在两个统计周期之间的环比增长率，例如月访问量增长
+        返回: {域名: (当前值 - 上期值) / 上期值}（任一期缺失或上期为0的域名不返回）
+        """
+        previous = self.metric_by_domain(metric, previous_period)
+        current = self.metric_by_domain(metric, current_period)
+        return {
+            domain: (value - previous[domain]) / previous[domain]
+            for domain, value in current.items()
+            if previous.get(domain)
+        }
+
+    def record(self, row):
+        """把一行还原为 MetricRecord"""
+        return MetricRecord(**{name: _from_column_value(self.columns[name][row]) for name, _ in METRIC_COLUMNS})
+
+    def export_jsonl(self, output_file_path, period):
+        """
+        把某个统计周期内每个域名的最新数据导出为 similarweb_data.txt 的JSONL格式，供导入脚本使用
+        返回: 导出的行数
+        """
+        latest = self.latest_rows(period)
+        with open(output_file_path, 'w', encoding='utf-8') as f:
+            for (domain_code, _), row in sorted(latest.items(), key=lambda item: item[1]):
+                values = self.record(row).to_dict()
+                values['scraped_at'] = time.strftime(SCRAPED_AT_FORMAT, time.localtime(self.columns['scrape_time'][row]))
+                json.dump({self.domains[domain_code]: values}, f, ensure_ascii=False)
+                f.write('\n')
+        return len(latest)
+
+
+class HistoryStore:
+    """
+    列式存储的抓取历史：每行是一次 (域名, 统计周期, 抓取时间) 的全部指标
+    只追加写入；域名和统计周期做字典编码，指标列为 float64
+    中断时各列长度可能不一致，读取时按最短的列截断，未写完的行被丢弃
+    """
+
+    def __init__(self, directory=HISTORY_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._domains = self._load_dictionary('domains.txt')
+        self._periods = self._load_dictionary('periods.txt')
+        self._domain_codes = {domain: code for code, domain in enumerate(self._domains)}
+        self._period_codes = {period: code for code, period in enumerate(self._periods)}
+
+        # 每个 (域名, 周期) 最近写入的抓取时间，用于跳过重复写入（例如缓存命中的同一条结果）
+        table = self.load()
+        self._last_scrape_time = {}
+        for (domain_code, period_code), row in table.latest_rows().items():
+            self._last_scrape_time[(domain_code, period_code)] = table.columns['scrape_time'][row]
+        self._repair(table.row_count)
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _load_dictionary(self, name):
+        if not os.path.exists(self._path(name)):
+            return []
+        with open(self._path(name), 'r', encoding='utf-8') as f:
+            return [line.rstrip('\n') for line in f if line.strip()]
+
+    def _column_path(self, name, typecode):
+        return self._path(f'{name}.{"i32" if typecode == "i" else "f64"}')
+
+    def _repair(self, row_count):
+        """把比行数更长的列截断到行数（中断写入留下的半行）"""
+        for name, typecode in COLUMNS:
+            path = self._column_path(name, typecode)
+            expected_size = row_count * array(typecode).itemsize
+            if os.path.exists(path) and os.path.getsize(path) > expected_size:
+                with open(path, 'r+b') as f:
+                    f.truncate(expected_size)
+
+    def _code(self, value, codes, values, dictionary_name):
+        code = codes.get(value)
+        if code is None:
+            code = len(values)
+            values.append(value)
+            codes[value] = code
+            with open(self._path(dictionary_name), 'a', encoding='utf-8') as f:
+                f.write(value + '\n')
+        return code
+
+    def append(self, url, period, record, scrape_time=None):
+        """
+        追加一行；同一 (域名, 周期) 的抓取时间与最近一行相同时不重复写入
+        返回: True 表示已写入
+        """
+        scrape_time = time.time() if scrape_time is None else scrape_time
+        with self._lock:
+            domain_code = self._code(extract_domain(url), self._domain_codes, self._domains, 'domains.txt')
+            period_code = self._code(period, self._period_codes, self._periods, 'periods.txt')
+            if self._last_scrape_time.get((domain_code, period_code)) == scrape_time:
+                return False
+
+            row = {'domain': domain_code, 'period': period_code, 'scrape_time': scrape_time}
+            for name, _ in METRIC_COLUMNS:
+                row[name] = _to_column_value(getattr(record, name))
+            for name, typecode in COLUMNS:
+                with open(self._column_path(name, typecode), 'ab') as f:
+                    array(typecode, [row[name]]).tofile(f)
+            self._last_scrape_time[(domain_code, period_code)] = scrape_time
+            return True
+
+    def append_result(self, url, period, values):
+        """
+        追加一条 similarweb_data.txt 格式的结果（抓取时间取自 scraped_at 字段）
+        可直接作为 ResultStore.subscribe 的回调
+        """
+        scrape_time = None
+        if values.get('scraped_at'):
+            scrape_time = time.mktime(time.strptime(values['scraped_at'], SCRAPED_AT_FORMAT))
+        return self.append(url, period, MetricRecord.from_dict(values), scrape_time)
+
+    def import_jsonl(self, txt_file_path, period):
+        """
+        把已有的 similarweb_data.txt 导入历史（没有 scraped_at 的旧记录使用文件修改时间）
+        返回: 写入的行数
+        """
+        file_time = time.strftime(SCRAPED_AT_FORMAT, time.localtime(os.path.getmtime(txt_file_path)))
+        appended = 0
+        for url, values in iter_results(txt_file_path):
+            if not values.get('scraped_at'):
+                values = dict(values, scraped_at=file_time)
+            appended += self.append_result(url, period, values)
+        return appended
+
+    def load(self):
+        """
+        一次性读取全部列（每列一次 fromfile，不做逐行解析）
+        返回: HistoryTable
+        """
+        columns = {}
+        for name, typecode in COLUMNS:
+            column = array(typecode)
+            path = self._column_path(name, typecode)
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    column.frombytes(f.read())
+            columns[name] = column
+
+        row_count = min(len(column) for column in columns.values())
+        for name in columns:
+            del columns[name][row_count:]
+        return HistoryTable(columns, list(self._domains), list(self._periods))
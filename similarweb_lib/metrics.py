@@ -0,0 +1,229 @@
+import math
+from array import array
+
+# 文本中表示缺失的标记
+MISSING_TEXT = "N/A"
+
+# 数量单位后缀对应的倍数（与 convert_metric_value_to_number 一致）
+SUFFIX_MULTIPLIERS = {'M': 1_000_000.0, 'K': 1_000.0, '亿': 100_000_000.0, '万': 10_000.0, '千': 1_000.0}
+
+
+def convert_metric_value_to_number(value_str):
+    """
+    将MetricValue字符串（如"224.8M", "123K", "1,234", "1.2万", "3亿"）转换为数字。
+    无法转换的文本（如 "< 5K"、"M"、"1.2.3K"）返回 None。
+    """
+    if value_str is None or (isinstance(value_str, str) and value_str.strip().upper() == "N/A"):
+        return 0.0 # 根据要求，如果为N/A或None，返回0.0
+
+    value_str = value_str.strip().replace(',', '') # 移除千位分隔符
+
+    try:
+        multiplier = SUFFIX_MULTIPLIERS.get(value_str[-1:])
+        if multiplier is not None:
+            return float(value_str[:-1]) * multiplier
+        # 处理百分比（去除百分号后转换）
+        if value_str.endswith('%'):
+            return float(value_str[:-1])
+        return float(value_str)
+    except ValueError:
+        return None
+
+
+def parse_metric_array(values):
+    """
+    批量解析原始指标值（字符串或数字），一次遍历得到 float64 数组和有效性掩码（纯 Python 循环，不依赖 numpy；
+    省去逐个值的函数调用和类型判断，结果与逐个调用 parse_metric_value 完全相同）：
+    "224.8M" / "1,234" / "1.2万" -> 数值，"58.97%" -> 0.5897（同 parse_fraction），"03:34" / "00:03:34" -> 214.0（同 parse_seconds）
+    缺失（None / "N/A" / 空串）、无法解析或非有限（nan / inf）的值在结果中为 NaN，掩码为 0（与 parse_number 等标量函数返回 None 的情况一致）
+    返回: (array('d') 数值, array('b') 掩码，1 表示有效)
+    """
+    numbers = []
+    valid = []
+    append_number = numbers.append
+    append_valid = valid.append
+    multipliers = SUFFIX_MULTIPLIERS
+    isfinite = math.isfinite
+    for value in values:
+        number = None
+        if value.__class__ is str:
+            # 按最后一个字符分派，只调用内置的 float()，不用逐个 if/elif 判断单位
+            text = value.strip()
+            if ',' in text:
+                text = text.replace(',', '')
+            try:
+                if ':' in text:
+                    number = 0.0
+                    for part in text.split(':'):
+                        number = number * 60 + float(part)
+                elif text.endswith('%'):
+                    number = float(text[:-1]) / 100
+                else:
+                    multiplier = multipliers.get(text[-1:])
+                    number = float(text) if multiplier is None else float(text[:-1]) * multiplier
+            except ValueError:
+                number = None
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            number = float(value)
+
+        if number is not None and isfinite(number):
+            append_number(number)
+            append_valid(1)
+        else:
+            append_number(math.nan)
+            append_valid(0)
+    return array('d', numbers), array('b', valid)
+
+
+def _is_missing_text(value):
+    return value is None or (isinstance(value, str) and value.strip().upper() in ("", MISSING_TEXT))
+
+
+def _finite_or_none(number):
+    return number if number is not None and math.isfinite(number) else None
+
+
+def parse_fraction(value):
+    """"58.97%" -> 0.5897；缺失、无法解析或非有限时返回 None"""
+    if _is_missing_text(value) or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return _finite_or_none(float(value) / 100)
+    text = value.strip().replace(',', '')
+    if text.endswith('%'):
+        text = text[:-1]
+    try:
+        return _finite_or_none(float(text) / 100)
+    except ValueError:
+        return None
+
+
+def parse_seconds(value):
+    """"00:03:34" / "03:34" -> 214.0；缺失、无法解析或非有限时返回 None"""
+    if _is_missing_text(value) or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return _finite_or_none(float(value))
+    seconds = 0.0
+    try:
+        for part in value.strip().replace(',', '').split(':'):
+            seconds = seconds * 60 + float(part)
+    except ValueError:
+        return None
+    return _finite_or_none(seconds)
+
+
+def parse_number(value):
+    """"224.8M" / "1.2万" / 12830.0 -> 浮点数；缺失、无法解析或非有限时返回 None"""
+    if _is_missing_text(value) or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        number = float(value)
+    else:
+        number = convert_metric_value_to_number(value)
+    return _finite_or_none(number)
+
+
+def parse_metric_value(value):
+    """
+    解析单个原始指标值，规则与 parse_metric_array 相同：含 ':' 的按时长（parse_seconds），
+    以 '%' 结尾的按占比（parse_fraction），其余按数量（parse_number）
+    返回: 浮点数，缺失、无法解析或非有限时返回 None（对应 parse_metric_array 中掩码为 0）
+    """
+    if isinstance(value, str):
+        text = value.strip().replace(',', '')
+        if ':' in text:
+            return parse_seconds(text)
+        if text.endswith('%'):
+            return parse_fraction(text)
+    return parse_number(value)
+
+
+def format_percent(fraction):
+    if fraction is None:
+        return MISSING_TEXT
+    return f"{fraction * 100:.2f}%"
+
+
+def format_duration(seconds):
+    if seconds is None:
+        return MISSING_TEXT
+    total_seconds = int(round(seconds))
+    return f"{total_seconds // 3600:02d}:{total_seconds % 3600 // 60:02d}:{total_seconds % 60:02d}"
+
+
+class MetricRecord:
+    """
+    一个网站的概览指标（数值化）：
+    占比和跳出率为 0~1 的小数，访问时长为秒，其余为浮点数，None 表示缺失
+    to_dict / from_dict 是抓取程序、Excel导入和 Google Sheets 导入共用的唯一序列化格式
+    （即 similarweb_data.txt 中每行的格式：百分比写成 "58.97%"，时长写成 "00:03:34"，缺失写成 "N/A" 或 0.0）
+    """
+    __slots__ = ('desktop_share', 'mobile_share', 'visits', 'visits_per_visitor',
+                 'users_tab', 'pages_per_visit', 'avg_visit_duration', 'bounce_rate')
+
+    def __init__(self, desktop_share=None, mobile_share=None, visits=None, visits_per_visitor=None,
+                 users_tab=None, pages_per_visit=None, avg_visit_duration=None, bounce_rate=None):
+        self.desktop_share = desktop_share
+        self.mobile_share = mobile_share
+        self.visits = visits
+        self.visits_per_visitor = visits_per_visitor
+        self.users_tab = users_tab
+        self.pages_per_visit = pages_per_visit
+        self.avg_visit_duration = avg_visit_duration
+        self.bounce_rate = bounce_rate
+
+    @classmethod
+    def missing(cls):
+        """所有指标都缺失的记录（页面无数据或抓取失败）"""
+        return cls()
+
+    @property
+    def has_data(self):
+        return self.desktop_share is not None and self.mobile_share is not None
+
+    def __eq__(self, other):
+        if not isinstance(other, MetricRecord):
+            return NotImplemented
+        return all(_same_value(getattr(self, name), getattr(other, name)) for name in self.__slots__)
+
+    def __repr__(self):
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)
+        return f'MetricRecord({fields})'
+
+    @classmethod
+    def from_dict(cls, values):
+        """从 similarweb_data.txt 的一行数据（字典）解析"""
+        return cls(
+            desktop_share=parse_fraction(values.get('desktopPersent')),
+            mobile_share=parse_fraction(values.get('mobilePercent')),
+            visits=parse_number(values.get('visits')),
+            visits_per_visitor=parse_number(values.get('visits_per_visitor')),
+            users_tab=parse_number(values.get('users_tab')),
+            pages_per_visit=parse_number(values.get('pages-per-visit')),
+            avg_visit_duration=parse_seconds(values.get('avg_visit_duration')),
+            bounce_rate=parse_fraction(values.get('bounce_rate')),
+        )
+
+    def to_dict(self):
+        """序列化为 similarweb_data.txt 中的字典格式"""
+        return {
+            "desktopPersent": format_percent(self.desktop_share),
+            "mobilePercent": format_percent(self.mobile_share),
+            "visits": _number_or_zero(self.visits),
+            "visits_per_visitor": _number_or_zero(self.visits_per_visitor),
+            "users_tab": _number_or_zero(self.users_tab),
+            "pages-per-visit": _number_or_zero(self.pages_per_visit),
+            "avg_visit_duration": format_duration(self.avg_visit_duration),
+            "bounce_rate": format_percent(self.bounce_rate),
+        }
+
+
+def _number_or_zero(value):
+    return 0.0 if value is None else value
+
+
+def _same_value(a, b):
+    if a is None or b is None:
+        return a is b
+    return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9)
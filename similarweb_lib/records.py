@@ -0,0 +1,77 @@
+import json
+from collections import namedtuple
+
+from similarweb_lib.metrics import MetricRecord
+
+# 抓取结果中的指标字段及缺失时的默认值，顺序即写入表格的列顺序
+METRIC_FIELDS = [
+    ('desktopPersent', 'N/A'),  # 桌面端占比
+    ('mobilePercent', 'N/A'),  # 移动端占比
+    ('visits', 0),  # 每月访问量
+    ('visits_per_visitor', 0),  # 每访客访问次数
+    ('users_tab', 0),  # 已消除重叠的受众
+    ('pages-per-visit', 0),  # 页面数/访问
+    ('avg_visit_duration', 'N/A'),  # 访问持续时间
+    ('bounce_rate', 'N/A'),  # 跳出率
+]
+
+# 表格列布局（列号从1开始）：指标列从 first_metric 开始连续排列，最后一列是更新时间
+ColumnLayout = namedtuple('ColumnLayout', ['product_name', 'url', 'first_metric'])
+
+EXCEL_LAYOUT = ColumnLayout(product_name=1, url=2, first_metric=3)  # A产品名称 B官网链接 C-J指标 K更新时间
+SHEETS_LAYOUT = ColumnLayout(product_name=1, url=3, first_metric=4)  # A产品名称 B入库id C官网链接 D-K指标 L数据抓取时间
+
+
+def update_time_column(layout):
+    """更新时间所在的列号"""
+    return layout.first_metric + len(METRIC_FIELDS)
+
+
+def column_letter(column):
+    """列号（从1开始）转换为A1标记法中的列字母，例如 4 -> D"""
+    letters = ''
+    while column > 0:
+        column, remainder = divmod(column - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return letters
+
+
+def column_index(letters):
+    """A1标记法中的列字母转换为列号（从1开始），例如 D -> 4"""
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - ord('A') + 1
+    return index
+
+
+def iter_results(txt_file_path):
+    """
+    流式读取 similarweb_data.txt，逐行产出 (原始URL, 数据字典)，不把整个文件读入内存
+    """
+    with open(txt_file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                data = json.loads(line)
+                url = next(iter(data))
+                yield url, data[url]
+
+
+def load_results(txt_file_path):
+    """
+    读取全部抓取结果
+    返回: {原始URL: 数据字典}，同一URL出现多次时以最后一行为准，字典顺序与最后一次写入的顺序一致
+    """
+    results = {}
+    for url, values in iter_results(txt_file_path):
+        results.pop(url, None)
+        results[url] = values
+    return results
+
+
+def record_to_row(values, update_time):
+    """
+    将一条抓取结果转换为表格中一行的指标值（按 METRIC_FIELDS 顺序，最后追加更新时间）
+    先经过 MetricRecord 规范化，保证写入表格的格式与抓取程序输出的格式一致
+    """
+    serialized = MetricRecord.from_dict(values).to_dict()
+    return [serialized[field] for field, _ in METRIC_FIELDS] + [update_time]
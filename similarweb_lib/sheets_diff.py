@@ -0,0 +1,64 @@
+from similarweb_lib.records import column_letter
+
+
+def normalize_cell_value(value):
+    """
+    把单元格的值规范化后再比较，避免格式差异被当成数据变化
+    例如 "58.97%" 与 58.97、12830.0 与 "12830"、"12,830" 与 12830 都视为相同
+    返回: ('num', 数值) 或 ('str', 字符串)
+    """
+    if value is None:
+        return ('str', '')
+    if isinstance(value, bool):
+        return ('str', str(value).upper())
+    if isinstance(value, (int, float)):
+        return ('num', round(float(value), 6))
+
+    text = str(value).strip()
+    number_text = text.replace(',', '')
+    if number_text.endswith('%'):
+        number_text = number_text[:-1].strip()
+    try:
+        return ('num', round(float(number_text), 6))
+    except ValueError:
+        return ('str', text)
+
+
+def changed_offsets(old_cells, new_values):
+    """
+    比较表格中已有的一行与新值（按位置一一对应）
+    返回: 值发生变化的位置列表
+    """
+    changed = []
+    for offset, new_value in enumerate(new_values):
+        old_value = old_cells[offset] if offset < len(old_cells) else ''
+        if normalize_cell_value(old_value) != normalize_cell_value(new_value):
+            changed.append(offset)
+    return changed
+
+
+def changed_cell_blocks(row_index, first_column, row_values, offsets):
+    """
+    把一行中需要写入的位置合并为连续的单元格区块
+    first_column 为 row_values[0] 所在的列号（从1开始）
+    返回: [{'range': 'E5:F5', 'values': [[...]]}]
+    """
+    blocks = []
+    span = []
+    for offset in sorted(offsets):
+        if span and offset != span[-1] + 1:
+            blocks.append(_span_block(row_index, first_column, row_values, span))
+            span = []
+        span.append(offset)
+    if span:
+        blocks.append(_span_block(row_index, first_column, row_values, span))
+    return blocks
+
+
+def _span_block(row_index, first_column, row_values, span):
+    start_column = column_letter(first_column + span[0])
+    end_column = column_letter(first_column + span[-1])
+    return {
+        'range': f'{start_column}{row_index}:{end_column}{row_index}',
+        'values': [[row_values[offset] for offset in span]]
+    }
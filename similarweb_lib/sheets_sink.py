@@ -0,0 +1,190 @@
+import threading
+import time
+
+import gspread
+from google.oauth2.service_account import Credentials
+
+from result_store import SCRAPED_AT_FIELD
+from similarweb_lib.domains import extract_domain
+from similarweb_lib.records import METRIC_FIELDS, SHEETS_LAYOUT, record_to_row, update_time_column
+from similarweb_lib.sheets_diff import changed_cell_blocks, changed_offsets
+from similarweb_lib.sheets_updates import MAX_PAYLOAD_BYTES, SheetsUpdateEngine
+from similarweb_lib.sinks import ResultSink
+
+SCOPES = [
+    'https://www.googleapis.com/auth/spreadsheets',
+    'https://www.googleapis.com/auth/drive'
+]
+
+
+def open_worksheet(credentials_file, sheet_name, worksheet_index):
+    """
+    使用服务账号凭证打开指定表格中的工作表
+    """
+    creds = Credentials.from_service_account_file(credentials_file, scopes=SCOPES)
+    gc = gspread.authorize(creds)
+    sheet = gc.open(sheet_name)
+    return sheet.get_worksheet(worksheet_index)
+
+
+class SheetsSink(ResultSink):
+    """
+    把抓取结果写入 Google Sheets 工作表：一次读取全部数据完成匹配，
+    再由 SheetsUpdateEngine 合并连续行、按请求体大小切分后提交
+    diff_only=True 时只写入值真正变化的单元格，更新时间列也只在有变化的行上刷新；
+    dry_run=True 时只输出差异摘要，不提交任何更新
+    """
+    name = 'Google Sheets'
+
+    def __init__(self, worksheet, layout=SHEETS_LAYOUT, max_payload_bytes=MAX_PAYLOAD_BYTES, diff_only=False, dry_run=False):
+        self.worksheet = worksheet
+        self.layout = layout
+        self.diff_only = diff_only
+        self.dry_run = dry_run
+        self.engine = SheetsUpdateEngine(worksheet, layout.first_metric, update_time_column(layout), max_payload_bytes=max_payload_bytes)
+        self.failed_rows = set()
+        self.unchanged_rows = 0
+        self.changed_cells = 0
+
+    def apply(self, domain_index, update_time):
+        all_data = self.worksheet.get_all_values()
+        print(f"✓ 读取了 {len(all_data)} 行数据")
+
+        url_index = self.layout.url - 1  # 列表索引从0开始
+        name_index = self.layout.product_name - 1
+        metric_index = self.layout.first_metric - 1
+        update_time_offset = len(METRIC_FIELDS)
+
+        row_values = {}
+        changed_blocks = []
+        for row_index, row_data in enumerate(all_data[1:], start=2):  # 从第2行开始（跳过标题）
+            if len(row_data) <= url_index or not row_data[url_index]:
+                continue
+
+            matched_json_url, matched_data = domain_index.match(row_data[url_index], row_index)
+            if not matched_data:
+                continue
+
+            new_values = record_to_row(matched_data, update_time)
+            product_name = row_data[name_index] if name_index < len(row_data) else "未知"
+
+            if self.diff_only:
+                old_cells = row_data[metric_index:metric_index + update_time_offset]
+                offsets = changed_offsets(old_cells, new_values[:update_time_offset])
+                if not offsets:
+                    self.unchanged_rows += 1
+                    continue
+                self.changed_cells += len(offsets)
+                if self.dry_run:
+                    for offset in offsets:
+                        old_value = old_cells[offset] if offset < len(old_cells) else ''
+                        print(f"  行{row_index} {product_name} {METRIC_FIELDS[offset][0]}: {old_value!r} → {new_values[offset]!r}")
+                # 有变化的行同时刷新更新时间列
+                changed_blocks.extend(changed_cell_blocks(row_index, self.layout.first_metric, new_values, offsets + [update_time_offset]))
+
+            row_values[row_index] = new_values
+            print(f"✓ 行{row_index}: {product_name} ({matched_json_url}) - 准备更新")
+
+        if self.diff_only:
+            print(f"\n差异摘要: {len(row_values)} 行有变化（共 {self.changed_cells} 个单元格），{self.unchanged_rows} 行无变化")
+
+        if self.dry_run:
+            print("（dry-run 模式，未提交任何更新）")
+        elif self.diff_only and changed_blocks:
+            print(f"\n开始更新变化的单元格到Google Sheets（共 {len(row_values)} 行）...")
+            self.failed_rows = self.engine.update_blocks(changed_blocks)
+        elif not self.diff_only and row_values:
+            print(f"\n开始批量更新到Google Sheets（共 {len(row_values)} 行）...")
+            self.failed_rows = self.engine.update_rows(row_values)
+        return len(row_values)
+
+
+class SheetsWriteThrough:
+    """
+    抓取过程中把结果实时写入 Google Sheets：启动时只读取一次工作表建立 域名 -> 行号 映射，
+    结果先缓存在内存中，由后台线程在累计 flush_size 行或距上次提交超过 flush_interval 秒时按行批量提交
+    add 只写入缓存、不访问网络（它在 ResultStore.put 的回调中、worker 池的文件锁内执行），
+    Sheets 返回 429 时的退避等待只阻塞后台线程，不会阻塞抓取 worker
+    """
+
+    def __init__(self, worksheet, layout=SHEETS_LAYOUT, flush_size=20, flush_interval=60):
+        self.worksheet = worksheet
+        self.layout = layout
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.rows_written = 0
+        self.engine = SheetsUpdateEngine(worksheet, layout.first_metric, update_time_column(layout))
+        self._lock = threading.Lock()  # 保护缓存
+        self._flush_lock = threading.Lock()  # 同一时间只有一次提交（引擎的统计计数不是线程安全的）
+        self._buffer = {}  # 行号 -> 该行的指标值
+        self._wake = threading.Event()  # 缓存达到 flush_size 或关闭时唤醒后台线程
+        self._closed = False
+
+        url_index = layout.url - 1
+        self._rows_by_domain = {}  # 规范化域名 -> [行号]（同一官网可能对应多个产品行）
+        for row_index, row_data in enumerate(worksheet.get_all_values()[1:], start=2):
+            if len(row_data) > url_index and row_data[url_index]:
+                self._rows_by_domain.setdefault(extract_domain(row_data[url_index]), []).append(row_index)
+
+        self._thread = threading.Thread(target=self._flush_loop, name='sheets-write-through', daemon=True)
+        self._thread.start()
+
+    @property
+    def api_calls(self):
+        return self.engine.api_calls
+
+    def add(self, url, values):
+        """
+        缓存一个域名的结果（更新时间列使用结果中的抓取时间），达到 flush_size 行时通知后台线程提交
+        返回: 该域名在工作表中对应的行数
+        """
+        rows = self._rows_by_domain.get(extract_domain(url), [])
+        with self._lock:
+            for row_index in rows:
+                self._buffer[row_index] = record_to_row(values, values.get(SCRAPED_AT_FIELD, ''))
+            buffered = len(self._buffer)
+        if buffered >= self.flush_size:
+            self._wake.set()
+        return len(rows)
+
+    def _flush_loop(self):
+        """后台线程：被唤醒（缓存已满）或每隔 flush_interval 秒提交一次，直到 close"""
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if self._closed:
+                return
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"❌ 实时写入 Google Sheets 时出错: {e}，将在下次提交时重试")
+
+    def flush(self):
+        """把缓存中的行一次性提交到工作表，提交失败的行保留到下次再提交"""
+        with self._flush_lock:
+            with self._lock:
+                if not self._buffer:
+                    return
+                pending = self._buffer
+                self._buffer = {}
+
+            failed_rows = set(pending)  # 提交过程中出现异常时全部放回缓存
+            try:
+                failed_rows = self.engine.update_rows(pending)
+            finally:
+                # 提交失败的行放回缓存（缓存中已有同一行的新结果时保留新结果）
+                with self._lock:
+                    for row_index in failed_rows:
+                        self._buffer.setdefault(row_index, pending[row_index])
+            self.rows_written += len(pending) - len(failed_rows)
+            if failed_rows:
+                print(f"❌ 实时写入 Google Sheets 有 {len(failed_rows)} 行失败，将在下次提交时重试")
+            else:
+                print(f"✓ 已实时写入 Google Sheets: {len(pending)} 行")
+
+    def close(self):
+        """停止后台线程（等待正在进行的提交完成），再提交剩余的行"""
+        self._closed = True
+        self._wake.set()
+        self._thread.join()
+        self.flush()
@@ -0,0 +1,171 @@
+import json
+import random
+import re
+import time
+
+from similarweb_lib.records import column_letter
+
+MAX_PAYLOAD_BYTES = 1_000_000  # 单次 values_batch_update 请求体的上限（字节）
+MAX_RETRIES = 5  # 429 / 5xx 错误的最大重试次数
+BASE_RETRY_DELAY = 1.0  # 指数退避的初始等待时间（秒）
+MAX_RETRY_DELAY = 64.0  # 单次退避的最长等待时间（秒）
+
+BLOCK_RANGE_PATTERN = re.compile(r'^([A-Z]+)(\d+):([A-Z]+)(\d+)$')
+
+
+def api_error_status(error):
+    """从 gspread.exceptions.APIError（或兼容的异常）中取出HTTP状态码，取不到时返回 None"""
+    status = getattr(error, 'code', None)
+    if status is None:
+        response = getattr(error, 'response', None)
+        status = getattr(response, 'status_code', None)
+    return status
+
+
+def is_retryable_error(error):
+    """配额超限（429）和服务端错误（5xx）可以重试"""
+    status = api_error_status(error)
+    return status is not None and (status == 429 or 500 <= status < 600)
+
+
+def coalesce_row_updates(row_values, first_column, last_column):
+    """
+    将 {行号: 该行的值列表} 合并为连续行的区块
+    例如第5、6、7行合并成一个 D5:L7 区块，而不是三个单行区块
+    返回: [{'range': 'D5:L7', 'values': [[...], [...], [...]]}]
+    """
+    blocks = []
+    start_row = None
+    previous_row = None
+    values = []
+    for row_index in sorted(row_values):
+        if previous_row is not None and row_index != previous_row + 1:
+            blocks.append({'range': f'{first_column}{start_row}:{last_column}{previous_row}', 'values': values})
+            start_row = None
+        if start_row is None:
+            start_row = row_index
+            values = []
+        values.append(row_values[row_index])
+        previous_row = row_index
+    if start_row is not None:
+        blocks.append({'range': f'{first_column}{start_row}:{last_column}{previous_row}', 'values': values})
+    return blocks
+
+
+class SheetsUpdateEngine:
+    """
+    Google Sheets 批量更新引擎：合并连续行、按请求体大小（而不是固定条数）切分请求，
+    通过 Spreadsheet.values_batch_update 提交，429 / 5xx 错误按指数退避重试
+    统计 API 调用次数、发送字节数和重试次数
+    """
+
+    def __init__(self, worksheet, first_column, last_column, max_payload_bytes=MAX_PAYLOAD_BYTES,
+                 max_retries=MAX_RETRIES, base_delay=BASE_RETRY_DELAY, sleep=time.sleep):
+        self.spreadsheet = worksheet.spreadsheet
+        self.sheet_title = worksheet.title.replace("'", "''")
+        self.first_column = column_letter(first_column)
+        self.last_column = column_letter(last_column)
+        self.max_payload_bytes = max_payload_bytes
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self._sleep = sleep
+        self.api_calls = 0
+        self.bytes_sent = 0
+        self.retries = 0
+
+    def update_rows(self, row_values):
+        """
+        提交 {行号: 该行的值列表}
+        返回: 提交失败的行号集合
+        """
+        return self.update_blocks(coalesce_row_updates(row_values, self.first_column, self.last_column))
+
+    def update_blocks(self, blocks):
+        """
+        提交任意区块 [{'range': 'E5:F5', 'values': [[...]]}]（例如只包含变化单元格的区块）
+        返回: 提交失败的行号集合
+        """
+        failed_rows = set()
+        for request_blocks in self._chunk_blocks(blocks):
+            if not self._send(request_blocks):
+                for block in request_blocks:
+                    start_row, end_row = self._block_rows(block)
+                    failed_rows.update(range(start_row, end_row + 1))
+        return failed_rows
+
+    def _block_rows(self, block):
+        match = BLOCK_RANGE_PATTERN.match(block['range'])
+        return int(match.group(2)), int(match.group(4))
+
+    def _data_item(self, block):
+        return {'range': f"'{self.sheet_title}'!{block['range']}", 'values': block['values']}
+
+    def _block_size(self, block):
+        """区块在请求体中占用的字节数（含工作表名前缀和分隔符）"""
+        return len(json.dumps(self._data_item(block), ensure_ascii=False).encode('utf-8')) + 2
+
+    def _split_block(self, block):
+        """把超过请求体上限的区块按行拆成两半"""
+        first_column, start_row, last_column, end_row = BLOCK_RANGE_PATTERN.match(block['range']).groups()
+        start_row, end_row = int(start_row), int(end_row)
+        if start_row == end_row:
+            return [block]
+        middle = (start_row + end_row) // 2
+        split_at = middle - start_row + 1
+        halves = [
+            {'range': f'{first_column}{start_row}:{last_column}{middle}', 'values': block['values'][:split_at]},
+            {'range': f'{first_column}{middle + 1}:{last_column}{end_row}', 'values': block['values'][split_at:]},
+        ]
+        result = []
+        for half in halves:
+            result.extend(self._split_block(half) if self._block_size(half) > self.max_payload_bytes else [half])
+        return result
+
+    def _chunk_blocks(self, blocks):
+        """按请求体大小把区块分组，每组对应一次API调用"""
+        envelope_size = len(json.dumps({'valueInputOption': 'RAW', 'data': []}).encode('utf-8'))
+        chunks = []
+        current = []
+        current_size = envelope_size
+        for block in blocks:
+            pieces = self._split_block(block) if self._block_size(block) > self.max_payload_bytes else [block]
+            for piece in pieces:
+                piece_size = self._block_size(piece)
+                if current and current_size + piece_size > self.max_payload_bytes:
+                    chunks.append(current)
+                    current = []
+                    current_size = envelope_size
+                current.append(piece)
+                current_size += piece_size
+        if current:
+            chunks.append(current)
+        return chunks
+
+    def _send(self, request_blocks):
+        body = {
+            'valueInputOption': 'RAW',
+            'data': [self._data_item(block) for block in request_blocks]
+        }
+        payload_size = len(json.dumps(body, ensure_ascii=False).encode('utf-8'))
+        row_count = len({
+            row_index
+            for block in request_blocks
+            for row_index in range(self._block_rows(block)[0], self._block_rows(block)[1] + 1)
+        })
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.api_calls += 1
+                self.bytes_sent += payload_size
+                self.spreadsheet.values_batch_update(body)
+                print(f"✓ 已提交 {len(request_blocks)} 个区块 / {row_count} 行（{payload_size} 字节）")
+                return True
+            except Exception as e:
+                if not is_retryable_error(e) or attempt == self.max_retries:
+                    print(f"❌ 提交 {row_count} 行失败: {e}")
+                    return False
+                delay = min(MAX_RETRY_DELAY, self.base_delay * (2 ** attempt)) + random.uniform(0, self.base_delay)
+                self.retries += 1
+                print(f"⚠️  Google Sheets 返回 {api_error_status(e)}，{delay:.1f} 秒后重试（第 {attempt + 1} 次）")
+                self._sleep(delay)
+        return False
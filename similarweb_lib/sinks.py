@@ -0,0 +1,40 @@
+from datetime import datetime
+
+from similarweb_lib.domains import DomainIndex
+
+
+class ResultSink:
+    """
+    输出目标的接口：把按域名索引的抓取结果写入某个表格
+    子类实现 apply（匹配并写入，返回更新的行数），需要时实现 close
+    """
+    name = ''
+
+    def apply(self, domain_index, update_time):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+def push_to_sinks(json_data_dict, sinks, update_time=None, close_sink=None):
+    """
+    只建立一次域名索引，依次写入多个输出目标
+    close_sink: 可选的 close_sink(sink)，代替 sink.close() 完成写入（例如 Excel 文件被占用时提示关闭后重试）
+    返回: {输出目标名称: 更新的行数}
+    """
+    if update_time is None:
+        update_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    domain_index = DomainIndex(json_data_dict)
+    updated_counts = {}
+    for sink in sinks:
+        domain_index.unmatched.clear()
+        updated_counts[sink.name] = sink.apply(domain_index, update_time)
+        print(f"✓ {sink.name}: 更新 {updated_counts[sink.name]} 行")
+        domain_index.print_report()
+        if close_sink is not None:
+            close_sink(sink)
+        else:
+            sink.close()
+    return updated_counts
@@ -0,0 +1,331 @@
+import math
+import os
+import posixpath
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from xml.parsers import expat
+from xml.sax.saxutils import escape, quoteattr
+
+from similarweb_lib.records import column_index, column_letter
+
+# 直接修改 .xlsx 中工作表XML的写入方式（只依赖标准库）：
+# openpyxl 的 load_workbook / save 会为每个单元格建立对象并重新生成整个文件，大工作簿上耗时主要花在这两步；
+# 这里用 expat 解析一次工作表XML（支持任意命名空间前缀），记录每一行的字节位置，
+# 需要更新的行重新生成指标单元格，其余内容按字节原样写回
+
+MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+PACKAGE_REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+
+CELL_REF_PATTERN = re.compile(r'([A-Z]+)(\d+)$')
+
+
+def _cell_column(ref, row):
+    match = CELL_REF_PATTERN.match(ref or '')
+    if match is None:
+        raise ValueError(f"第 {row} 行的单元格没有有效的 r 属性: {ref!r}")
+    return column_index(match.group(1))
+
+
+def _format_number(value):
+    """与 openpyxl 写入数值的格式一致（%.16g），NaN / 无穷大写成空单元格"""
+    if math.isnan(value) or math.isinf(value):
+        return None
+    return '%.16g' % value
+
+
+def _format_cell(prefix, ref, value, style):
+    """
+    生成一个单元格的XML（prefix 为工作表使用的命名空间前缀，例如 'x:' 或 ''）：
+    数值写成 <v>，字符串写成内联字符串，None 只保留样式
+    """
+    attributes = f' r="{ref}"' + (f' s="{style}"' if style else '')
+    if isinstance(value, bool):
+        return f'<{prefix}c{attributes} t="b"><{prefix}v>{int(value)}</{prefix}v></{prefix}c>'
+    if isinstance(value, (int, float)):
+        value = _format_number(value)
+        if value is not None:
+            return f'<{prefix}c{attributes}><{prefix}v>{value}</{prefix}v></{prefix}c>'
+    if value is None:
+        return f'<{prefix}c{attributes}/>' if style else ''
+    text = str(value)
+    space = ' xml:space="preserve"' if text != text.strip() else ''
+    return (f'<{prefix}c{attributes} t="inlineStr"><{prefix}is><{prefix}t{space}>{escape(text)}'
+            f'</{prefix}t></{prefix}is></{prefix}c>')
+
+
+def _element_end(data, index, empty):
+    """
+    expat 结束事件的 CurrentByteIndex：空元素（<c/>）指向元素之后，否则指向结束标签的 '<'
+    返回元素结束后的字节位置
+    """
+    return index if empty else data.index(b'>', index) + 1
+
+
+class _SheetReader:
+    """
+    用 expat 流式解析工作表XML，按命名空间（而不是标签前缀）识别 row / c / v / is / t 元素，
+    记录每一行的字节范围，并读取 columns 中各列的值
+    """
+
+    def __init__(self, data, columns, shared_strings):
+        self.data = data
+        self.columns = set(columns)
+        self.shared_strings = shared_strings
+        self.rows = []  # [(行号, {列号: 值})]
+        self.row_spans = {}  # 行号 -> 该行在工作表XML中的 (起始字节, 结束字节)
+        self.max_cell_row = 0  # 包含单元格的最大行号（与 openpyxl 的 max_row 一致）
+        self.encoding = None
+        self._parser = expat.ParserCreate(namespace_separator=' ')
+        self._parser.XmlDeclHandler = self._declaration
+        self._parser.StartElementHandler = self._start
+        self._parser.EndElementHandler = self._end
+        self._parser.CharacterDataHandler = self._characters
+        self._row = None  # (行号, 起始字节, {列号: 值})
+        self._cell = None  # (列号, 单元格类型)，只记录需要读取的列
+        self._text = None  # 正在收集的 <v> / <t> 文本
+        self._cell_text = []
+        self._phonetic_depth = 0  # 位于 <rPh>（注音）内部时不收集文本
+        self._empty_candidate = None  # 最近一个开始标签的字节位置，用于判断空元素
+
+    def parse(self):
+        self._parser.Parse(self.data, True)
+        return self
+
+    def _declaration(self, version, encoding, standalone):
+        self.encoding = encoding
+
+    def _start(self, name, attributes):
+        namespace, _, tag = name.rpartition(' ')
+        self._empty_candidate = self._parser.CurrentByteIndex
+        if namespace != MAIN_NS:
+            return
+        if tag == 'row':
+            previous = self.rows[-1][0] if self.rows else 0
+            row_number = int(attributes['r']) if 'r' in attributes else previous + 1
+            self._row = (row_number, self._parser.CurrentByteIndex, {})
+        elif tag == 'c' and self._row is not None:
+            row_number = self._row[0]
+            column = _cell_column(attributes.get('r'), row_number)
+            self.max_cell_row = max(self.max_cell_row, row_number)
+            if column in self.columns:
+                self._cell = (column, attributes.get('t'))
+                self._cell_text = []
+        elif tag == 'rPh':
+            self._phonetic_depth += 1
+        elif tag in ('v', 't') and self._cell is not None and not self._phonetic_depth:
+            self._text = []
+
+    def _end(self, name):
+        namespace, _, tag = name.rpartition(' ')
+        index = self._parser.CurrentByteIndex
+        empty = self._empty_candidate is not None and self.data[index - 2:index] == b'/>'
+        self._empty_candidate = None
+        if namespace != MAIN_NS:
+            return
+        if tag == 'row' and self._row is not None:
+            row_number, start, values = self._row
+            self.rows.append((row_number, values))
+            self.row_spans[row_number] = (start, _element_end(self.data, index, empty))
+            self._row = None
+        elif tag == 'c' and self._cell is not None:
+            column, cell_type = self._cell
+            self._row[2][column] = self._cell_value(cell_type, self._cell_text)
+            self._cell = None
+        elif tag == 'rPh':
+            self._phonetic_depth -= 1
+        elif tag in ('v', 't') and self._text is not None:
+            self._cell_text.append((tag, ''.join(self._text)))
+            self._text = None
+
+    def _characters(self, text):
+        self._empty_candidate = None
+        if self._text is not None:
+            self._text.append(text)
+
+    def _cell_value(self, cell_type, texts):
+        if cell_type == 'inlineStr':
+            return ''.join(text for tag, text in texts if tag == 't')
+        values = [text for tag, text in texts if tag == 'v']
+        if not values:
+            return None
+        value = values[0]
+        if cell_type == 's':
+            return self.shared_strings[int(value)]
+        if cell_type in ('str', 'e'):
+            return value
+        if cell_type == 'b':
+            return value == '1'
+        number = float(value)
+        return int(number) if number.is_integer() else number
+
+
+class _RowRewriter:
+    """解析单独一行的XML片段（不处理命名空间，保留原始前缀），重新生成该行"""
+
+    def __init__(self, row_number, data):
+        self.row_number = row_number
+        self.data = data
+        self.row_name = None
+        self.row_attributes = []
+        self.cells = []  # [(列号, 单元格原始字节, 样式, 是否包含公式)]
+        self._parser = expat.ParserCreate()
+        self._parser.ordered_attributes = True
+        self._parser.StartElementHandler = self._start
+        self._parser.EndElementHandler = self._end
+        self._parser.CharacterDataHandler = self._characters
+        self._depth = 0
+        self._cell = None  # [列号, 起始字节, 样式, 是否包含公式]
+        self._empty_candidate = None
+
+    def parse(self):
+        self._parser.Parse(self.data, True)
+        return self
+
+    def _start(self, name, attributes):
+        self._empty_candidate = self._parser.CurrentByteIndex
+        self._depth += 1
+        attributes = list(zip(attributes[::2], attributes[1::2]))
+        if self._depth == 1:
+            self.row_name = name
+            self.row_attributes = attributes
+        elif self._depth == 2:
+            values = dict(attributes)
+            column = _cell_column(values.get('r'), self.row_number)
+            self._cell = [column, self._parser.CurrentByteIndex, values.get('s'), False]
+        elif self._cell is not None and name.rpartition(':')[2] == 'f':
+            self._cell[3] = True
+
+    def _end(self, name):
+        index = self._parser.CurrentByteIndex
+        empty = self._empty_candidate is not None and self.data[index - 2:index] == b'/>'
+        self._empty_candidate = None
+        if self._depth == 2 and self._cell is not None:
+            column, start, style, has_formula = self._cell
+            self.cells.append((column, self.data[start:_element_end(self.data, index, empty)], style, has_formula))
+            self._cell = None
+        self._depth -= 1
+
+    def _characters(self, text):
+        self._empty_candidate = None
+
+    def rewrite(self, first_column, values):
+        last_column = first_column + len(values) - 1
+        prefix = self.row_name[:-len('row')]  # 例如 'x:' 或 ''
+        cells = []  # (列号, 单元格XML)
+        styles = {}
+        for column, cell_xml, style, has_formula in self.cells:
+            if first_column <= column <= last_column:
+                if has_formula:
+                    raise ValueError(f"第 {self.row_number} 行要覆盖的单元格包含公式")
+                styles[column] = style
+            else:
+                cells.append((column, cell_xml))
+        for offset, value in enumerate(values):
+            column = first_column + offset
+            cell_xml = _format_cell(prefix, f'{column_letter(column)}{self.row_number}', value, styles.get(column))
+            if cell_xml:
+                cells.append((column, cell_xml.encode('utf-8')))
+        cells.sort(key=lambda cell: cell[0])
+        # 单元格范围变化后 spans 提示可能不再准确，直接去掉（该属性可选）
+        attributes = ''.join(f' {key}={quoteattr(value)}' for key, value in self.row_attributes if key != 'spans')
+        return (f'<{self.row_name}{attributes}>'.encode('utf-8') + b''.join(cell_xml for _, cell_xml in cells)
+                + f'</{self.row_name}>'.encode('utf-8'))
+
+
+class XlsxSheetPatch:
+    """
+    读取 .xlsx 中活动工作表的单元格值，并只改写指定行的若干列，其余XML（样式、列宽、其他工作表等）保持不变
+    遇到无法安全处理的内容（没有识别到任何行、单元格没有 r 属性、要覆盖的单元格带公式、非UTF-8编码）时
+    抛出 ValueError，由调用方回退到 openpyxl
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with zipfile.ZipFile(path) as archive:
+            self.sheet_part = self._active_sheet_part(archive)
+            self.shared_strings = self._read_shared_strings(archive)
+            self._sheet_xml = archive.read(self.sheet_part)
+        self.max_cell_row = 0
+        self._updates = {}  # 行号 -> 修改后的行XML（字节）
+        self._row_spans = {}  # 行号 -> 该行在工作表XML中的 (起始字节, 结束字节)，由 read_rows 记录
+
+    @staticmethod
+    def _active_sheet_part(archive):
+        workbook = ET.fromstring(archive.read('xl/workbook.xml'))
+        view = workbook.find(f'{{{MAIN_NS}}}bookViews/{{{MAIN_NS}}}workbookView')
+        active_tab = int(view.get('activeTab', 0)) if view is not None else 0
+        sheets = workbook.findall(f'{{{MAIN_NS}}}sheets/{{{MAIN_NS}}}sheet')
+        relation_id = sheets[active_tab].get(f'{{{REL_NS}}}id')
+        relations = ET.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+        for relation in relations.findall(f'{{{PACKAGE_REL_NS}}}Relationship'):
+            if relation.get('Id') == relation_id:
+                target = relation.get('Target')
+                return target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join('xl', target))
+        raise ValueError(f"工作簿中找不到活动工作表 {relation_id}")
+
+    @staticmethod
+    def _read_shared_strings(archive):
+        if 'xl/sharedStrings.xml' not in archive.namelist():
+            return []
+        strings = []
+        for _, element in ET.iterparse(archive.open('xl/sharedStrings.xml')):
+            if element.tag == f'{{{MAIN_NS}}}si':
+                # 富文本由多段 <r><t> 组成；注音（rPh）不属于单元格文本
+                phonetic_texts = {id(t) for phonetic in element.iter(f'{{{MAIN_NS}}}rPh') for t in phonetic}
+                strings.append(''.join(
+                    text.text or '' for text in element.iter(f'{{{MAIN_NS}}}t') if id(text) not in phonetic_texts
+                ))
+                element.clear()
+        return strings
+
+    def read_rows(self, columns):
+        """
+        解析整个工作表，返回 [(行号, {列号: 值})]，只读取 columns 中的列
+        没有识别到任何行时抛出 ValueError（例如工作表使用了其他命名空间），避免静默地什么都不更新
+        """
+        try:
+            reader = _SheetReader(self._sheet_xml, columns, self.shared_strings).parse()
+        except expat.ExpatError as e:
+            raise ValueError(f"工作表XML解析失败: {e}") from e
+        if reader.encoding and reader.encoding.lower().replace('-', '') != 'utf8':
+            raise ValueError(f"不支持的工作表编码 {reader.encoding}")
+        if not reader.rows:
+            raise ValueError("工作表中没有识别到任何行")
+        self._row_spans = reader.row_spans
+        self.max_cell_row = reader.max_cell_row
+        return reader.rows
+
+    def set_row(self, row, first_column, values):
+        """
+        把 values 写入第 row 行从 first_column 开始的连续列，row 必须已由 read_rows 读到
+        新的行XML立即生成，要覆盖的单元格带公式时在这里抛出 ValueError（save 之前）
+        """
+        start, end = self._row_spans[row]
+        self._updates[row] = _RowRewriter(row, self._sheet_xml[start:end]).parse().rewrite(first_column, list(values))
+
+    def _sheet_pieces(self):
+        """按顺序产出修改后的工作表XML片段：未修改的部分直接切片，修改过的行用新生成的XML"""
+        position = 0
+        for row in sorted(self._updates, key=lambda row: self._row_spans[row][0]):
+            start, end = self._row_spans[row]
+            yield self._sheet_xml[position:start]
+            yield self._updates[row]
+            position = end
+        yield self._sheet_xml[position:]
+
+    def save(self, path=None):
+        """写出修改后的工作簿：先写临时文件，再原子替换目标文件（默认覆盖原文件）"""
+        path = path or self.path
+        temp_path = path + '.tmp.xlsx'
+        with zipfile.ZipFile(self.path) as source, zipfile.ZipFile(temp_path, 'w') as target:
+            for item in source.infolist():
+                if item.filename != self.sheet_part:
+                    target.writestr(item, source.read(item), compress_type=item.compress_type)
+                    continue
+                # 工作表XML分段写入压缩流，不在内存中拼出完整的新文件
+                with target.open(item, 'w', force_zip64=True) as sheet_file:
+                    for piece in self._sheet_pieces():
+                        sheet_file.write(piece)
+        os.replace(temp_path, path)
@@ -0,0 +1,81 @@
+from collections import deque
+
+from similarweb_lib.domains import extract_domain
+
+# 旧数据检测：数据页是单页应用，通过 hash 路由切换域名时偶尔会继续显示上一个域名的数据
+STALE_RENDER_WINDOW = 3  # 与最近多少个域名的数据指纹比较
+STALE_RENDER_MAX_RELOADS = 1  # 检测到旧数据时最多重新加载几次，仍不正确时按抓取失败处理（进入重试队列）
+
+
+# 页面上是否有文本节点正好是该域名，返回布尔值；只比较完整的文本节点（去掉协议和 www），不受页面语言和 CSS 类名影响
+# 这只是弱信号：还没有用采集的概览页快照确认数据页一定以这种形式显示域名（子域名可能显示为主域名，
+# 搜索框中的域名不是文本节点，接口提取模式下页面可能尚未渲染），因此只在数据指纹重复时作为旁证输出，
+# 不会单独触发重新加载；可用 benchmarks/replay_scrape.py 在快照上统计该规则的命中情况
+DOMAIN_SHOWN_SCRIPT = """
+    var domain = arguments[0];
+    var walker = document.createTreeWalker(document.body || document.documentElement, NodeFilter.SHOW_TEXT, null, false);
+    var node;
+    while ((node = walker.nextNode())) {
+        var text = node.nodeValue;
+        if (text.length > 300 || text.toLowerCase().indexOf(domain) === -1) { continue; }
+        text = text.trim().toLowerCase().replace(/^https?:\\/\\//, '').replace(/^www\\./, '').replace(/\\/$/, '');
+        if (text === domain) { return true; }
+    }
+    return false;
+"""
+
+
+def page_shows_domain(driver, website_url):
+    """
+    页面渲染出的内容中是否显示了该域名（而不是导航时的地址，地址总是与请求一致）
+    返回: True / False，脚本执行失败时返回 None（无法判断）
+    """
+    try:
+        return bool(driver.execute_script(DOMAIN_SHOWN_SCRIPT, extract_domain(website_url)))
+    except Exception as e:
+        print(f"⚠️  检查页面显示的网站时出错: {e}")
+        return None
+
+
+def data_fingerprint(record):
+    """
+    数据指纹：桌面端占比和月访问量，不同网站这两项同时相同的概率极低
+    没有数据的记录返回 None（多个网站都没有数据是正常情况，不参与比较）
+    """
+    if record is None or not record.has_data or not record.visits:
+        return None
+    return round(record.desktop_share, 6), record.visits
+
+
+class StaleRenderDetector:
+    """
+    检查渲染出的页面是否仍是上一个域名的数据：数据指纹与最近 window 个其他域名中的任何一个相同时判定为旧数据
+    （固定长度的环形缓冲区，每次检查 O(window)）；页面上是否显示该域名只作为旁证写入原因，不单独判定
+    每个浏览器使用一个实例
+    """
+
+    def __init__(self, window=STALE_RENDER_WINDOW):
+        self._recent = deque(maxlen=window)  # (规范化域名, 数据指纹)
+
+    def check(self, website_url, record, shows_domain=None):
+        """
+        shows_domain: 可选的无参函数（例如 lambda: page_shows_domain(driver, url)），只在数据指纹重复时调用
+        返回: None 表示数据属于该域名；否则返回原因（调用方应重新加载该域名）
+        """
+        fingerprint = data_fingerprint(record)
+        if fingerprint is None:
+            return None
+        domain = extract_domain(website_url)
+        for recent_domain, recent_fingerprint in self._recent:
+            if recent_fingerprint == fingerprint and recent_domain != domain:
+                reason = f"数据与之前的网站 {recent_domain} 完全相同，页面可能仍显示旧数据"
+                if shows_domain is not None and shows_domain() is False:
+                    reason += f"（页面上也没有显示 {domain}）"
+                return reason
+        return None
+
+    def remember(self, website_url, record):
+        """记录一个已确认的结果，供之后的域名比较"""
+        fingerprint = data_fingerprint(record)
+        if fingerprint is not None:
+            self._recent.append((extract_domain(website_url), fingerprint))
@@ -0,0 +1,96 @@
+"""
+指标解析的边界情况：批量解析 parse_metric_array 与逐个解析 parse_metric_value 的结果必须一致，
+无法解析的文本返回 None（不抛出异常）
+
+运行（在项目根目录）: python -m unittest discover tests  或  python -m pytest tests
+安装了 hypothesis（requirements-dev.txt）时额外运行随机生成输入的一致性检查
+"""
+import math
+import unittest
+
+from similarweb_lib.metrics import (MetricRecord, convert_metric_value_to_number, parse_fraction, parse_metric_array,
+                                    parse_metric_value, parse_number, parse_seconds)
+from similarweb_lib.records import record_to_row
+
+try:
+    from hypothesis import given, strategies as st
+except ImportError:  # hypothesis 只是开发依赖
+    given = None
+
+# 页面上出现过或可能出现的无法解析的文本
+UNPARSABLE_TEXTS = ["< 5K", "M", "K", "1.2.3K", "K%", "%", "5%%", ":", "1::2", "abc", "--", "1 234", "nan", "inf", "-inf%", "nan:1", "1e400"]
+EDGE_VALUES = UNPARSABLE_TEXTS + [
+    None, "", "  ", "N/A", "n/a", True, False, math.nan, math.inf, 0, 5, 12830.0,
+    "1,234", " 224.8M ", "1.2万", "3亿", "4千", "123K", "58.97%", "5 %", "00:03:34", "03:34", "1,000:00", "-5K",
+]
+
+
+def batch_value(value):
+    numbers, valid = parse_metric_array([value])
+    return numbers[0] if valid[0] else None
+
+
+class ScalarParsingTest(unittest.TestCase):
+
+    def test_unparsable_text_returns_none(self):
+        for text in UNPARSABLE_TEXTS:
+            with self.subTest(text=text):
+                self.assertIsNone(parse_number(text))
+                self.assertIsNone(parse_metric_value(text))
+
+    def test_convert_does_not_raise_on_unit_suffix(self):
+        for text in ("< 5K", "M", "1.2.3K", "万", "x亿"):
+            with self.subTest(text=text):
+                self.assertIsNone(convert_metric_value_to_number(text))
+
+    def test_known_formats(self):
+        self.assertEqual(parse_number("224.8M"), 224_800_000.0)
+        self.assertEqual(parse_number("1,234"), 1234.0)
+        self.assertEqual(parse_number("1.2万"), 12_000.0)
+        self.assertAlmostEqual(parse_fraction("58.97%"), 0.5897)
+        self.assertEqual(parse_seconds("00:03:34"), 214.0)
+        self.assertEqual(parse_seconds("03:34"), 214.0)
+
+    def test_missing_and_non_finite(self):
+        for value in (None, "", "N/A", True, math.nan, math.inf, "nan", "inf"):
+            with self.subTest(value=value):
+                self.assertIsNone(parse_number(value))
+                self.assertIsNone(parse_fraction(value))
+                self.assertIsNone(parse_seconds(value))
+
+    def test_record_with_unparsable_metric_keeps_valid_fields(self):
+        record = MetricRecord.from_dict({'desktopPersent': '58.97%', 'mobilePercent': '41.03%',
+                                         'visits': '< 5K', 'users_tab': 'M', 'pages-per-visit': '1.2.3K'})
+        self.assertTrue(record.has_data)
+        self.assertIsNone(record.visits)
+        self.assertIsNone(record.users_tab)
+        row = record_to_row({'desktopPersent': '58.97%', 'visits': '< 5K'}, '2025-01-01 00:00:00')
+        self.assertEqual(row[0], '58.97%')
+
+
+class BatchAgreementTest(unittest.TestCase):
+
+    def test_edge_values_agree(self):
+        for value in EDGE_VALUES:
+            with self.subTest(value=value):
+                self.assertEqual(batch_value(value), parse_metric_value(value))
+
+    def test_mask_and_nan(self):
+        numbers, valid = parse_metric_array(["< 5K", "123K", None])
+        self.assertEqual(list(valid), [0, 1, 0])
+        self.assertTrue(math.isnan(numbers[0]) and math.isnan(numbers[2]))
+        self.assertEqual(numbers[1], 123_000.0)
+
+    if given is not None:
+        @given(st.one_of(
+            st.none(),
+            st.floats(allow_nan=True, allow_infinity=True),
+            st.integers(min_value=-10 ** 12, max_value=10 ** 12),
+            st.text(alphabet="0123456789.,:%KM万亿千 -+<eEnaif/", max_size=12),
+        ))
+        def test_random_values_agree(self, value):
+            self.assertEqual(batch_value(value), parse_metric_value(value))
+
+
+if __name__ == '__main__':
+    unittest.main()
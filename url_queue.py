@@ -0,0 +1,321 @@
+import json
+import random
+import sqlite3
+import threading
+import time
+
+# 队列数据库文件路径
+QUEUE_DB_PATH = 'url_queue.db'
+QUEUE_LEASE_SECONDS = 300  # 租约时长（秒），worker 超时未确认的域名会被重新放回待处理
+
+# 失败重试：第 n 次失败后等待 RETRY_BASE_DELAY * 2^(n-1) 秒（不超过 RETRY_MAX_DELAY）再重试，期间其他域名照常抓取
+QUEUE_MAX_ATTEMPTS = 4  # 最多尝试次数，用完后移入死信文件
+RETRY_BASE_DELAY = 60.0
+RETRY_MAX_DELAY = 3600.0
+RETRY_POLL_INTERVAL = 5.0  # 只剩等待重试的域名时，检查一次的最长间隔（秒）
+DEAD_LETTER_PATH = 'dead_letter.jsonl'  # 多次失败的域名（JSONL，含最后一次错误和时间）
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# 租用优先级：低优先级的域名在所有普通域名之后才会被租用（例如复查之前没有数据的域名）
+PRIORITY_NORMAL = 0
+PRIORITY_LOW = 1
+
+# 域名状态
+STATUS_PENDING = 'pending'
+STATUS_IN_FLIGHT = 'in_flight'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+
+class UrlQueue:
+    """
+    基于 SQLite 的持久化抓取队列，替代逐行读写 urls.txt
+    每个域名记录 pending / in_flight / done / failed 状态，
+    lease 和 ack 都是按索引的单行操作，多个 worker 可以并发租用域名
+    失败的域名按指数退避重新排期（next_attempt_at），尝试次数用完后标记为 failed 并写入死信文件
+    同一时刻可租用的域名按 priority、id 排序，defer 可以把域名移到低优先级
+    """
+
+    def __init__(self, db_path=QUEUE_DB_PATH, lease_seconds=QUEUE_LEASE_SECONDS, max_attempts=QUEUE_MAX_ATTEMPTS,
+                 retry_base_delay=RETRY_BASE_DELAY, retry_max_delay=RETRY_MAX_DELAY, dead_letter_path=DEAD_LETTER_PATH):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.dead_letter_path = dead_letter_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS url_queue (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT NOT NULL UNIQUE,
+                status TEXT NOT NULL DEFAULT 'pending',
+                worker TEXT,
+                lease_until REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                updated_at REAL NOT NULL,
+                next_attempt_at REAL NOT NULL DEFAULT 0,
+                first_attempt_at REAL,
+                priority INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        # 旧版本创建的队列没有重试排期相关的列，补上
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(url_queue)")}
+        if 'next_attempt_at' not in columns:
+            self._conn.execute("ALTER TABLE url_queue ADD COLUMN next_attempt_at REAL NOT NULL DEFAULT 0")
+        if 'first_attempt_at' not in columns:
+            self._conn.execute("ALTER TABLE url_queue ADD COLUMN first_attempt_at REAL")
+        if 'priority' not in columns:
+            self._conn.execute("ALTER TABLE url_queue ADD COLUMN priority INTEGER NOT NULL DEFAULT 0")
+        self._conn.execute("DROP INDEX IF EXISTS idx_url_queue_status")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_url_queue_status_priority ON url_queue (status, priority, id)")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def enqueue_urls(self, urls):
+        """
+        批量加入域名：新域名为 pending；已完成或已失败的域名重新置为 pending；
+        pending / in_flight 中的域名保持不变
+        返回: 实际加入（或重新加入）的数量
+        """
+        now = time.time()
+        added_count = 0
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for url in urls:
+                    url = url.strip()
+                    if not url:
+                        continue
+                    cursor = self._conn.execute(
+                        "INSERT OR IGNORE INTO url_queue (url, status, updated_at) VALUES (?, ?, ?)",
+                        (url, STATUS_PENDING, now)
+                    )
+                    if cursor.rowcount == 0:
+                        cursor = self._conn.execute(
+                            "UPDATE url_queue SET status = ?, worker = NULL, lease_until = NULL, attempts = 0, last_error = NULL, updated_at = ?, "
+                            "next_attempt_at = 0, first_attempt_at = NULL, priority = ? "
+                            "WHERE url = ? AND status IN (?, ?)",
+                            (STATUS_PENDING, now, PRIORITY_NORMAL, url, STATUS_DONE, STATUS_FAILED)
+                        )
+                    added_count += cursor.rowcount
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return added_count
+
+    def import_from_file(self, urls_file_path):
+        """
+        将 urls.txt 中的域名导入队列，导入提交后清空 urls.txt
+        （如果在清空前中断，下次启动会重新导入，最多重复抓取，不会丢失域名）
+        返回: 导入的数量
+        """
+        try:
+            with open(urls_file_path, 'r', encoding='utf-8') as f:
+                urls = [line.strip() for line in f if line.strip()]
+        except FileNotFoundError:
+            return 0
+
+        if not urls:
+            return 0
+
+        added_count = self.enqueue_urls(urls)
+        with open(urls_file_path, 'w', encoding='utf-8') as f:
+            f.write("")
+        return added_count
+
+    def recover_in_flight(self):
+        """
+        启动时将上次运行遗留的 in_flight 域名全部放回 pending
+        返回: 恢复的数量
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE url_queue SET status = ?, worker = NULL, lease_until = NULL, updated_at = ? WHERE status = ?",
+                (STATUS_PENDING, time.time(), STATUS_IN_FLIGHT)
+            )
+            return cursor.rowcount
+
+    def lease(self, worker_id):
+        """
+        租用下一个待处理且已到重试时间的域名，租约到期未确认的域名会被其他 worker 重新租用
+        返回: 域名字符串，没有可租用的域名时返回 None（可能还有等待重试的域名，见 next_retry_delay）
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "UPDATE url_queue SET status = ?, worker = NULL, lease_until = NULL, updated_at = ? "
+                    "WHERE status = ? AND lease_until < ?",
+                    (STATUS_PENDING, now, STATUS_IN_FLIGHT, now)
+                )
+                row = self._conn.execute(
+                    "SELECT id, url FROM url_queue WHERE status = ? AND next_attempt_at <= ? ORDER BY priority, id LIMIT 1",
+                    (STATUS_PENDING, now)
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                self._conn.execute(
+                    "UPDATE url_queue SET status = ?, worker = ?, lease_until = ?, attempts = attempts + 1, updated_at = ?, "
+                    "first_attempt_at = COALESCE(first_attempt_at, ?) WHERE id = ?",
+                    (STATUS_IN_FLIGHT, str(worker_id), now + self.lease_seconds, now, now, row[0])
+                )
+                self._conn.execute("COMMIT")
+                return row[1]
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def next_retry_delay(self):
+        """
+        返回: 距离最早一个等待重试的域名到期还有多少秒（已到期为 0）；没有待处理的域名时返回 None
+        """
+        with self._lock:
+            next_attempt_at = self._conn.execute(
+                "SELECT MIN(next_attempt_at) FROM url_queue WHERE status = ?", (STATUS_PENDING,)
+            ).fetchone()[0]
+        if next_attempt_at is None:
+            return None
+        return max(0.0, next_attempt_at - time.time())
+
+    def lease_next(self, worker_id, should_stop=None, sleep=time.sleep):
+        """
+        租用下一个域名；只剩等待重试的域名时等到最早的一个到期（期间每隔最多 RETRY_POLL_INTERVAL 秒检查 should_stop）
+        返回: 域名字符串，队列中已没有待处理的域名（或 should_stop 返回 True）时返回 None
+        """
+        announced = False
+        while should_stop is None or not should_stop():
+            url = self.lease(worker_id)
+            if url is not None:
+                return url
+            delay = self.next_retry_delay()
+            if delay is None:
+                return None
+            if not announced:
+                print(f"⏳ [{worker_id}] 暂无可抓取的域名，{delay:.0f} 秒后有域名到达重试时间...")
+                announced = True
+            sleep(min(max(delay, 0.1), RETRY_POLL_INTERVAL))
+        return None
+
+    def retry_delay(self, attempts):
+        """第 attempts 次失败后的等待时间（指数退避，带 ±20% 随机抖动）"""
+        delay = min(self.retry_max_delay, self.retry_base_delay * (2 ** max(0, attempts - 1)))
+        return delay * random.uniform(0.8, 1.2)
+
+    def _set_status(self, url, status, error=None):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE url_queue SET status = ?, worker = NULL, lease_until = NULL, last_error = ?, updated_at = ? WHERE url = ?",
+                (status, error, time.time(), url)
+            )
+
+    def ack(self, url):
+        """确认域名已抓取完成"""
+        self._set_status(url, STATUS_DONE)
+
+    def fail(self, url, error=None):
+        """
+        记录一次失败：尝试次数未用完时按指数退避重新排期，其他域名照常抓取；
+        用完后标记为 failed（不会再被自动租用），并把最后一次错误和时间写入死信文件
+        返回: 下一次重试的时间戳，已移入死信时返回 None
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT attempts, first_attempt_at FROM url_queue WHERE url = ?", (url,)
+            ).fetchone()
+            attempts, first_attempt_at = row if row else (self.max_attempts, None)
+            if attempts < self.max_attempts:
+                next_attempt_at = now + self.retry_delay(attempts)
+                self._conn.execute(
+                    "UPDATE url_queue SET status = ?, worker = NULL, lease_until = NULL, last_error = ?, updated_at = ?, "
+                    "next_attempt_at = ? WHERE url = ?",
+                    (STATUS_PENDING, error, now, next_attempt_at, url)
+                )
+                return next_attempt_at
+
+            self._conn.execute(
+                "UPDATE url_queue SET status = ?, worker = NULL, lease_until = NULL, last_error = ?, updated_at = ? WHERE url = ?",
+                (STATUS_FAILED, error, now, url)
+            )
+            self._write_dead_letter(url, attempts, error, first_attempt_at, now)
+            return None
+
+    def _write_dead_letter(self, url, attempts, error, first_attempt_at, failed_at):
+        entry = {
+            'url': url,
+            'attempts': attempts,
+            'last_error': error,
+            'first_attempt_at': time.strftime(TIME_FORMAT, time.localtime(first_attempt_at)) if first_attempt_at else None,
+            'failed_at': time.strftime(TIME_FORMAT, time.localtime(failed_at)),
+            'elapsed_seconds': round(failed_at - first_attempt_at, 1) if first_attempt_at else None,
+        }
+        try:
+            with open(self.dead_letter_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        except Exception as e:
+            print(f"⚠️  写入死信文件失败: {e}")
+
+    def release(self, url):
+        """放弃租约，将域名放回 pending（不计为失败，也不占用尝试次数），只用于中断、退出等与该域名无关的情况"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE url_queue SET status = ?, worker = NULL, lease_until = NULL, attempts = MAX(attempts - 1, 0), updated_at = ? "
+                "WHERE url = ?",
+                (STATUS_PENDING, time.time(), url)
+            )
+
+    def defer(self, url):
+        """
+        放弃租约并把域名移到低优先级（不计为失败，也不占用尝试次数），在所有普通域名之后再租用
+        返回: True 表示已移到低优先级；域名已经是低优先级时返回 False（调用方应直接处理，避免反复推迟）
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE url_queue SET status = ?, worker = NULL, lease_until = NULL, attempts = MAX(attempts - 1, 0), "
+                "updated_at = ?, priority = ? WHERE url = ? AND priority < ?",
+                (STATUS_PENDING, time.time(), PRIORITY_LOW, url, PRIORITY_LOW)
+            )
+            return cursor.rowcount > 0
+
+    def counts(self):
+        """
+        统计各状态的域名数量
+        返回: {状态: 数量}
+        """
+        result = {STATUS_PENDING: 0, STATUS_IN_FLIGHT: 0, STATUS_DONE: 0, STATUS_FAILED: 0}
+        with self._lock:
+            for status, count in self._conn.execute("SELECT status, COUNT(*) FROM url_queue GROUP BY status"):
+                result[status] = count
+        return result
+
+    def count(self, status):
+        """统计单个状态的域名数量（走状态索引，不扫描全表）"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM url_queue WHERE status = ?", (status,)).fetchone()[0]
+
+    def scheduled_retries(self):
+        """统计正在等待重试的域名数量（pending 且重试时间未到）"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM url_queue WHERE status = ? AND next_attempt_at > ?", (STATUS_PENDING, time.time())
+            ).fetchone()[0]
+
+    def failed_urls(self):
+        """
+        返回: [(域名, 尝试次数, 最后一次错误)]
+        """
+        with self._lock:
+            return self._conn.execute(
+                "SELECT url, attempts, last_error FROM url_queue WHERE status = ? ORDER BY id",
+                (STATUS_FAILED,)
+            ).fetchall()